@@ -1,8 +1,13 @@
+import logging
 import os
 import sys
+import threading
 from kivy.utils import platform
 from kivy.storage.jsonstore import JsonStore
 from cache import StockCache
+from calc_history import CalcHistory
+from fincalc.lots import Ledger
+import instrumentation
 
 # --- PORTABLE MODE PATH LOGIC ---
 if platform == 'android':
@@ -46,27 +51,24 @@ default_rf = 4.2
 global_currency_list = []
 debug_mode = False
 portfolio_data = [] 
+portfolio_beta = None # Set by the portfolio risk analysis; prefills the CAPM popup
+lot_method = "FIFO"   # Synced from FinCalcApp.lot_method
+money_mode = "float"  # Synced from FinCalcApp.money_mode ("exact" = fixed-point, see fincalc/money.py)
 
 # --- HISTORY HELPERS ---
+calc_history = CalcHistory(os.path.join(base_dir, "calc_history.jsonl"))
+if cache_store.exists("calc_history"):
+    # One-time move of the old 50-entry list into the journal
+    calc_history.extend(cache_store.get("calc_history")['data'])
+    cache_store.delete("calc_history")
+
+@instrumentation.timed("store.write")
 def save_calc_history(expression):
-    if not cache_store.exists("calc_history"):
-        history = []
-    else:
-        history = cache_store.get("calc_history")['data']
-    
-    if history and history[-1] == expression:
-        return
-
-    history.append(expression)
-    if len(history) > 50:
-        history.pop(0)
-        
-    cache_store.put("calc_history", data=history)
+    calc_history.append(expression)
 
 def get_calc_history():
-    if cache_store.exists("calc_history"):
-        return cache_store.get("calc_history")['data']
-    return []
+    """The live history (oldest first); supports len(), indexing and search()."""
+    return calc_history
 
 # --- PORTFOLIO HELPERS ---
 def get_portfolio():
@@ -74,12 +76,71 @@ def get_portfolio():
         return cache_store.get("portfolio")['data']
     return []
 
+@instrumentation.timed("store.write")
 def add_trade(trade_data):
     holdings = get_portfolio()
     holdings.append(trade_data)
     cache_store.put("portfolio", data=holdings)
 
+    # Keep the lot ledger current without replaying history (unless the trade is backdated)
+    global _ledger
+    with _ledger_lock:
+        if _ledger is not None:
+            if _ledger.can_append(trade_data): _ledger.apply(trade_data)
+            else: _ledger = None
+
+@instrumentation.timed("store.write")
 def remove_trade(trade_id):
+    """Deletes a trade; False (nothing changed) if sells still matched against it would no longer apply."""
     holdings = get_portfolio()
     updated = [t for t in holdings if t.get('id') != trade_id]
-    cache_store.put("portfolio", data=updated)
\ No newline at end of file
+    # Only sells that break because of this delete count; trades the ledger already skips don't block it
+    already = {id(t) for t, _ in Ledger.from_trades(holdings, lot_method).rejected}
+    broken = [(t, reason) for t, reason in Ledger.from_trades(updated, lot_method).rejected if id(t) not in already]
+    if broken:
+        logging.warning(f"Trade {trade_id} not removed: {broken[0][1]}")
+        return False
+    cache_store.put("portfolio", data=updated)
+    invalidate_ledger()
+    return True
+
+# --- WATCHLIST HELPERS ---
+def get_watchlist():
+    if cache_store.exists("watchlist"):
+        return cache_store.get("watchlist")['data']
+    return []
+
+@instrumentation.timed("store.write")
+def save_watchlist(tickers):
+    cache_store.put("watchlist", data=list(tickers))
+
+# --- TAX-LOT LEDGER ---
+_ledger = None
+_ledger_lock = threading.RLock()
+
+def get_ledger():
+    """Lot ledger for the stored trades, built once and then updated incrementally by add_trade."""
+    global _ledger
+    with _ledger_lock:
+        if _ledger is None or _ledger.method != lot_method:
+            _ledger = Ledger.from_trades(get_portfolio(), lot_method)
+            for trade, reason in _ledger.rejected:
+                logging.error(f"Ledger skipped trade {trade.get('id')}: {reason}")
+        return _ledger
+
+def get_lot_summary():
+    """Open lots plus realized P&L, read under the ledger lock so background refreshes see a consistent view."""
+    with _ledger_lock:
+        ledger = get_ledger()
+        return {
+            "lots": ledger.open_lots(),
+            "positions": ledger.positions(),
+            "realized": ledger.realized,
+            "dividends": ledger.dividends,
+            "sales": list(ledger.sales),
+        }
+
+def invalidate_ledger():
+    global _ledger
+    with _ledger_lock:
+        _ledger = None
\ No newline at end of file
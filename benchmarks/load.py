@@ -0,0 +1,86 @@
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Allow "python benchmarks/load.py" as well as "python -m benchmarks.load"
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path: sys.path.insert(0, ROOT)
+
+import requests
+
+import transport
+from benchmarks import stubs
+from stub_server import StubServer
+
+# --- FETCH-PIPELINE LOAD TEST ---
+# Replays the app's request mix (FX rates, crypto markets, watchlist download, stock
+# history) against the local stub server with injected latency and errors, from many
+# threads at once. Fixtures come from --fixtures (recorded with
+# FINCALC_TRANSPORT=record:<dir>) or, by default, from the seeded benchmark stub.
+
+def record_stub_fixtures(fixture_dir):
+    recorder = transport.RecordingTransport(fixture_dir)
+    with stubs.offline():
+        recorder.get("https://open.er-api.com/v6/latest/USD")
+        recorder.get("https://api.coingecko.com/api/v3/coins/markets", params={"vs_currency": "usd", "per_page": 50})
+        recorder.download([f"T{i}" for i in range(20)], period="1mo", interval="1d", group_by='ticker', progress=False)
+        recorder.history("NVDA", period="max", interval="1d")
+    return fixture_dir
+
+REQUESTS = [
+    lambda t: t.get("https://open.er-api.com/v6/latest/USD").raise_for_status(),
+    lambda t: t.get("https://api.coingecko.com/api/v3/coins/markets", params={"vs_currency": "usd", "per_page": 50}).raise_for_status(),
+    lambda t: t.download([f"T{i}" for i in range(20)], period="1mo", interval="1d", group_by='ticker', progress=False),
+    lambda t: t.history("NVDA", period="max", interval="1d"),
+]
+
+def run(server_url, threads, count):
+    local = transport.StubTransport(server_url)
+    latencies, errors = [], 0
+
+    def one(i):
+        start = time.perf_counter()
+        try:
+            REQUESTS[i % len(REQUESTS)](local)
+            return time.perf_counter() - start, None
+        except requests.exceptions.RequestException as e:
+            return time.perf_counter() - start, e
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as ex:
+        for elapsed, error in ex.map(one, range(count)):
+            latencies.append(elapsed)
+            errors += error is not None
+    wall = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "requests": count, "errors": errors, "wall_s": wall, "rps": count / wall,
+        "p50_ms": statistics.median(latencies) * 1e3,
+        "p95_ms": latencies[int(0.95 * (len(latencies) - 1))] * 1e3,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the fetch pipelines against the local stub server.")
+    parser.add_argument("--fixtures", help="Recorded fixture dir (default: seeded stub data)")
+    parser.add_argument("-n", "--requests", type=int, default=400)
+    parser.add_argument("-t", "--threads", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--jitter", type=float, default=0.02)
+    parser.add_argument("--error-rate", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    fixtures = args.fixtures or record_stub_fixtures(tempfile.mkdtemp())
+    with StubServer(fixtures, latency=args.latency, jitter=args.jitter, error_rate=args.error_rate, seed=args.seed) as server:
+        result = run(server.url, args.threads, args.requests)
+        print(f"{result['requests']} requests, {args.threads} threads: {result['rps']:.1f} req/s, "
+              f"p50 {result['p50_ms']:.1f} ms, p95 {result['p95_ms']:.1f} ms, "
+              f"{result['errors']} errors (server: {server.stats})")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
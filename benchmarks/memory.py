@@ -0,0 +1,52 @@
+import argparse
+import gc
+import json
+import os
+import sys
+import tracemalloc
+
+# Allow "python benchmarks/memory.py" as well as "python -m benchmarks.memory"
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path: sys.path.insert(0, ROOT)
+
+from benchmarks.run import make_lots
+from fincalc.trades import Trade, TradeColumns
+
+# --- TRADE RECORD MEMORY ---
+# Bytes per lot kept alive by each in-memory representation, measured with
+# tracemalloc. Every representation is built from the same JSON text, the way the
+# portfolio comes out of data_cache.json; the decoded dicts are dropped afterwards.
+
+def _retained(build, text):
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = build(json.loads(text))
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return after - before
+
+REPRESENTATIONS = {
+    "dict": lambda records: records,
+    "Trade (slots)": lambda records: [Trade.from_dict(d) for d in records],
+    "TradeColumns": TradeColumns.from_trades,
+}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Per-lot memory of the trade record representations.")
+    parser.add_argument("-n", "--count", type=int, default=100_000, help="Lots to build (default 100k)")
+    args = parser.parse_args(argv)
+
+    source = json.dumps(make_lots(args.count))
+    base = None
+    print(f"{'representation':<20}{'bytes/lot':>12}{'vs dict':>10}")
+    for name, build in REPRESENTATIONS.items():
+        per_lot = _retained(build, source) / args.count
+        base = base or per_lot
+        print(f"{name:<20}{per_lot:>12.1f}{per_lot / base:>9.2f}x")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,96 @@
+import contextlib
+import random
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+# --- LOCAL MARKET DATA STUB ---
+# Stands in for Yahoo (yfinance), CoinGecko and er-api so benchmarks never touch the network.
+# Everything is seeded: the same call returns the same data on every run.
+
+def make_history(days=30, seed=0, start_price=100.0, freq="D"):
+    rng = np.random.default_rng(seed)
+    index = pd.date_range(end=pd.Timestamp("2024-01-31"), periods=days, freq=freq)
+    close = start_price * np.exp(np.cumsum(rng.normal(0, 0.01, days)))
+    return pd.DataFrame({
+        "Open": close * 0.995, "High": close * 1.01, "Low": close * 0.99,
+        "Close": close, "Volume": rng.integers(1_000_000, 5_000_000, days),
+    }, index=index)
+
+def _seed_for(ticker):
+    return sum(ord(c) for c in ticker)
+
+def fake_download(tickers, period="1d", group_by="column", progress=False, **kwargs):
+    if isinstance(tickers, str): tickers = tickers.split()
+    days = {"1d": 1, "5d": 5, "1mo": 21, "3mo": 63, "1y": 252}.get(period, 30)
+    frames = {t: make_history(days, _seed_for(t)) for t in tickers}
+    if len(tickers) == 1 and group_by != "ticker":
+        return frames[tickers[0]]
+    return pd.concat(frames, axis=1)
+
+class FakeTicker:
+    def __init__(self, ticker):
+        self.ticker = ticker
+
+    def history(self, period="1mo", interval="1d", start=None, **kwargs):
+        return fake_download([self.ticker], period=period)
+
+    @property
+    def info(self):
+        last = make_history(1, _seed_for(self.ticker)).iloc[-1]
+        return {
+            "open": float(last["Open"]), "dayHigh": float(last["High"]), "dayLow": float(last["Low"]),
+            "marketCap": 2.5e12, "trailingPE": 31.4, "volume": int(last["Volume"]),
+        }
+
+class FakeResponse:
+    def __init__(self, payload, status_code=200):
+        self.payload = payload
+        self.status_code = status_code
+
+    def json(self):
+        return self.payload
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            import requests
+            raise requests.exceptions.HTTPError(f"{self.status_code} Error", response=self)
+
+    def iter_content(self, chunk_size=1024):
+        yield b"\x89PNG\r\n\x1a\n"
+
+def coingecko_markets(vs_currency="usd", per_page=10):
+    rng = random.Random(per_page)
+    return [{
+        "id": f"coin-{i}", "symbol": f"c{i}", "name": f"Coin {i}",
+        "image": f"https://stub.local/coin-{i}.png",
+        "current_price": rng.uniform(0.001, 50000), "market_cap": rng.uniform(1e6, 1e12),
+        "total_volume": rng.uniform(1e5, 1e10), "price_change_percentage_24h": rng.uniform(-10, 10),
+        "high_24h": 0, "low_24h": 0,
+    } for i in range(per_page)]
+
+def fx_rates(base="USD"):
+    rng = random.Random(base)
+    codes = ["USD", "EUR", "GBP", "JPY", "CNY", "INR", "CAD", "AUD", "CHF", "BRL"]
+    return {"result": "success", "base_code": base, "rates": {c: (1.0 if c == base else rng.uniform(0.5, 150)) for c in codes}}
+
+def fake_requests_get(url, params=None, timeout=None, stream=False, **kwargs):
+    params = params or {}
+    if "coins/markets" in url:
+        return FakeResponse(coingecko_markets(params.get("vs_currency", "usd"), int(params.get("per_page", 10))))
+    if "api.coingecko.com/api/v3/search" in url:
+        return FakeResponse({"coins": [{"id": f"coin-{i}"} for i in range(5)]})
+    if "er-api.com" in url:
+        return FakeResponse(fx_rates(url.rstrip("/").rsplit("/", 1)[-1]))
+    return FakeResponse({}, status_code=404)
+
+@contextlib.contextmanager
+def offline():
+    """Patches yfinance and requests with the local stub for the duration of the block."""
+    import requests
+    import yfinance as yf
+    with mock.patch.object(yf, "download", fake_download), \
+         mock.patch.object(yf, "Ticker", FakeTicker), \
+         mock.patch.object(requests, "get", fake_requests_get):
+        yield
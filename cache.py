@@ -1,5 +1,6 @@
 import threading
 from collections import OrderedDict
+import instrumentation
 
 class StockCache:
     def __init__(self, max_size=50):
@@ -10,8 +11,11 @@ class StockCache:
     def get(self, key):
         with self.lock:
             data = self.cache.get(key)
-            if data:
+            if data is not None:  # DataFrames/Series have no truth value
                 self.cache.move_to_end(key)
+                instrumentation.count("cache.stock.hit")
+            else:
+                instrumentation.count("cache.stock.miss")
             return data
 
     def set(self, key, value):
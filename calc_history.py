@@ -0,0 +1,105 @@
+import json
+import logging
+import os
+import threading
+
+# --- CALCULATOR HISTORY ---
+# Entries live in a fixed-size ring buffer in memory. Each new entry is one JSON line
+# appended to a journal file; once the journal holds COMPACT_FACTOR x capacity lines
+# it is rewritten with just the live entries (temp file + os.replace). Pressing "="
+# therefore costs an O(1) append (amortised), never a rewrite of the whole history.
+
+CAPACITY = 10000
+COMPACT_FACTOR = 2
+
+class CalcHistory:
+    """Oldest-first sequence of the last `capacity` expressions, persisted to `path`."""
+
+    def __init__(self, path, capacity=CAPACITY):
+        self.path = path
+        self.capacity = capacity
+        self._items = [None] * capacity
+        self._start = 0   # Slot of the oldest entry
+        self._size = 0
+        self._lines = 0   # Lines in the journal file, live or not
+        self._lock = threading.RLock()  # compact() runs inside append()
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    self._lines += 1
+                    try:
+                        self._push(json.loads(line))
+                    except ValueError:
+                        continue  # A line cut short by a crash mid-write
+        except FileNotFoundError:
+            return
+        except OSError as e:
+            logging.error(f"History Read Error: {e}")
+            return
+        if self._lines > self._size: self.compact()
+
+    def _push(self, expression):
+        if self._size < self.capacity:
+            self._items[(self._start + self._size) % self.capacity] = expression
+            self._size += 1
+        else:
+            self._items[self._start] = expression
+            self._start = (self._start + 1) % self.capacity
+
+    def __len__(self):
+        return self._size
+
+    def __getitem__(self, i):
+        if i < 0: i += self._size
+        if not 0 <= i < self._size: raise IndexError("history index out of range")
+        return self._items[(self._start + i) % self.capacity]
+
+    def __iter__(self):
+        for i in range(self._size): yield self[i]
+
+    def append(self, expression):
+        """Adds an entry unless it repeats the last one; returns True if it was added."""
+        with self._lock:
+            if self._size and self[-1] == expression: return False
+            self._push(expression)
+            try:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(expression) + "\n")
+                self._lines += 1
+            except OSError as e:
+                logging.error(f"History Write Error: {e}")
+            if self._lines >= COMPACT_FACTOR * self.capacity: self.compact()
+            return True
+
+    def extend(self, expressions):
+        """Bulk import (e.g. the old JsonStore list); one write for the lot."""
+        with self._lock:
+            for expression in expressions:
+                if not self._size or self[-1] != expression: self._push(expression)
+        self.compact()
+
+    def compact(self):
+        """Rewrites the journal with only the entries still in the ring."""
+        with self._lock:
+            tmp = self.path + ".tmp"
+            try:
+                with open(tmp, "w", encoding="utf-8") as f:
+                    f.writelines(json.dumps(e) + "\n" for e in self)
+                os.replace(tmp, self.path)
+                self._lines = self._size
+            except OSError as e:
+                logging.error(f"History Write Error: {e}")
+
+    def search(self, query, limit=50):
+        """Newest-first entries containing query (case-insensitive)."""
+        query = query.strip().lower()
+        found = []
+        for i in range(self._size - 1, -1, -1):
+            expression = self[i]
+            if query in expression.lower():
+                found.append(expression)
+                if len(found) >= limit: break
+        return found
@@ -3,6 +3,7 @@ from kivymd.uix.button import MDFlatButton
 from kivymd.uix.list import OneLineListItem
 from kivymd.uix.boxlayout import MDBoxLayout
 import app_state
+import instrumentation
 
 # --- CONSTANTS ---
 COINGECKO_CURRENCIES = [
@@ -57,6 +58,7 @@ class CurrencySearchHelper:
         )
         self.dialog.open()
 
+    @instrumentation.timed("ui.currency_list")
     def populate_list(self, currency_list):
         scroll_list = self.content.ids.currency_scroll_list
         scroll_list.clear_widgets()
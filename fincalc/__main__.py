@@ -0,0 +1,5 @@
+import sys
+
+from fincalc.cli import main
+
+sys.exit(main())
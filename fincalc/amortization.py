@@ -0,0 +1,113 @@
+import csv
+
+import numpy as np
+
+# --- AMORTIZATION ENGINE ---
+# Schedules are dicts of equal-length NumPy arrays (one entry per payment period).
+# Balances come from the closed form B_k = G_k * (B_0 - sum_j pay_j / G_j), where
+# G_k is the cumulative growth factor, so no per-period Python loop is needed.
+
+COLUMNS = ["period", "payment", "principal", "interest", "balance"]
+
+def payment(principal, annual_rate, months):
+    """Vectorized monthly payment; broadcasts over array inputs."""
+    principal, months = np.asarray(principal, float), np.asarray(months, float)
+    r = np.asarray(annual_rate, float) / 12
+    safe_r = np.where(r > 0, r, 1.0)
+    growth = (1 + safe_r) ** months
+    return np.where(r > 0, principal * safe_r * growth / (growth - 1), principal / months)
+
+def schedule(principal, annual_rate, months, extra=0.0, rate_resets=None):
+    """Full schedule for one loan.
+
+    extra: extra principal paid each period (scalar or one value per period).
+    rate_resets: {period: new annual rate}; the payment is re-amortized over the
+    remaining term from that period on, like an ARM reset.
+    """
+    months = int(months)
+    rates = np.full(months, annual_rate / 12)
+    starts = [0]
+    for start, rate in sorted((rate_resets or {}).items()):
+        if 1 < start <= months:
+            rates[start - 1:] = rate / 12
+            starts.append(start - 1)
+    starts.append(months)
+    extra = np.broadcast_to(np.asarray(extra, float), (months,))
+
+    payments = np.zeros(months)
+    balances = np.zeros(months)
+    balance = float(principal)
+    end = months
+    for a, b in zip(starts[:-1], starts[1:]):
+        if a == b: continue
+        r = rates[a]
+        scheduled = float(payment(balance, r * 12, months - a))
+        pay = scheduled + extra[a:b]
+        growth = (1 + r) ** np.arange(1, b - a + 1)
+        seg = growth * (balance - np.cumsum(pay / growth))
+        payments[a:b], balances[a:b] = pay, seg
+
+        paid_off = np.flatnonzero(seg <= 1e-6)
+        if paid_off.size:
+            end = a + paid_off[0] + 1
+            break
+        balance = seg[-1]
+
+    payments, balances, rates = payments[:end], balances[:end], rates[:end]
+    opening = np.concatenate(([float(principal)], balances[:-1]))
+    interest = opening * rates
+    # Final period only pays what is left (extra payments can overshoot)
+    payments[-1] = opening[-1] + interest[-1]
+    balances[-1] = 0.0
+    return {
+        "period": np.arange(1, end + 1),
+        "payment": payments,
+        "principal": payments - interest,
+        "interest": interest,
+        "balance": balances,
+    }
+
+def batch_schedules(principals, annual_rates, months):
+    """Fixed-rate schedules for many loans at once.
+
+    Returns 2D arrays (scenario x period); periods past a loan's term are zero.
+    """
+    principals = np.asarray(principals, float)[:, None]
+    r = (np.asarray(annual_rates, float) / 12)[:, None]
+    terms = np.asarray(months, int).reshape(-1)
+    terms = np.broadcast_to(terms, (principals.shape[0],))[:, None]
+    k = np.arange(1, terms.max() + 1)[None, :]
+    active = k <= terms
+
+    pmt = payment(principals, r * 12, terms)
+    safe_r = np.where(r > 0, r, 1.0)
+    growth = (1 + safe_r) ** k
+    balance = np.where(r > 0, principals * growth - pmt * (growth - 1) / safe_r, principals - pmt * k)
+    balance = np.where(active, np.maximum(balance, 0.0), 0.0)
+    opening = np.concatenate((principals, balance[:, :-1]), axis=1)
+    interest = np.where(active, opening * r, 0.0)
+    pay = np.where(active, pmt, 0.0)
+    return {"period": k[0], "payment": pay, "principal": pay - interest, "interest": interest, "balance": balance}
+
+def summary(sched):
+    return {
+        "payment": float(sched["payment"][0]) if len(sched["payment"]) else 0.0,
+        "periods": int(len(sched["period"])),
+        "total_interest": float(sched["interest"].sum()),
+        "total_paid": float(sched["payment"].sum()),
+    }
+
+def page(sched, start, size):
+    """Rows [start, start + size) as dicts, for lazily filling a list view."""
+    stop = min(start + size, len(sched["period"]))
+    return [{c: sched[c][i].item() for c in COLUMNS} for i in range(start, stop)]
+
+def write_csv(sched, f, chunk=1000):
+    """Streams the schedule to an open text file in chunks instead of building it in memory."""
+    writer = csv.writer(f)
+    writer.writerow(COLUMNS)
+    n = len(sched["period"])
+    for start in range(0, n, chunk):
+        stop = min(start + chunk, n)
+        block = np.column_stack([sched[c][start:stop] for c in COLUMNS[1:]]).round(2)
+        writer.writerows((int(p), *row) for p, row in zip(sched["period"][start:stop], block.tolist()))
@@ -0,0 +1,182 @@
+import io
+import matplotlib
+matplotlib.use('Agg') 
+import matplotlib.pyplot as plt
+import matplotlib.dates as mdates
+
+# --- CHART RENDERING (HEADLESS) ---
+# Screens pick the theme colour and turn the PNG into a texture; everything else happens here.
+
+def render_pie_chart(allocation_data, text_color="black"):
+    """PNG bytes of the allocation pie, or None if there is nothing to draw."""
+    fig = None
+    try:
+        labels = [l for l,s in allocation_data.items() if s > 0]
+        sizes = [s for s in allocation_data.values() if s > 0]
+        if not sizes: return None
+
+        plt.close('all')
+        fig = plt.figure(figsize=(6, 6), dpi=100, facecolor='none')
+        colors = ['#00897B', '#4DB6AC', '#80CBC4', '#B2DFDB', '#00695C']
+        
+        patches, texts, autotexts = plt.pie(
+            sizes, labels=labels, autopct='%1.1f%%', 
+            startangle=90, colors=colors[:len(labels)]
+        )
+        
+        for t in texts:
+            t.set_color(text_color)
+            t.set_fontsize(10)
+        
+        for t in autotexts:
+            t.set_color('white')
+            t.set_fontsize(9)
+            t.set_weight('bold')
+
+        plt.tight_layout()
+        buf = io.BytesIO()
+        plt.savefig(buf, format='png', transparent=True)
+        buf.seek(0)
+        return buf.getvalue()
+
+    except Exception as e:
+        return None
+    finally:
+        if fig: plt.close(fig)
+
+def render_equity_chart(dates, values, invested, text_color="black"):
+    """PNG bytes of portfolio value vs. net invested capital, or None."""
+    fig = None
+    try:
+        if len(dates) < 2: return None
+        plt.close('all')
+        fig, ax = plt.subplots(figsize=(5, 3), facecolor='none')
+        ax.plot(dates, values, color='#00897B', linewidth=2, label="Value")
+        ax.plot(dates, invested, color=text_color, linewidth=1, linestyle='--', alpha=0.6, label="Invested")
+        ax.fill_between(dates, values, invested, color='#00897B', alpha=0.1)
+
+        ax.grid(True, linestyle='--', alpha=0.3, color=text_color)
+        for side in ('top', 'right'): ax.spines[side].set_visible(False)
+        for side in ('bottom', 'left'): ax.spines[side].set_color(text_color)
+        ax.tick_params(axis='x', colors=text_color)
+        ax.tick_params(axis='y', colors=text_color)
+        ax.xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m'))
+        ax.legend(loc='upper left', fontsize=8, frameon=False, labelcolor=text_color)
+
+        plt.xticks(rotation=45, fontsize=8)
+        plt.yticks(fontsize=8)
+        plt.tight_layout()
+        buf = io.BytesIO()
+        plt.savefig(buf, format='png', transparent=True)
+        return buf.getvalue()
+    except Exception:
+        return None
+    finally:
+        if fig: plt.close(fig)
+
+def _plot_indicators(ax, panels, index, values, selected, text_color):
+    """Overlays on the price axis plus one lower panel per oscillator (see fincalc/indicators.py)."""
+    if "sma" in selected: ax.plot(index, values["sma"], color='#FFA000', linewidth=1, label="SMA 20")
+    if "ema" in selected: ax.plot(index, values["ema"], color='#7B1FA2', linewidth=1, label="EMA 50")
+    if "bollinger" in selected:
+        ax.plot(index, values["bb_upper"], color='#1E88E5', linewidth=0.8, label="BB 20,2")
+        ax.plot(index, values["bb_lower"], color='#1E88E5', linewidth=0.8)
+        ax.fill_between(index, values["bb_lower"], values["bb_upper"], color='#1E88E5', alpha=0.07)
+    if "vwap" in selected: ax.plot(index, values["vwap"], color=text_color, linewidth=1, linestyle='--', label="VWAP")
+    if ax.get_legend_handles_labels()[0]:
+        ax.legend(loc='upper left', fontsize=7, frameon=False, labelcolor=text_color)
+
+    for name, pax in panels:
+        if name == "rsi":
+            pax.plot(index, values["rsi"], color='#7B1FA2', linewidth=1)
+            for level in (30, 70): pax.axhline(level, color=text_color, linewidth=0.6, linestyle='--', alpha=0.5)
+            pax.set_ylim(0, 100)
+            pax.set_ylabel("RSI", color=text_color, fontsize=7)
+        else:
+            pax.plot(index, values["macd"], color='#1E88E5', linewidth=1)
+            pax.plot(index, values["macd_signal"], color='#FFA000', linewidth=1)
+            pax.fill_between(index, values["macd_hist"], 0, color=text_color, alpha=0.2)
+            pax.set_ylabel("MACD", color=text_color, fontsize=7)
+
+def render_price_chart(hist, is_green, period, text_color="black", indicators=None, selected=()):
+    """PNG buffer of the close-price line chart, or None on failure.
+
+    indicators maps fincalc.indicators.OUTPUTS names to arrays aligned with hist; only
+    the ones in selected are drawn.
+    """
+    fig = None
+    try:
+        plt.close('all')
+        panels = [name for name in ("rsi", "macd") if indicators and name in selected]
+        if panels:
+            fig, axes = plt.subplots(1 + len(panels), 1, figsize=(5, 3.5 + 1.2 * len(panels)), facecolor='none',
+                                     sharex=True, gridspec_kw={"height_ratios": [3] + [1] * len(panels)})
+            ax, panel_axes = axes[0], list(zip(panels, axes[1:]))
+        else:
+            fig, ax = plt.subplots(figsize=(5, 3.5), facecolor='none')
+            panel_axes = []
+        color = '#00C853' if is_green else '#D50000'
+        
+        ax.plot(hist.index, hist['Close'], color=color, linewidth=2)
+        ax.fill_between(hist.index, hist['Close'], hist['Close'].min(), color=color, alpha=0.1)
+        if indicators:
+            _plot_indicators(ax, panel_axes, hist.index, indicators, selected, text_color)
+        
+        for a in [ax] + [p for _, p in panel_axes]:
+            a.grid(True, linestyle='--', alpha=0.3, color=text_color)
+            a.spines['top'].set_visible(False)
+            a.spines['right'].set_visible(False)
+            a.spines['bottom'].set_color(text_color)
+            a.spines['left'].set_color(text_color)
+            a.tick_params(axis='x', colors=text_color, labelsize=8)
+            a.tick_params(axis='y', colors=text_color, labelsize=8)
+        xax = panel_axes[-1][1] if panel_axes else ax
+        
+        if period == "1d":
+            xax.xaxis.set_major_formatter(mdates.DateFormatter('%H:%M'))
+        elif period in ["1wk", "1mo", "3mo"]:
+            xax.xaxis.set_major_formatter(mdates.DateFormatter('%b %d'))
+        else:
+            xax.xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m'))
+            
+        plt.setp(xax.get_xticklabels(), rotation=45)
+        plt.tight_layout()
+        
+        buf = io.BytesIO()
+        plt.savefig(buf, format='png', transparent=True)
+        buf.seek(0)
+        return buf
+    except Exception:
+        return None
+    finally:
+        if fig:
+            plt.close(fig)
+
+def render_sensitivity_chart(x_values, values, x_label, y_values=None, y_label="", text_color="black"):
+    """PNG bytes of a sensitivity sweep: a line for one input, a heatmap for two. None on failure."""
+    fig = None
+    try:
+        plt.close('all')
+        fig, ax = plt.subplots(figsize=(5, 3.5), facecolor='none')
+        if y_values is None:
+            ax.plot(x_values, values, color='#00897B', linewidth=2)
+            ax.grid(True, linestyle='--', alpha=0.3, color=text_color)
+        else:
+            mesh = ax.pcolormesh(x_values, y_values, values, cmap='viridis', shading='auto')
+            bar = fig.colorbar(mesh, ax=ax)
+            bar.ax.tick_params(colors=text_color, labelsize=8)
+            ax.set_ylabel(y_label, color=text_color, fontsize=9)
+        ax.set_xlabel(x_label, color=text_color, fontsize=9)
+        for side in ('top', 'right'): ax.spines[side].set_visible(False)
+        for side in ('bottom', 'left'): ax.spines[side].set_color(text_color)
+        ax.tick_params(axis='x', colors=text_color, labelsize=8)
+        ax.tick_params(axis='y', colors=text_color, labelsize=8)
+
+        plt.tight_layout()
+        buf = io.BytesIO()
+        plt.savefig(buf, format='png', transparent=True)
+        return buf.getvalue()
+    except Exception:
+        return None
+    finally:
+        if fig: plt.close(fig)
@@ -0,0 +1,93 @@
+import argparse
+import csv
+import inspect
+import json
+import numbers
+import sys
+
+from fincalc import formulas
+
+# --- FORMULA REGISTRY ---
+# name -> (function, output columns). Input columns are the function's argument names.
+FORMULAS = {
+    "bs": (formulas.black_scholes, ["result"]),
+    "npv": (formulas.present_value, ["result"]),
+    "compound": (formulas.compound_interest, ["result"]),
+    "capm": (formulas.capm, ["result"]),
+    "pmt": (formulas.loan_payment, ["result"]),
+    "cagr": (formulas.cagr, ["result"]),
+    "roi": (formulas.roi, ["result"]),
+    "breakeven": (formulas.break_even, ["result"]),
+    "quad": (formulas.quadratic_roots, ["x1", "x2"]),
+}
+
+# Arguments passed through as text instead of being parsed as floats
+TEXT_ARGS = {"opt_type"}
+
+def build_runner(name):
+    """Returns a row -> tuple function with the argument spec resolved once up front."""
+    func, outputs = FORMULAS[name]
+    spec = [(p.name, p.default) for p in inspect.signature(func).parameters.values()]
+
+    def run(row):
+        args = []
+        for arg, default in spec:
+            value = row.get(arg)
+            if value is None or value == "":
+                if default is inspect.Parameter.empty:
+                    raise ValueError(f"Missing column: {arg}")
+                value = default
+            args.append(value if arg in TEXT_ARGS else float(value))
+        result = func(*args)
+        values = result if len(outputs) > 1 else (result,)
+        for value in values:
+            # e.g. cagr with a negative start value comes back complex
+            if not isinstance(value, numbers.Real): raise ValueError(f"Non-real result: {value}")
+        return values
+
+    return run, outputs
+
+def _evaluate(run, outputs, row):
+    try:
+        row.update(zip(outputs, run(row)))
+    except (ValueError, TypeError, ArithmeticError) as e:
+        row["error"] = str(e) or type(e).__name__
+    return row
+
+def stream_csv(name, src, dst):
+    run, outputs = build_runner(name)
+    reader = csv.DictReader(src)
+    fields = list(reader.fieldnames or []) + outputs + ["error"]
+    writer = csv.DictWriter(dst, fieldnames=fields, extrasaction="ignore")
+    writer.writeheader()
+    for row in reader:
+        writer.writerow(_evaluate(run, outputs, row))
+
+def stream_jsonl(name, src, dst):
+    run, outputs = build_runner(name)
+    for line in src:
+        if not line.strip(): continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        row = _evaluate(run, outputs, row) if isinstance(row, dict) else {"error": "Invalid JSON"}
+        dst.write(json.dumps(row) + "\n")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="fincalc",
+        description="Batch-evaluate a FinCalc formula over CSV/JSONL rows read from stdin.",
+    )
+    parser.add_argument("formula", choices=sorted(FORMULAS))
+    parser.add_argument("-f", "--format", choices=["csv", "jsonl"], default="csv")
+    args = parser.parse_args(argv)
+
+    if args.format == "csv":
+        stream_csv(args.formula, sys.stdin, sys.stdout)
+    else:
+        stream_jsonl(args.formula, sys.stdin, sys.stdout)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,197 @@
+import multiprocessing as mp
+import os
+import sys
+import threading
+import types
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from fincalc import montecarlo, sensitivity
+
+# --- BATCH COMPUTE SERVICE ---
+# CPU-bound batches (option chains, sensitivity grids, Monte Carlo) are sharded over
+# a process pool so they are not serialised by the GIL. Large inputs and outputs
+# sit in shared-memory NumPy buffers: a shard task pickles only the buffer names and
+# its [start, stop) range, and each worker writes its slice of the result in place.
+# Small batches run in-process, where a pool round-trip would cost more than it saves.
+
+MIN_PARALLEL = 20000   # Elements below which a batch runs in the calling process
+SHARDS_PER_WORKER = 4  # More shards than workers keeps progress smooth and balances load
+
+class _Shared:
+    """A NumPy array in a SharedMemory block; created by the parent, attached by workers."""
+
+    def __init__(self, shape, dtype=np.float64, name=None):
+        self.shape, self.dtype = tuple(shape), np.dtype(dtype)
+        size = max(1, int(np.prod(self.shape)) * self.dtype.itemsize)
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=size)
+        else:
+            # Workers share the parent's resource tracker, so attaching does not add a second owner
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.array = np.ndarray(self.shape, dtype=self.dtype, buffer=self.shm.buf)
+
+    @property
+    def spec(self):
+        return (self.shm.name, self.shape, self.dtype.str)
+
+    @classmethod
+    def attach(cls, spec):
+        name, shape, dtype = spec
+        return cls(shape, dtype, name)
+
+    def close(self, unlink=False):
+        self.array = None
+        self.shm.close()
+        if unlink: self.shm.unlink()
+
+# --- SHARD WORKERS (top level so the pool can pickle them) ---
+def _bs_shard(inputs, out, start, stop, opt_type):
+    src, dst = _Shared.attach(inputs), _Shared.attach(out)
+    try:
+        S, K, T, r, sigma = src.array[:, start:stop]
+        dst.array[start:stop] = sensitivity.black_scholes(S, K, T, r, sigma, opt_type)
+    finally:
+        src.close()
+        dst.close()
+    return stop - start
+
+def _grid_shard(out, start, stop, name, base, x_param, xs, y_param, ys):
+    dst = _Shared.attach(out)
+    try:
+        if y_param:
+            dst.array[start:stop] = sensitivity.grid(name, base, x_param, xs, y_param, ys[start:stop])
+        else:
+            dst.array[start:stop] = sensitivity.grid(name, base, x_param, xs[start:stop])
+    finally:
+        dst.close()
+    return (stop - start) * (len(xs) if y_param else 1)
+
+# --- WORKER PROCESSES ---
+# Spawned workers normally re-run the parent's __main__ script first. For the app that
+# is main.py, which loads Kivy and would open a window per worker, so the pool's
+# processes are started with a bare __main__; everything they run lives in fincalc.
+_BARE_MAIN = types.ModuleType("__main__")
+_start_lock = threading.Lock()
+
+class _WorkerProcess(mp.context.SpawnProcess):
+    def start(self):
+        with _start_lock:
+            main = sys.modules["__main__"]
+            sys.modules["__main__"] = _BARE_MAIN
+            try:
+                super().start()
+            finally:
+                sys.modules["__main__"] = main
+
+class _WorkerContext(mp.context.SpawnContext):
+    Process = _WorkerProcess
+
+def _ranges(n, parts):
+    bounds = np.linspace(0, n, max(1, min(parts, n)) + 1).astype(int)
+    return [(a, b) for a, b in zip(bounds[:-1], bounds[1:]) if b > a]
+
+class ComputeService:
+    """Process-pool front end for the batch pricing APIs.
+
+    Methods block the calling thread (call them from a run_bg worker); progress, when
+    given, is called as progress(done, total) from that thread after each shard.
+    """
+
+    def __init__(self, processes=None):
+        self.processes = processes or os.cpu_count() or 1
+        self._pool = None
+        self._lock = threading.Lock()
+
+    @property
+    def pool(self):
+        with self._lock:
+            if self._pool is None:
+                # spawn: forking a process that runs Kivy/network threads is not safe
+                self._pool = ProcessPoolExecutor(max_workers=self.processes, mp_context=_WorkerContext())
+            return self._pool
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None: self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def _parallel(self, n):
+        return self.processes > 1 and n >= MIN_PARALLEL
+
+    def _run(self, submit, ranges, total, progress):
+        futures = [submit(a, b) for a, b in ranges]
+        done = 0
+        try:
+            for future in as_completed(futures):
+                done += future.result()
+                if progress: progress(done, total)
+        except BaseException:
+            for future in futures: future.cancel()
+            raise
+
+    def price_chain(self, S, K, T, r, sigma, opt_type="call", progress=None):
+        """Black-Scholes over broadcast inputs (a whole chain, or strikes x expiries x vols)."""
+        arrays = np.broadcast_arrays(*(np.asarray(a, float) for a in (S, K, T, r, sigma)))
+        shape, n = arrays[0].shape, arrays[0].size
+        if not self._parallel(n):
+            out = sensitivity.black_scholes(*arrays, opt_type)
+            if progress: progress(n, n)
+            return out
+
+        inputs, out = _Shared((5, n)), _Shared((n,))
+        try:
+            for row, a in zip(inputs.array, arrays): row[:] = a.ravel()
+            self._run(lambda a, b: self.pool.submit(_bs_shard, inputs.spec, out.spec, a, b, opt_type),
+                      _ranges(n, self.processes * SHARDS_PER_WORKER), n, progress)
+            return out.array.reshape(shape).copy()
+        finally:
+            inputs.close(unlink=True)
+            out.close(unlink=True)
+
+    def grid(self, name, base, x_param, x_values, y_param=None, y_values=None, progress=None):
+        """sensitivity.grid, sharded by rows (by x for a one-input sweep)."""
+        xs = np.asarray(x_values, float)
+        ys = None if y_values is None else np.asarray(y_values, float)
+        shape = (len(ys), len(xs)) if y_param else (len(xs),)
+        n = int(np.prod(shape))
+        if not self._parallel(n):
+            out = sensitivity.grid(name, base, x_param, xs, y_param, ys)
+            if progress: progress(n, n)
+            return out
+
+        out = _Shared(shape)
+        try:
+            self._run(lambda a, b: self.pool.submit(_grid_shard, out.spec, a, b, name, dict(base), x_param, xs, y_param, ys),
+                      _ranges(shape[0], self.processes * SHARDS_PER_WORKER), n, progress)
+            return out.array.copy()
+        finally:
+            out.close(unlink=True)
+
+    def price_option(self, *args, progress=None, **kwargs):
+        """montecarlo.price_option with its path chunks spread over the pool."""
+        return montecarlo.price_option(*args, executor=self.pool if self.processes > 1 else None, progress=progress, **kwargs)
+
+    def portfolio_var(self, *args, progress=None, **kwargs):
+        """montecarlo.portfolio_var with its path chunks spread over the pool."""
+        return montecarlo.portfolio_var(*args, executor=self.pool if self.processes > 1 else None, progress=progress, **kwargs)
+
+_service = None
+_service_lock = threading.Lock()
+
+def _can_spawn():
+    # python-for-android and kivy-ios builds have no working multiprocessing
+    return "ANDROID_ARGUMENT" not in os.environ and os.environ.get("KIVY_BUILD") != "ios"
+
+def get_service():
+    """The app-wide service (one pool, started on first parallel use)."""
+    global _service
+    with _service_lock:
+        if _service is None: _service = ComputeService(None if _can_spawn() else 1)
+        return _service
+
+def shutdown():
+    with _service_lock:
+        if _service is not None: _service.shutdown()
@@ -0,0 +1,102 @@
+import os
+import hashlib
+
+import numpy as np
+
+from fincalc.lots import parse_date, trade_key
+
+# --- PORTFOLIO EQUITY CURVE ---
+# Daily (day ordinal, value, invested) triples kept as typed arrays and saved as
+# .npz: about 20 bytes per day, so decades of history load instantly.
+
+def trade_fingerprints(trades):
+    """{hash: day ordinal} per trade; a trade's hash changes whenever it is edited."""
+    return {
+        hashlib.sha1(repr(sorted(t.items())).encode()).hexdigest()[:16]: parse_date(t.get('date')).toordinal()
+        for t in trades
+    }
+
+def first_changed_day(old, new):
+    """Earliest day of a trade added, removed or edited between two fingerprint maps, or None."""
+    days = [new[h] if h in new else old[h] for h in old.keys() ^ new.keys()]
+    return min(days) if days else None
+
+def holdings_over_time(trades, dates, tickers):
+    """Shares held per (date, ticker), in post-split units to match split-adjusted closes.
+
+    Built in one pass: trade deltas are scattered into a (dates x tickers) grid and
+    cumulatively summed down the date axis.
+    """
+    ordinals = np.array([d.toordinal() for d in dates])
+    col = {t: i for i, t in enumerate(tickers)}
+    deltas = np.zeros((len(dates), len(tickers)))
+    flows = np.zeros(len(dates))
+
+    ordered = sorted(trades, key=trade_key)
+    # Later splits restate earlier share counts in today's units
+    splits = [(parse_date(t.get('date')).toordinal(), t['ticker'], float(t['ratio'])) for t in ordered if t.get('type') == 'split']
+
+    rows, cols, amounts = [], [], []
+    for t in ordered:
+        kind = t.get('type', 'buy')
+        if kind not in ('buy', 'sell') or t['ticker'] not in col: continue
+        day = parse_date(t.get('date')).toordinal()
+        if not len(dates) or day > ordinals[-1]: continue
+        factor = 1.0
+        for s_day, s_ticker, ratio in splits:
+            if s_ticker == t['ticker'] and s_day > day: factor *= ratio
+        shares = float(t['shares']) * factor
+        price = float(t.get('cost_basis', t.get('price', 0)) if kind == 'buy' else t['price'])
+        sign = 1 if kind == 'buy' else -1
+        idx = int(np.searchsorted(ordinals, day))
+        rows.append(idx); cols.append(col[t['ticker']]); amounts.append(sign * shares)
+        flows[idx] += sign * float(t['shares']) * price
+
+    if rows:
+        np.add.at(deltas, (np.array(rows), np.array(cols)), np.array(amounts))
+    return np.cumsum(deltas, axis=0), np.cumsum(flows)
+
+class EquityCurve:
+    def __init__(self, days=None, values=None, invested=None, trades=None):
+        self.days = np.asarray(days if days is not None else [], np.int32)
+        self.values = np.asarray(values if values is not None else [], np.float64)
+        self.invested = np.asarray(invested if invested is not None else [], np.float64)
+        self.trades = trades or {}  # trade_fingerprints() of the trades the rows were built from
+
+    def __len__(self):
+        return len(self.days)
+
+    @property
+    def last_day(self):
+        return int(self.days[-1]) if len(self.days) else None
+
+    def truncate(self, day):
+        """Drops the rows from day on (they depend on a trade that changed)."""
+        keep = self.days < day
+        self.days, self.values, self.invested = self.days[keep], self.values[keep], self.invested[keep]
+
+    def merge(self, days, values, invested):
+        """Adds rows, replacing any existing rows for the same day."""
+        days = np.asarray(days, np.int32)
+        keep = ~np.isin(self.days, days)
+        all_days = np.concatenate((self.days[keep], days))
+        order = np.argsort(all_days, kind="stable")
+        self.days = all_days[order]
+        self.values = np.concatenate((self.values[keep], np.asarray(values, np.float64)))[order]
+        self.invested = np.concatenate((self.invested[keep], np.asarray(invested, np.float64)))[order]
+
+    @classmethod
+    def load(cls, path):
+        try:
+            with np.load(path) as data:
+                trades = dict(zip(data['trade_hashes'].tolist(), data['trade_days'].tolist())) if 'trade_hashes' in data else {}
+                return cls(data['days'], data['values'], data['invested'], trades)
+        except (OSError, KeyError, ValueError):
+            return cls()
+
+    def save(self, path):
+        tmp = path + ".tmp.npz"
+        np.savez_compressed(tmp, days=self.days, values=self.values, invested=self.invested,
+                            trade_hashes=np.array(list(self.trades), dtype=str),
+                            trade_days=np.array(list(self.trades.values()), dtype=np.int32))
+        os.replace(tmp, path)
@@ -0,0 +1,118 @@
+import math
+import re
+import ast
+import operator
+
+# --- LIMITS TO PREVENT HANGS ---
+MAX_POWER = 10000  # Prevents 9^9^9^9
+MAX_NODES = 500    # Prevents deeply nested equations
+MAX_RESULT = 1e100 # Prevents memory overflow
+
+# --- Safe Math Operators (HARDENED) ---
+SAFE_OPERATORS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.Pow: operator.pow,
+    ast.USub: operator.neg,
+    ast.UAdd: operator.pos,
+}
+
+SAFE_FUNCTIONS = {
+    'sqrt': math.sqrt,
+    'log': math.log,
+    'ln': math.log,
+    'exp': math.exp,
+    'abs': abs,
+    'sin': math.sin,
+    'cos': math.cos,
+    'tan': math.tan,
+}
+
+class TooComplexError(ValueError):
+    pass
+
+def normalize(raw):
+    """Turns calculator keypad text into a Python expression."""
+    # Handles (9)(9), 9π, 9√, 9(5)
+    clean = re.sub(r'(\d)([√π\(])', r'\1*\2', raw)
+    clean = re.sub(r'(\))(\d)', r'\1*\2', clean)
+    clean = re.sub(r'(\))(\()', r'\1*\2', clean)
+
+    clean = clean.replace("×", "*").replace("÷", "/")
+    clean = clean.replace("^", "**")
+    clean = clean.replace("√", "sqrt(")
+    clean = clean.replace("π", str(math.pi))
+    clean = clean.replace("e", str(math.e))
+
+    # Auto-balance parentheses
+    open_c, close_c = clean.count("("), clean.count(")")
+    if open_c > close_c: clean += ")" * (open_c - close_c)
+    return clean
+
+def parse(raw):
+    tree = ast.parse(normalize(raw), mode='eval')
+    # Check node complexity
+    if sum(1 for _ in ast.walk(tree)) > MAX_NODES:
+        raise TooComplexError("Too Complex")
+    return tree
+
+def safe_eval_node(node, depth=0):
+    """Recursive evaluator with safety guards and complexity limits."""
+    if depth > 100: 
+        raise ValueError("Expression too complex")
+    
+    # Numbers / Constants
+    if isinstance(node, (ast.Constant, ast.Num)):
+        val = node.value if isinstance(node, ast.Constant) else node.n
+        if isinstance(val, (int, float)): return val
+        raise ValueError("Unsupported constant type")
+        
+    # Binary Operations (1 + 1, 9 ^ 9)
+    elif isinstance(node, ast.BinOp):
+        op_type = type(node.op)
+        if op_type not in SAFE_OPERATORS:
+            raise ValueError("Unsupported operator")
+        
+        left = safe_eval_node(node.left, depth + 1)
+        right = safe_eval_node(node.right, depth + 1)
+        
+        # --- CRITICAL HANG PREVENTER: Power Guard ---
+        if op_type == ast.Pow:
+            if right > MAX_POWER or (abs(left) > 1 and right > 500):
+                raise OverflowError("Power too large")
+        
+        result = SAFE_OPERATORS[op_type](left, right)
+        
+        # Prevent memory overflow from massive results
+        if isinstance(result, (int, float)) and abs(result) > MAX_RESULT:
+            raise OverflowError("Result too large")
+        return result
+
+    # Unary Operations (-5, +5)
+    elif isinstance(node, ast.UnaryOp):
+        op_type = type(node.op)
+        if op_type not in SAFE_OPERATORS:
+            raise ValueError("Unsupported unary operator")
+        return SAFE_OPERATORS[op_type](safe_eval_node(node.operand, depth + 1))
+
+    # Functions (sqrt, sin, etc)
+    elif isinstance(node, ast.Call):
+        if not isinstance(node.func, ast.Name): 
+            raise ValueError("Simple functions only")
+        
+        func_name = node.func.id
+        if func_name not in SAFE_FUNCTIONS: 
+            raise ValueError(f"Unknown function: {func_name}")
+        
+        if len(node.args) != 1: 
+            raise ValueError("One argument required")
+            
+        arg = safe_eval_node(node.args[0], depth + 1)
+        return SAFE_FUNCTIONS[func_name](arg)
+
+    raise ValueError("Unsafe syntax detected")
+
+def evaluate(raw):
+    return safe_eval_node(parse(raw).body)
@@ -0,0 +1,51 @@
+import math
+
+# --- PURE MATH CORE ---
+# No Kivy imports here: these are shared by CalculatorScreen and the CLI.
+# Rates and volatilities are decimals (0.05 == 5%) unless stated otherwise.
+
+def norm_cdf(x):
+    return (1.0 + math.erf(x / math.sqrt(2.0))) / 2.0
+
+def black_scholes(S, K, T, r, sigma, opt_type="call"):
+    """European option price. T in years."""
+    if T <= 0 or sigma <= 0: return 0.0
+    d1 = (math.log(S / K) + (r + 0.5 * sigma ** 2) * T) / (sigma * math.sqrt(T))
+    d2 = d1 - sigma * math.sqrt(T)
+    if opt_type == "call":
+        return S * norm_cdf(d1) - K * math.exp(-r * T) * norm_cdf(d2)
+    return K * math.exp(-r * T) * norm_cdf(-d2) - S * norm_cdf(-d1)
+
+def compound_interest(principal, rate, years):
+    return principal * (1 + rate) ** years
+
+def present_value(future_value, rate, years):
+    """Discounts a single future cash flow (the NPV popup)."""
+    return future_value / (1 + rate) ** years
+
+def loan_payment(principal, annual_rate, months):
+    """Monthly payment (PMT) for a fully amortizing loan."""
+    r = annual_rate / 12
+    if r > 0:
+        return principal * (r * (1 + r) ** months) / ((1 + r) ** months - 1)
+    return principal / months
+
+def cagr(start_value, end_value, years):
+    return (end_value / start_value) ** (1 / years) - 1
+
+def capm(rf, beta, market_return):
+    """Expected return. Unit agnostic: pass all rates as % or all as decimals."""
+    return rf + beta * (market_return - rf)
+
+def break_even(fixed_costs, price, variable_cost):
+    """Units needed to cover fixed costs."""
+    return fixed_costs / (price - variable_cost)
+
+def roi(cost, gain):
+    return (gain - cost) / cost
+
+def quadratic_roots(a, b, c):
+    d = b ** 2 - 4 * a * c
+    if d < 0:
+        raise ValueError("Complex roots")
+    return (-b + math.sqrt(d)) / (2 * a), (-b - math.sqrt(d)) / (2 * a)
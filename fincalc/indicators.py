@@ -0,0 +1,247 @@
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+# --- TECHNICAL INDICATORS ---
+# A full history is computed once with vectorised NumPy/pandas; after that every new
+# bar goes through small streaming states (running sums, last EMA values), so keeping
+# indicators current on a minute-refreshed intraday chart costs O(1) per bar.
+
+SMA_N, EMA_N, BB_N, BB_K, RSI_N = 20, 50, 20, 2.0, 14
+MACD_FAST, MACD_SLOW, MACD_SIGNAL = 12, 26, 9
+PRICE_OVERLAYS = ("sma", "ema", "bollinger", "vwap")
+PANELS = ("rsi", "macd")
+OUTPUTS = ("sma", "ema", "bb_mid", "bb_upper", "bb_lower", "rsi", "macd", "macd_signal", "macd_hist", "vwap")
+
+# --- BATCH (whole arrays) ---
+def sma(x, n=SMA_N):
+    out = np.full(len(x), np.nan)
+    if len(x) >= n: out[n - 1:] = np.lib.stride_tricks.sliding_window_view(x, n).mean(axis=1)
+    return out
+
+def ema(x, n=EMA_N, alpha=None):
+    """Recursive EMA seeded with the first value (pandas ewm, adjust=False)."""
+    return pd.Series(x, dtype=float).ewm(alpha=alpha or 2 / (n + 1), adjust=False).mean().to_numpy()
+
+def bollinger(x, n=BB_N, k=BB_K):
+    mid, width = sma(x, n), np.full(len(x), np.nan)
+    if len(x) >= n: width[n - 1:] = k * np.lib.stride_tricks.sliding_window_view(x, n).std(axis=1)
+    return mid, mid + width, mid - width
+
+def _rsi_averages(x, n):
+    d = np.diff(x)
+    gain = ema(np.maximum(d, 0), alpha=1 / n)
+    loss = ema(np.maximum(-d, 0), alpha=1 / n)
+    return gain, loss
+
+def _rsi_value(gain, loss):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(loss > 0, 100 - 100 / (1 + gain / loss), 100.0)
+
+def rsi(x, n=RSI_N):
+    """Wilder RSI; nan for the first n bars."""
+    out = np.full(len(x), np.nan)
+    if len(x) > n:
+        gain, loss = _rsi_averages(x, n)
+        out[n:] = _rsi_value(gain, loss)[n - 1:]
+    return out
+
+def macd(x, fast=MACD_FAST, slow=MACD_SLOW, signal=MACD_SIGNAL):
+    line = ema(x, fast) - ema(x, slow)
+    sig = ema(line, signal)
+    return line, sig, line - sig
+
+def vwap(high, low, close, volume, sessions=None):
+    """Volume-weighted typical price, restarting whenever the session id changes."""
+    typical = (high + low + close) / 3
+    cpv, cv = np.cumsum(typical * volume), np.cumsum(volume)
+    if sessions is not None and len(sessions):
+        index = np.arange(len(sessions))
+        first = np.maximum.accumulate(np.where(np.r_[True, sessions[1:] != sessions[:-1]], index, 0))
+        base_pv = np.where(first > 0, cpv[first - 1], 0.0)
+        base_v = np.where(first > 0, cv[first - 1], 0.0)
+        cpv, cv = cpv - base_pv, cv - base_v
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(cv > 0, cpv / cv, typical)
+
+# --- STREAMING (one bar at a time) ---
+class _Window:
+    """Last n values with running sum and sum of squares."""
+    def __init__(self, n, values=()):
+        self.n = n
+        self.values = deque(values[-n:] if len(values) else (), maxlen=n)
+        self.total = float(np.sum(self.values)) if self.values else 0.0
+        self.squares = float(np.sum(np.square(self.values))) if self.values else 0.0
+
+    def push(self, x):
+        if len(self.values) == self.n:
+            old = self.values[0]
+            self.total -= old
+            self.squares -= old * old
+        self.values.append(x)
+        self.total += x
+        self.squares += x * x
+
+    def full(self):
+        return len(self.values) == self.n
+
+    def copy(self):
+        clone = _Window.__new__(_Window)
+        clone.n, clone.values = self.n, deque(self.values, maxlen=self.n)
+        clone.total, clone.squares = self.total, self.squares
+        return clone
+
+    def mean(self):
+        return self.total / self.n
+
+    def std(self):
+        m = self.mean()
+        return max(self.squares / self.n - m * m, 0.0) ** 0.5
+
+class _Buffer:
+    """Growable float array with amortised O(1) append."""
+    def __init__(self, values, dtype=float):
+        self.data = np.array(values, dtype=dtype)
+        self.size = len(self.data)
+
+    def append(self, x):
+        if self.size == len(self.data):
+            self.data = np.resize(self.data, max(16, 2 * self.size))
+        self.data[self.size] = x
+        self.size += 1
+
+    def pop(self):
+        self.size -= 1
+
+    def view(self):
+        return self.data[:self.size]
+
+class IndicatorEngine:
+    """All OUTPUTS for one bar series: load() a history once, then update() per new bar.
+
+    update() with the timestamp of the last bar revises it (a partial bar that has
+    since moved) by rolling back to the state saved before that bar.
+    """
+
+    def __init__(self):
+        self.out = {}
+        self.times = None
+        self.state = None
+        self.checkpoint = None
+
+    def load(self, times, high, low, close, volume, sessions=None):
+        times, close = np.asarray(times), np.asarray(close, float)
+        high, low, volume = (np.asarray(a, float) for a in (high, low, volume))
+        sessions = None if sessions is None else np.asarray(sessions)
+        n = len(close)
+        if n == 0: raise ValueError("Empty history")
+        # Vectorised pass over everything but the last bar; that one is applied through
+        # update() so it can be revised later
+        k = n - 1
+        c = close[:k]
+        mid, upper, lower = bollinger(c)
+        line, sig, hist = macd(c)
+        self.out = {
+            "sma": sma(c), "ema": ema(c), "bb_mid": mid, "bb_upper": upper, "bb_lower": lower,
+            "rsi": rsi(c), "macd": line, "macd_signal": sig, "macd_hist": hist,
+            "vwap": vwap(high[:k], low[:k], c, volume[:k], None if sessions is None else sessions[:k])
+        }
+        self.out = {name: _Buffer(values) for name, values in self.out.items()}
+        self.times = _Buffer(times[:k], "int64")
+        self.state = self._prime(high[:k], low[:k], c, volume[:k], None if sessions is None else sessions[:k])
+        self.update(times[-1], high[-1], low[-1], close[-1], volume[-1], None if sessions is None else sessions[-1])
+        return self
+
+    def _prime(self, high, low, close, volume, sessions):
+        s = {"count": len(close), "sma": _Window(SMA_N, close), "bb": _Window(BB_N, close)}
+        if not len(close):
+            s.update(ema=None, fast=None, slow=None, signal=None, prev=None, gain=None, loss=None,
+                     session=None, pv=0.0, v=0.0)
+            return s
+        s["ema"] = self.out["ema"].view()[-1]
+        s["fast"], s["slow"] = ema(close, MACD_FAST)[-1], ema(close, MACD_SLOW)[-1]
+        s["signal"] = self.out["macd_signal"].view()[-1]
+        s["prev"] = close[-1]
+        if len(close) > 1:
+            gain, loss = _rsi_averages(close, RSI_N)
+            s["gain"], s["loss"] = gain[-1], loss[-1]
+        else:
+            s["gain"] = s["loss"] = None
+        # VWAP accumulators for the session in progress
+        start = 0
+        if sessions is not None:
+            other = np.flatnonzero(sessions != sessions[-1])
+            start = other[-1] + 1 if len(other) else 0
+        typical = (high[start:] + low[start:] + close[start:]) / 3
+        s["session"] = None if sessions is None else sessions[-1]
+        s["pv"], s["v"] = float(np.sum(typical * volume[start:])), float(np.sum(volume[start:]))
+        return s
+
+    def update(self, time, high, low, close, volume, session=None):
+        """Folds in one bar; O(1) apart from the small checkpoint copy."""
+        time = np.int64(time)
+        if self.times.size and time == self.times.view()[-1]:
+            self.state = self.checkpoint
+            self.times.pop()
+            for buf in self.out.values(): buf.pop()
+        elif self.times.size and time < self.times.view()[-1]:
+            raise ValueError("Bars must arrive in time order")
+        self.checkpoint = dict(self.state, sma=self.state["sma"].copy(), bb=self.state["bb"].copy())
+
+        s = self.state
+        s["sma"].push(close)
+        s["bb"].push(close)
+        alpha = 2 / (EMA_N + 1)
+        s["ema"] = close if s["ema"] is None else s["ema"] + alpha * (close - s["ema"])
+        s["fast"] = close if s["fast"] is None else s["fast"] + 2 / (MACD_FAST + 1) * (close - s["fast"])
+        s["slow"] = close if s["slow"] is None else s["slow"] + 2 / (MACD_SLOW + 1) * (close - s["slow"])
+        line = s["fast"] - s["slow"]
+        s["signal"] = line if s["signal"] is None else s["signal"] + 2 / (MACD_SIGNAL + 1) * (line - s["signal"])
+
+        rsi_value = np.nan
+        if s["prev"] is not None:
+            d = close - s["prev"]
+            g, l = max(d, 0.0), max(-d, 0.0)
+            if s["gain"] is None: s["gain"], s["loss"] = g, l
+            else:
+                s["gain"] += (g - s["gain"]) / RSI_N
+                s["loss"] += (l - s["loss"]) / RSI_N
+            if s["count"] >= RSI_N:
+                rsi_value = float(_rsi_value(s["gain"], s["loss"]))
+        s["prev"] = close
+
+        if session is not None and session != s["session"]:
+            s["session"], s["pv"], s["v"] = session, 0.0, 0.0
+        typical = (high + low + close) / 3
+        s["pv"] += typical * volume
+        s["v"] += volume
+        s["count"] += 1
+
+        sma_value = s["sma"].mean() if s["sma"].full() else np.nan
+        mid = s["bb"].mean() if s["bb"].full() else np.nan
+        width = BB_K * s["bb"].std() if s["bb"].full() else np.nan
+        values = {
+            "sma": sma_value, "ema": s["ema"], "bb_mid": mid, "bb_upper": mid + width, "bb_lower": mid - width,
+            "rsi": rsi_value, "macd": line, "macd_signal": s["signal"], "macd_hist": line - s["signal"],
+            "vwap": s["pv"] / s["v"] if s["v"] > 0 else typical
+        }
+        for name, value in values.items(): self.out[name].append(value)
+        self.times.append(time)
+
+    def sync(self, times, high, low, close, volume, sessions=None):
+        """Applies the bars of a (re-downloaded) history from the engine's last bar onward.
+
+        Returns False when the history no longer contains that bar; the caller should load() instead.
+        """
+        times = np.asarray(times, dtype="int64")
+        last = self.times.view()[-1]
+        i = int(np.searchsorted(times, last))
+        if i >= len(times) or times[i] != last: return False
+        for j in range(i, len(times)):
+            self.update(times[j], high[j], low[j], close[j], volume[j], None if sessions is None else sessions[j])
+        return True
+
+    def tail(self, count):
+        """The last count values of every output, aligned with the last count bars."""
+        return {name: buf.view()[-count:] for name, buf in self.out.items()}
@@ -0,0 +1,198 @@
+import heapq
+import itertools
+import sys
+
+from fincalc.trades import TradeColumns, parse_date
+
+# --- TAX-LOT ACCOUNTING ---
+# Each ticker has a LotBook whose open lots sit in two heaps (oldest-first and
+# newest-first), so FIFO/LIFO matching is O(log n). Consumed lots are skipped
+# lazily when they reach the top. Splits only touch one cumulative factor: lot
+# sizes are stored in pre-split "base" units.
+
+FIFO, LIFO, AVERAGE, SPECIFIC = "FIFO", "LIFO", "AVERAGE", "SPECIFIC"
+METHODS = (FIFO, LIFO, AVERAGE, SPECIFIC)
+EPS = 1e-9
+LONG_TERM_DAYS = 365
+
+def trade_key(trade):
+    """Chronological sort key for a stored trade record."""
+    return (parse_date(trade.get('date')), str(trade.get('time', '')))
+
+class Lot:
+    __slots__ = ("id", "ticker", "date", "time", "seq", "base", "cost")
+
+    def __init__(self, id, ticker, date, time, seq, base, cost):
+        self.id, self.ticker, self.date, self.time, self.seq = id, ticker, date, time, seq
+        self.base = base  # remaining shares in pre-split units
+        self.cost = cost  # remaining cost in dollars
+
+class LotBook:
+    def __init__(self, ticker):
+        self.ticker = ticker
+        self.factor = 1.0
+        self.oldest, self.newest = [], []
+        self.by_id = {}
+        self.base = 0.0
+        self.cost = 0.0
+        self.realized = 0.0
+        self.dividends = 0.0
+
+    @property
+    def shares(self):
+        return self.base * self.factor
+
+    def buy(self, lot):
+        heapq.heappush(self.oldest, (lot.date, lot.seq, lot))
+        heapq.heappush(self.newest, (-lot.date.toordinal(), -lot.seq, lot))
+        self.by_id[lot.id] = lot
+        self.base += lot.base
+        self.cost += lot.cost
+
+    def _top(self, heap):
+        while heap and heap[0][2].base <= EPS:
+            heapq.heappop(heap)
+        return heap[0][2] if heap else None
+
+    def _take(self, lot, base_wanted, matched):
+        q = min(base_wanted, lot.base)
+        cost = lot.cost * q / lot.base
+        lot.base -= q
+        lot.cost -= cost
+        if lot.base <= EPS: self.by_id.pop(lot.id, None)
+        matched.append((lot, q, cost))
+        return q
+
+    def sell(self, shares, price, method, when, lot_ids=None):
+        if shares > self.shares + EPS:
+            raise ValueError(f"Only {self.shares:g} {self.ticker} shares open")
+        wanted = shares / self.factor
+        matched = []
+        if method == SPECIFIC:
+            for lot_id in lot_ids or []:
+                lot = self.by_id.get(lot_id)
+                if lot and wanted > EPS: wanted -= self._take(lot, wanted, matched)
+        heap = self.newest if method == LIFO else self.oldest
+        while wanted > EPS:
+            wanted -= self._take(self._top(heap), wanted, matched)
+
+        sold_base = sum(q for _, q, _ in matched)
+        if method == AVERAGE:
+            cost = self.cost * sold_base / self.base
+        else:
+            cost = sum(c for _, _, c in matched)
+        self.base -= sold_base
+        self.cost -= cost
+        if self.base <= EPS: self.base, self.cost = 0.0, 0.0
+
+        proceeds = shares * price
+        self.realized += proceeds - cost
+        long_base = sum(q for lot, q, _ in matched if (when - lot.date).days > LONG_TERM_DAYS)
+        return {
+            "ticker": self.ticker, "date": when.isoformat(), "shares": shares,
+            "proceeds": proceeds, "cost": cost, "gain": proceeds - cost,
+            "long_term_shares": long_base * self.factor,
+            "lots": [(lot.id, q * self.factor) for lot, q, _ in matched],
+        }
+
+    def split(self, ratio):
+        self.factor *= ratio
+
+    def dividend(self, per_share):
+        amount = per_share * self.shares
+        self.dividends += amount
+        return amount
+
+    def open_lots(self):
+        for _, _, lot in self.oldest:
+            if lot.base > EPS: yield lot
+
+class Ledger:
+    """Applies buy/sell/split/dividend records in date order and tracks P&L per ticker."""
+
+    def __init__(self, method=FIFO):
+        if method not in METHODS: raise ValueError(f"Unknown lot method: {method}")
+        self.method = method
+        self.books = {}
+        self.sales = []
+        self.rejected = []  # (trade, reason) skipped by from_trades
+        self.last_key = None
+        self._seq = itertools.count()
+
+    @classmethod
+    def from_trades(cls, trades, method=FIFO):
+        """Replays trades in date order. A trade that cannot apply (e.g. a sell whose lots
+        were deleted) is skipped and listed in rejected."""
+        ledger = cls(method)
+        keyed = sorted(((trade_key(t), i, t) for i, t in enumerate(trades)), key=lambda k: k[:2])
+        for key, _, trade in keyed:
+            try:
+                ledger.apply(trade, key)
+            except (ValueError, KeyError) as e:
+                ledger.rejected.append((trade, str(e)))
+        return ledger
+
+    def can_append(self, trade):
+        return self.last_key is None or trade_key(trade) >= self.last_key
+
+    def book(self, ticker):
+        book = self.books.get(ticker)
+        if book is None: book = self.books[ticker] = LotBook(sys.intern(ticker))
+        return book
+
+    def apply(self, trade, key=None):
+        key = key or trade_key(trade)
+        kind = trade.get('type', 'buy')
+        when = key[0]
+        book = self.book(trade['ticker'])
+        if kind == 'buy':
+            shares, price = float(trade['shares']), float(trade.get('cost_basis', trade.get('price', 0)))
+            book.buy(Lot(trade.get('id'), book.ticker, when, sys.intern(str(trade.get('time', ''))), next(self._seq),
+                         shares / book.factor, shares * price))
+        elif kind == 'sell':
+            sale = book.sell(float(trade['shares']), float(trade['price']), self.method, when, trade.get('lot_ids'))
+            sale["id"] = trade.get('id')
+            self.sales.append(sale)
+        elif kind == 'split':
+            book.split(float(trade['ratio']))
+        elif kind == 'dividend':
+            book.dividend(float(trade['amount']))
+        else:
+            raise ValueError(f"Unknown trade type: {kind}")
+        if self.last_key is None or key > self.last_key: self.last_key = key
+
+    # --- VIEWS ---
+    def open_lots(self):
+        """Open lots as TradeColumns (split-adjusted shares, per-share cost in price)."""
+        ids, tickers, codes, shares, price, days, times = [], [], [], [], [], [], []
+        for book in self.books.values():
+            if book.base <= EPS: continue
+            code = len(tickers)
+            tickers.append(book.ticker)
+            avg = book.cost / book.shares
+            for lot in book.open_lots():
+                lot_shares = lot.base * book.factor
+                ids.append(lot.id)
+                codes.append(code)
+                shares.append(lot_shares)
+                price.append(avg if self.method == AVERAGE else lot.cost / lot_shares)
+                days.append(lot.date.toordinal())
+                times.append(lot.time)
+        return TradeColumns(ids, tickers, codes, shares, price, days, times)
+
+    def positions(self):
+        return {
+            t: {"shares": b.shares, "cost": b.cost, "realized": b.realized, "dividends": b.dividends}
+            for t, b in self.books.items()
+        }
+
+    def unrealized(self, prices):
+        return {t: b.shares * prices.get(t, 0.0) - b.cost for t, b in self.books.items() if b.base > EPS}
+
+    @property
+    def realized(self):
+        return sum(b.realized for b in self.books.values())
+
+    @property
+    def dividends(self):
+        return sum(b.dividends for b in self.books.values())
@@ -0,0 +1,60 @@
+from decimal import ROUND_HALF_EVEN, Decimal
+
+import numpy as np
+
+# --- MONEY ARITHMETIC ---
+# In "exact" mode amounts are held as int64 counts of a currency's minor unit
+# (cents, yen, fils), so adding up 100k lots is an exact integer sum done in
+# NumPy. Decimal only appears at the edges: parsing typed input and rounding or
+# formatting a single result for display. "float" mode is the original behaviour.
+
+FLOAT, EXACT = "float", "exact"
+MODES = (FLOAT, EXACT)
+ROUNDING = ROUND_HALF_EVEN  # Banker's rounding, so rounding many lots does not bias the total
+
+# Decimal places of the minor unit (ISO 4217 where it applies); anything else has 2
+MINOR_DIGITS = {
+    "JPY": 0, "KRW": 0, "VND": 0, "CLP": 0, "ISK": 0, "XAF": 0, "XOF": 0,
+    "BHD": 3, "KWD": 3, "OMR": 3, "JOD": 3, "TND": 3, "IQD": 3, "LYD": 3,
+    "BTC": 8, "ETH": 8, "SATS": 0, "BITS": 2,
+}
+
+def digits(currency="USD"):
+    return MINOR_DIGITS.get(str(currency).upper(), 2)
+
+def to_decimal(value):
+    """Decimal of typed text or a number; floats go through repr, so 0.1 stays 0.1."""
+    if isinstance(value, Decimal): return value
+    if isinstance(value, float): return Decimal(repr(value))
+    return Decimal(str(value).replace(",", "").strip())
+
+def parse(text, currency="USD"):
+    """Typed amount -> minor units, rounded exactly (no float in between)."""
+    return int(to_decimal(text).scaleb(digits(currency)).quantize(Decimal(1), rounding=ROUNDING))
+
+def to_minor(amounts, currency="USD"):
+    """Float amounts -> int64 minor units (array in, array out; scalars give an int).
+
+    Products such as shares * price are first rounded to 6 places past the minor unit,
+    which removes binary noise (2.675 * 100 = 267.49999...) before the half-even rounding.
+    """
+    scaled = np.round(np.asarray(amounts, dtype=np.float64) * 10 ** digits(currency), 6)
+    minor = np.rint(scaled).astype(np.int64)
+    return int(minor) if minor.ndim == 0 else minor
+
+def from_minor(minor, currency="USD"):
+    """Minor units -> Decimal (for display and further Decimal rounding)."""
+    return Decimal(int(minor)).scaleb(-digits(currency))
+
+def round_money(value, currency="USD"):
+    """One result (a payment, a balance) rounded to the currency's minor unit."""
+    return to_decimal(float(value) if isinstance(value, np.floating) else value).quantize(
+        Decimal(1).scaleb(-digits(currency)), rounding=ROUNDING)
+
+def convert(amount, rate, currency):
+    """Amount x FX rate in Decimal, rounded to the target currency."""
+    return round_money(to_decimal(amount) * to_decimal(float(rate)), currency)
+
+def fmt(value, currency="USD", symbol=""):
+    """Grouped amount with the currency's number of decimals."""
+    return f"{symbol}{value:,.{digits(currency)}f}"
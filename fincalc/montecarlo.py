@@ -0,0 +1,161 @@
+import math
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+# --- MONTE CARLO ENGINE ---
+# Paths are generated in fixed-size chunks so memory stays bounded regardless of
+# path count. Every chunk gets its own child seed from one SeedSequence, so a given
+# seed reproduces the same numbers whether chunks run in-process or on a pool.
+# mu is always the annualized arithmetic (GBM) drift; the -sigma^2/2 log-drift
+# correction is applied once, when paths are built.
+
+TRADING_DAYS = 252
+CHUNK_PATHS = 10000
+
+def estimate_params(closes, periods_per_year=TRADING_DAYS):
+    """Annualized GBM drift and log-return covariance from a (days x assets) close matrix.
+
+    The mean log return already carries -sigma^2/2, so it is added back to give the
+    arithmetic drift that simulate_paths and portfolio_var expect.
+    """
+    log_ret = np.diff(np.log(np.asarray(closes, float)), axis=0)
+    if log_ret.ndim == 1: log_ret = log_ret[:, None]
+    cov = np.atleast_2d(np.cov(log_ret, rowvar=False)) * periods_per_year
+    mu = log_ret.mean(axis=0) * periods_per_year + 0.5 * np.diag(cov)
+    return mu, cov
+
+def cholesky(cov):
+    """Cholesky factor, nudging the diagonal if the sample covariance is not quite positive definite."""
+    cov = np.atleast_2d(np.asarray(cov, float))
+    jitter = 0.0
+    for _ in range(6):
+        try:
+            return np.linalg.cholesky(cov + jitter * np.eye(len(cov)))
+        except np.linalg.LinAlgError:
+            jitter = max(jitter * 10, 1e-12)
+    raise ValueError("Covariance matrix is not positive definite")
+
+def _normals(rng, shape, antithetic):
+    """Standard normals along axis 0; with antithetic, the second half mirrors the first."""
+    if not antithetic:
+        return rng.standard_normal(shape)
+    half = rng.standard_normal(((shape[0] + 1) // 2,) + tuple(shape[1:]))
+    return np.concatenate((half, -half))[:shape[0]]
+
+def _chunk_sizes(n_paths, chunk):
+    sizes = [chunk] * (n_paths // chunk)
+    if n_paths % chunk: sizes.append(n_paths % chunk)
+    return sizes
+
+def _map_chunks(func, tasks, processes, executor=None, progress=None):
+    """Runs chunk tasks (seed, size, ...) in order of submission; progress(paths_done, total)."""
+    total, done = sum(t[1] for t in tasks), 0
+    if executor is None and processes and processes > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=processes) as ex:
+            return _map_chunks(func, tasks, None, ex, progress)
+    if executor is not None and len(tasks) > 1:
+        futures = {executor.submit(func, t): t[1] for t in tasks}
+        for future in as_completed(futures):
+            done += futures[future]
+            if progress: progress(done, total)
+        return [f.result() for f in futures]
+    results = []
+    for t in tasks:
+        results.append(func(t))
+        done += t[1]
+        if progress: progress(done, total)
+    return results
+
+def _tasks(seed, n_paths, chunk, *args):
+    sizes = _chunk_sizes(n_paths, chunk)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    return [(s, size) + args for s, size in zip(seeds, sizes)]
+
+# --- PATHS ---
+def simulate_paths(S0, mu, cov, T, steps, n_paths, seed=None, antithetic=True):
+    """Correlated GBM paths, shape (n_paths, steps + 1, assets). Use for small runs; large ones go through the chunked APIs."""
+    S0 = np.atleast_1d(np.asarray(S0, float))
+    mu = np.atleast_1d(np.asarray(mu, float))
+    L = cholesky(cov)
+    dt = T / steps
+    z = _normals(np.random.default_rng(seed), (n_paths, steps, len(S0)), antithetic) @ L.T
+    drift = (mu - 0.5 * np.diag(L @ L.T)) * dt
+    log_paths = np.cumsum(drift + z * math.sqrt(dt), axis=1)
+    log_paths = np.concatenate((np.zeros((n_paths, 1, len(S0))), log_paths), axis=1)
+    return S0 * np.exp(log_paths)
+
+# --- PORTFOLIO VaR / CVaR ---
+def _var_chunk(task):
+    seed, size, S0, shares, drift, L, antithetic = task
+    z = _normals(np.random.default_rng(seed), (size, len(S0)), antithetic) @ L.T
+    terminal = S0 * np.exp(drift + z)
+    return (terminal - S0) @ shares
+
+def portfolio_var(S0, shares, mu, cov, horizon_days=1, alpha=0.95, n_paths=100000,
+                  seed=None, antithetic=True, chunk=CHUNK_PATHS, processes=None, executor=None, progress=None):
+    """Simulated P&L over the horizon; VaR and CVaR are reported as positive losses."""
+    S0 = np.atleast_1d(np.asarray(S0, float))
+    shares = np.atleast_1d(np.asarray(shares, float))
+    t = horizon_days / TRADING_DAYS
+    L = cholesky(np.asarray(cov, float) * t)
+    drift = (np.atleast_1d(mu) - 0.5 * np.diag(np.atleast_2d(cov))) * t
+    tasks = _tasks(seed, n_paths, chunk, S0, shares, drift, L, antithetic)
+    pnl = np.concatenate(_map_chunks(_var_chunk, tasks, processes, executor, progress))
+
+    var = -np.quantile(pnl, 1 - alpha)
+    tail = pnl[pnl <= -var]
+    return {
+        "value": float(S0 @ shares),
+        "var": float(var),
+        "cvar": float(-tail.mean()) if tail.size else float(var),
+        "mean_pnl": float(pnl.mean()),
+        "paths": int(pnl.size),
+    }
+
+# --- PATH-DEPENDENT OPTIONS ---
+OPTION_KINDS = ("asian_call", "asian_put", "up_out_call", "down_out_put", "lookback_call", "lookback_put")
+
+def _payoff(kind, paths, K, barrier):
+    last = paths[:, -1]
+    if kind == "asian_call": return np.maximum(paths[:, 1:].mean(axis=1) - K, 0)
+    if kind == "asian_put": return np.maximum(K - paths[:, 1:].mean(axis=1), 0)
+    if kind == "up_out_call": return np.where(paths.max(axis=1) < barrier, np.maximum(last - K, 0), 0)
+    if kind == "down_out_put": return np.where(paths.min(axis=1) > barrier, np.maximum(K - last, 0), 0)
+    if kind == "lookback_call": return last - paths.min(axis=1)
+    if kind == "lookback_put": return paths.max(axis=1) - last
+    raise ValueError(f"Unknown option kind: {kind}")
+
+def _option_chunk(task):
+    seed, size, S0, K, T, r, sigma, steps, kind, barrier, antithetic = task
+    dt = T / steps
+    z = _normals(np.random.default_rng(seed), (size, steps), antithetic)
+    log_paths = np.cumsum((r - 0.5 * sigma ** 2) * dt + sigma * math.sqrt(dt) * z, axis=1)
+    paths = S0 * np.exp(np.concatenate((np.zeros((size, 1)), log_paths), axis=1))
+    payoff = _payoff(kind, paths, K, barrier)
+    if antithetic and size > 1:
+        # Pair each path with its mirror so the standard error reflects the variance reduction
+        half = (size + 1) // 2
+        payoff = (payoff[:half] + np.pad(payoff[half:], (0, 2 * half - size), constant_values=np.nan)) / 2
+        payoff = payoff[~np.isnan(payoff)]
+    return payoff.sum(), (payoff ** 2).sum(), payoff.size
+
+def price_option(S0, K, T, r, sigma, kind="asian_call", barrier=None, steps=None, n_paths=50000,
+                 seed=None, antithetic=True, chunk=CHUNK_PATHS, processes=None, executor=None, progress=None):
+    """Discounted Monte Carlo price of a path-dependent option under risk-neutral GBM.
+
+    executor: an existing pool to run the chunks on (see fincalc/compute.py) instead of
+    starting one for this call.
+    """
+    if kind not in OPTION_KINDS: raise ValueError(f"Unknown option kind: {kind}")
+    if kind in ("up_out_call", "down_out_put") and barrier is None: raise ValueError("Barrier required")
+    steps = steps or max(1, int(round(T * TRADING_DAYS)))
+    tasks = _tasks(seed, n_paths, chunk, S0, K, T, r, sigma, steps, kind, barrier, antithetic)
+    results = _map_chunks(_option_chunk, tasks, processes, executor, progress)
+    total = sum(res[0] for res in results)
+    total_sq = sum(res[1] for res in results)
+    n = sum(res[2] for res in results)
+    mean = total / n
+    var = max(total_sq / n - mean ** 2, 0.0)
+    disc = math.exp(-r * T)
+    return {"price": float(disc * mean), "stderr": disc * math.sqrt(var / n), "paths": n_paths}
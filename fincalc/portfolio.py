@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+
+from fincalc import money
+from fincalc.trades import TradeColumns
+
+# --- PORTFOLIO AGGREGATION (HEADLESS) ---
+
+def extract_last_prices(data, tickers):
+    """Last close per ticker from a yf.download(..., group_by='ticker') frame."""
+    current_prices = {}
+    for ticker in tickers:
+        try:
+            if data.empty: price = 0.0
+            elif isinstance(data.columns, pd.MultiIndex) and ticker in data.columns:
+                price = data[ticker]['Close'].iloc[-1].item()
+            elif 'Close' in data.columns:
+                price = data['Close'].iloc[-1].item()
+            else: price = 0.0
+            current_prices[ticker] = price
+        except:
+            current_prices[ticker] = 0.0
+    return current_prices
+
+class Holdings:
+    """Per-lot view over summarize_holdings' columns; items have the enriched-holding dict shape."""
+
+    def __init__(self, lots, price, market_value, gain, gain_pct):
+        self.lots, self.price, self.market_value, self.gain, self.gain_pct = lots, price, market_value, gain, gain_pct
+
+    def __len__(self):
+        return len(self.lots)
+
+    def __getitem__(self, i):
+        return {
+            "data": self.lots[i], "current_price": float(self.price[i]), "market_value": float(self.market_value[i]),
+            "gain_val": float(self.gain[i]), "gain_pct": float(self.gain_pct[i])
+        }
+
+    def __iter__(self):
+        for trade, p, mv, g, pct in zip(self.lots, self.price.tolist(), self.market_value.tolist(),
+                                        self.gain.tolist(), self.gain_pct.tolist()):
+            yield {"data": trade, "current_price": p, "market_value": mv, "gain_val": g, "gain_pct": pct}
+
+def summarize_holdings(holdings, current_prices, exact=False, currency="USD"):
+    """Values every lot at its live price (falling back to cost basis) and totals the book.
+
+    holdings is a TradeColumns (as from Ledger.open_lots) or a list of trade records;
+    "holdings" is a Holdings sequence: the maths is done column-wise here and each
+    enriched row (lot as a Trade under "data") is only built when it is read.
+
+    exact: each lot's value and cost are rounded to the currency's minor unit and summed
+    as int64 (see fincalc/money.py); total_value and total_gain come back as Decimal.
+    """
+    lots = holdings if isinstance(holdings, TradeColumns) else TradeColumns.from_trades(holdings)
+    table = np.array([current_prices.get(t, np.nan) for t in lots.tickers], dtype=float)
+    live = table[lots.codes] if len(lots) else np.zeros(0)
+    live = np.where(np.isnan(live), lots.price, live)
+    market_value = live * lots.shares
+    original_cost = lots.price * lots.shares
+    held = np.bincount(lots.codes, minlength=len(lots.tickers)) > 0
+    if exact:
+        value_minor, cost_minor = money.to_minor(market_value, currency), money.to_minor(original_cost, currency)
+        unit = 10.0 ** -money.digits(currency)
+        market_value, original_cost = value_minor * unit, cost_minor * unit  # Per-lot rows show the rounded amounts
+        by_minor = np.zeros(len(lots.tickers), dtype=np.int64)
+        np.add.at(by_minor, lots.codes, value_minor)
+        allocation_data = {t: float(money.from_minor(by_minor[i], currency)) for i, t in enumerate(lots.tickers) if held[i]}
+        total_value = money.from_minor(value_minor.sum(), currency)
+        total_cost = money.from_minor(cost_minor.sum(), currency)
+    else:
+        by_ticker = np.bincount(lots.codes, weights=market_value, minlength=len(lots.tickers))
+        allocation_data = {t: float(by_ticker[i]) for i, t in enumerate(lots.tickers) if held[i]}
+        total_value = float(market_value.sum())
+        total_cost = float(original_cost.sum())
+    gain = market_value - original_cost
+    with np.errstate(divide="ignore", invalid="ignore"):
+        gain_pct = np.where(original_cost != 0, gain / original_cost * 100, 0.0)
+
+    enriched_holdings = Holdings(lots, live, market_value, gain, gain_pct)
+
+    return {
+        "holdings": enriched_holdings,
+        "allocation": allocation_data,
+        "total_value": total_value,
+        "total_gain": total_value - total_cost,
+        "total_gain_pct": float((total_value - total_cost) / total_cost * 100) if total_cost > 0 else 0,
+    }
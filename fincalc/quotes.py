@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+
+# --- BATCHED QUOTES (HEADLESS) ---
+# One yf.download frame for the whole watchlist becomes a date x ticker matrix;
+# prices, changes and sparklines are all computed on that matrix at once.
+
+SPARK_POINTS = 32  # Points per sparkline
+
+def close_matrix(data, tickers):
+    """Date x ticker closes (forward-filled) from a yf.download(..., group_by='ticker') frame."""
+    if data is None or data.empty: return pd.DataFrame()
+    if isinstance(data.columns, pd.MultiIndex):
+        closes = data.xs('Close', axis=1, level=1)
+        listed = set(closes.columns)
+        closes = closes[[t for t in tickers if t in listed]]
+    elif 'Close' in data.columns and len(tickers) == 1:
+        closes = data[['Close']].rename(columns={'Close': tickers[0]})
+    else:
+        return pd.DataFrame()
+    return closes.ffill()
+
+def downsample(values, points=SPARK_POINTS):
+    """Samples every column at the same evenly spaced rows and scales each to 0..1."""
+    n = len(values)
+    rows = np.unique(np.linspace(0, n - 1, min(points, n)).round().astype(int))
+    sampled = values[rows]
+    with np.errstate(all="ignore"):
+        lo, hi = np.nanmin(sampled, axis=0), np.nanmax(sampled, axis=0)
+    span = np.where(hi > lo, hi - lo, 1.0)
+    return (sampled - lo) / span
+
+def build_quotes(closes):
+    """ticker -> {price, change, pct, spark}; change is against the previous close."""
+    if closes.empty: return {}
+    values = closes.to_numpy(dtype=float)
+    last = values[-1]
+    prev = values[-2] if len(values) > 1 else last
+    change = last - prev
+    with np.errstate(all="ignore"):
+        pct = np.where(prev != 0, change / prev * 100, 0.0)
+    spark = np.round(downsample(values), 3).T.tolist()  # One row per ticker
+
+    quotes = {}
+    for ticker, price, chg, p, line in zip(closes.columns, last.tolist(), np.nan_to_num(change).tolist(),
+                                           np.nan_to_num(pct).tolist(), spark):
+        if price != price: continue  # nan: no close yet
+        quotes[ticker] = {"price": price, "change": chg, "pct": p, "spark": [v for v in line if v == v]}
+    return quotes
+
+def session_stats(hist):
+    """Open / high / low / volume of the latest session in a yfinance history frame (daily or intraday)."""
+    session = hist[hist.index.normalize() == hist.index[-1].normalize()]
+    return {
+        'open': float(session['Open'].iloc[0]),
+        'high': float(session['High'].max()),
+        'low': float(session['Low'].min()),
+        'vol': float(session['Volume'].sum())
+    }
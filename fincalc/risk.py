@@ -0,0 +1,84 @@
+import numpy as np
+
+# --- PORTFOLIO RISK ANALYTICS ---
+# RiskModel keeps running sums over an aligned returns matrix (one column per
+# asset, benchmark included), so extending the history only costs the new rows.
+
+TRADING_DAYS = 252
+
+class RiskModel:
+    def __init__(self, tickers, benchmark):
+        self.tickers = list(tickers)
+        self.benchmark = benchmark
+        self.columns = self.tickers + ([benchmark] if benchmark not in self.tickers else [])
+        k = len(self.columns)
+        self.n = 0
+        self.sum = np.zeros(k)
+        self.cross = np.zeros((k, k))
+        self.last_date = None
+        self.last_close = None
+        self.peak = None
+        self.max_drawdown = np.zeros(k)
+
+    def update(self, closes):
+        """Folds in rows of a date-indexed close frame newer than the last update. Returns rows added."""
+        if self.last_date is not None:
+            closes = closes.iloc[closes.index.searchsorted(self.last_date, side="right"):]
+        if closes.empty: return 0
+        frame = closes[self.columns]
+
+        prices = frame.to_numpy(float)
+        chain = prices if self.last_close is None else np.vstack((self.last_close, prices))
+        rets = chain[1:] / chain[:-1] - 1
+        self.n += len(rets)
+        self.sum += rets.sum(axis=0)
+        self.cross += rets.T @ rets
+
+        peaks = np.maximum.accumulate(prices if self.peak is None else np.vstack((self.peak, prices)), axis=0)
+        peaks = peaks[-len(prices):]
+        self.max_drawdown = np.maximum(self.max_drawdown, (1 - prices / peaks).max(axis=0))
+        self.peak = peaks[-1]
+        self.last_close = prices[-1]
+        self.last_date = frame.index[-1]
+        return len(prices)
+
+    def mean(self):
+        return self.sum / self.n
+
+    def cov(self):
+        mean = self.mean()
+        return (self.cross - self.n * np.outer(mean, mean)) / (self.n - 1)
+
+    def metrics(self, values, rf_pct):
+        """Annualized stats for the held assets; values are current market values per ticker."""
+        if self.n < 2: raise ValueError("Not enough history")
+        held = len(self.tickers)
+        b = self.columns.index(self.benchmark)
+        cov = self.cov() * TRADING_DAYS
+        mean = self.mean() * TRADING_DAYS
+        vol = np.sqrt(np.diag(cov))
+        beta = cov[:, b] / cov[b, b] if cov[b, b] > 0 else np.zeros(len(cov))
+
+        w = np.array([values.get(t, 0.0) for t in self.tickers], float)
+        w = w / w.sum() if w.sum() > 0 else w
+        cov_a = cov[:held, :held]
+        port_vol = float(np.sqrt(w @ cov_a @ w))
+        port_ret = float(w @ mean[:held])
+        with np.errstate(invalid="ignore", divide="ignore"):
+            corr = cov_a / np.outer(vol[:held], vol[:held])
+
+        return {
+            "assets": {
+                t: {"return": float(mean[i]), "volatility": float(vol[i]), "beta": float(beta[i]),
+                    "max_drawdown": float(self.max_drawdown[i])}
+                for i, t in enumerate(self.tickers)
+            },
+            "correlation": np.nan_to_num(corr).tolist(),
+            "portfolio": {
+                "return": port_ret,
+                "volatility": port_vol,
+                "beta": float(w @ beta[:held]),
+                "sharpe": (port_ret - rf_pct / 100) / port_vol if port_vol > 0 else 0.0,
+            },
+            "days": self.n,
+        }
@@ -0,0 +1,102 @@
+import sys
+from dataclasses import dataclass
+from datetime import date
+
+import numpy as np
+
+# --- TRADE RECORDS ---
+# Stored trades stay plain dicts in data_cache.json; in memory they are parsed once
+# into slotted Trade objects (no per-instance __dict__, interned ticker strings) or,
+# for whole books, into TradeColumns: one NumPy array per numeric field and a small
+# ticker table, which is what the portfolio aggregation works on.
+
+def parse_date(text):
+    try:
+        return date.fromisoformat(str(text)[:10])
+    except ValueError:
+        return date.today()
+
+@dataclass(slots=True)
+class Trade:
+    id: str
+    ticker: str
+    shares: float
+    price: float  # Cost basis per share for buys and open lots, sale price for sells
+    date: date
+    time: str = ""
+    type: str = "buy"
+
+    def __post_init__(self):
+        self.ticker = sys.intern(self.ticker)
+
+    @classmethod
+    def from_dict(cls, record):
+        price = record.get('cost_basis', record.get('price', 0))
+        return cls(record.get('id'), record['ticker'], float(record['shares']), float(price),
+                   parse_date(record.get('date')), str(record.get('time', '')), record.get('type', 'buy'))
+
+    def to_dict(self):
+        """The stored record shape (see PortfolioScreen.fetch_historical_price)."""
+        return {
+            "id": self.id, "type": self.type, "ticker": self.ticker, "shares": self.shares,
+            "cost_basis": self.price, "price": self.price, "date": self.date.isoformat(), "time": self.time
+        }
+
+class TradeColumns:
+    """Column-wise book of trades or lots; indexing yields Trade objects on demand."""
+
+    def __init__(self, ids, tickers, codes, shares, price, days, times, types=None):
+        self.ids = ids                                  # list of str
+        self.tickers = tickers                          # distinct tickers; codes index into it
+        self.codes = np.asarray(codes, dtype=np.int32)
+        self.shares = np.asarray(shares, dtype=np.float64)
+        self.price = np.asarray(price, dtype=np.float64)
+        self.days = np.asarray(days, dtype=np.int32)    # date.toordinal()
+        self.times = times                              # list of str (mostly repeats of a few values)
+        self.types = types                              # None when every row is a buy/open lot
+
+    @classmethod
+    def from_trades(cls, trades):
+        """From Trade objects or stored dicts (parsed straight into the columns)."""
+        table, ids, codes, shares, price, days, times, types = {}, [], [], [], [], [], [], []
+        ordinals = {}  # Date text -> ordinal; books repeat the same few dates a lot
+        for t in trades:
+            if isinstance(t, dict):
+                ticker, when, time = t['ticker'], t.get('date'), str(t.get('time', ''))
+                ids.append(t.get('id'))
+                shares.append(t['shares'])
+                price.append(t.get('cost_basis', t.get('price', 0)))
+                types.append(t.get('type', 'buy'))
+                day = ordinals.get(when)
+                if day is None: day = ordinals[when] = parse_date(when).toordinal()
+            else:
+                ticker, time, day = t.ticker, t.time, t.date.toordinal()
+                ids.append(t.id)
+                shares.append(t.shares)
+                price.append(t.price)
+                types.append(t.type)
+            code = table.get(ticker)
+            if code is None: code = table[sys.intern(ticker)] = len(table)
+            codes.append(code)
+            days.append(day)
+            times.append(sys.intern(time))
+        has_types = any(k != "buy" for k in types)
+        return cls(ids, list(table), codes, shares, price, days, times, types if has_types else None)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, i):
+        return Trade(self.ids[i], self.tickers[self.codes[i]], float(self.shares[i]), float(self.price[i]),
+                     date.fromordinal(int(self.days[i])), self.times[i], self.types[i] if self.types else "buy")
+
+    def __iter__(self):
+        tickers, from_ordinal = self.tickers, date.fromordinal
+        types = self.types or ["buy"] * len(self)
+        for i, c, s, p, d, t, k in zip(self.ids, self.codes.tolist(), self.shares.tolist(), self.price.tolist(),
+                                       self.days.tolist(), self.times, types):
+            yield Trade(i, tickers[c], s, p, from_ordinal(d), t, k)
+
+    def ticker_column(self):
+        """Ticker per row (interned strings, so this is a list of shared references)."""
+        return [self.tickers[c] for c in self.codes.tolist()]
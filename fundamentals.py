@@ -0,0 +1,28 @@
+import logging
+
+import instrumentation
+import market_data
+import snapshots
+
+# --- FUNDAMENTALS CACHE ---
+# stock.info is by far the slowest Yahoo call and its fields barely move during a day,
+# so it stays off the price path: served from the snapshot store, refreshed in the
+# background at most once per snapshots.MAX_AGE["fundamentals"].
+
+FIELDS = {"mkt_cap": "marketCap", "pe": "trailingPE", "div_yield": "trailingAnnualDividendYield"}
+
+def cached(ticker):
+    """(fields, saved_at) from the store, or (None, None)."""
+    return snapshots.get("fundamentals", ticker)
+
+def refresh(ticker):
+    """Fetches stock.info and stores FIELDS; None on failure. A refresh already running is shared."""
+    try:
+        with instrumentation.timer("net.yf.info"):
+            info = market_data.info(ticker)
+        data = {key: info.get(src) for key, src in FIELDS.items()}
+        snapshots.put("fundamentals", ticker, data)
+        return data
+    except Exception as e:
+        logging.error(f"Fundamentals Error: {e}")
+        return None
@@ -0,0 +1,145 @@
+import json
+import threading
+import time
+from collections import deque
+from functools import wraps
+
+# --- HOT-PATH INSTRUMENTATION ---
+# Timers and counters for debug mode. When disabled, timer() hands back a shared
+# no-op object and count() returns after one flag check, so call sites can stay in place.
+
+enabled = False
+WINDOW = 512      # Samples kept per timer (rolling window)
+STALL_MS = 50.0   # Frame times above this count as a UI stall
+BUCKETS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000]
+
+_timers = {}
+_counters = {}
+_listeners = []   # Objects with on_start(name) / on_stop(name, ms), e.g. the profiler
+_lock = threading.Lock()
+
+def set_enabled(value):
+    global enabled
+    enabled = bool(value)
+
+def record(name, ms):
+    with _lock:
+        samples = _timers.get(name)
+        if samples is None:
+            samples = _timers[name] = deque(maxlen=WINDOW)
+        samples.append(ms)
+
+def add_listener(listener):
+    if listener not in _listeners: _listeners.append(listener)
+
+def remove_listener(listener):
+    if listener in _listeners: _listeners.remove(listener)
+
+def count(name, n=1):
+    if not enabled: return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + n
+
+class _Timer:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        for listener in _listeners: listener.on_start(self.name)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        ms = (time.perf_counter() - self.start) * 1000
+        record(self.name, ms)
+        for listener in _listeners: listener.on_stop(self.name, ms)
+        return False
+
+class _NullTimer:
+    __slots__ = ()
+    def __enter__(self): return self
+    def __exit__(self, *exc): return False
+
+_NULL_TIMER = _NullTimer()
+
+def timer(name):
+    """Context manager timing a block into the named rolling window."""
+    return _Timer(name) if enabled else _NULL_TIMER
+
+def timed(name):
+    """Decorator form of timer()."""
+    def decorate(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return func(*args, **kwargs)
+            with _Timer(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+# --- EXPORT ---
+def percentile(sorted_values, pct):
+    if not sorted_values: return 0.0
+    idx = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[idx]
+
+def histogram(values):
+    """Counts per upper bucket edge (ms); the last key catches everything slower."""
+    counts = {f"<={b}": 0 for b in BUCKETS_MS}
+    counts[f">{BUCKETS_MS[-1]}"] = 0
+    for v in values:
+        for b in BUCKETS_MS:
+            if v <= b:
+                counts[f"<={b}"] += 1
+                break
+        else:
+            counts[f">{BUCKETS_MS[-1]}"] += 1
+    return counts
+
+def snapshot():
+    # Copy under the lock (worker threads append concurrently), sort outside it
+    with _lock:
+        copies = {name: list(samples) for name, samples in _timers.items()}
+        counters = dict(_counters)
+    timers = {}
+    for name, values in copies.items():
+        values.sort()
+        if not values: continue
+        timers[name] = {
+            "count": len(values),
+            "p50_ms": percentile(values, 50),
+            "p95_ms": percentile(values, 95),
+            "max_ms": values[-1],
+            "histogram": histogram(values),
+        }
+    return {"timers": timers, "counters": counters}
+
+def export_json(path):
+    with open(path, "w") as f:
+        json.dump(snapshot(), f, indent=2)
+
+def reset():
+    with _lock:
+        _timers.clear()
+        _counters.clear()
+
+# --- FRAME MONITOR (Kivy) ---
+_frame_event = None
+
+def _on_frame(dt):
+    ms = dt * 1000
+    record("ui.frame", ms)
+    if ms > STALL_MS: count("ui.frame_stall")
+
+def watch_frames(active):
+    """Samples the Kivy frame interval while active; lazily imports Clock so headless use stays Kivy-free."""
+    global _frame_event
+    from kivy.clock import Clock
+    if active and _frame_event is None:
+        _frame_event = Clock.schedule_interval(_on_frame, 0)
+    elif not active and _frame_event is not None:
+        _frame_event.cancel()
+        _frame_event = None
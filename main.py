@@ -1,6 +1,12 @@
 import logging
+import multiprocessing
 import sys
 import os
+
+if __name__ == "__main__":
+    # Frozen EXE: a compute-pool worker (fincalc/compute.py) is handed off here, before Kivy loads
+    multiprocessing.freeze_support()
+
 from kivy.utils import platform
 
 # Window size for desktop dev
@@ -10,14 +16,19 @@ if platform not in ['android', 'ios']:
 
 from kivy.lang import Builder
 from kivymd.app import MDApp
-from kivy.properties import StringProperty, NumericProperty, BooleanProperty
-from kivy.storage.jsonstore import JsonStore 
+from kivy.properties import StringProperty, NumericProperty, BooleanProperty, ListProperty
 
 from threading_utils import run_bg
 import app_state # <--- Uses the new portable base_dir
+import instrumentation
+import prefetch
+import profiler
+from settings_store import SettingsStore
+from fincalc import compute
 
 # Import Screens
 from screens.stock import StockScreen
+from screens.watchlist import WatchlistScreen
 from screens.crypto import CryptoScreen
 from screens.currency_converter import CurrencyScreen
 from screens.calculator import CalculatorScreen
@@ -41,6 +52,9 @@ class FinCalcApp(MDApp):
     default_currency = StringProperty("USD")
     default_rf = NumericProperty(4.2)
     last_ticker = StringProperty("NVDA")
+    lot_method = StringProperty("FIFO")
+    money_mode = StringProperty("float")
+    chart_indicators = ListProperty(["sma", "bollinger"])
     debug_mode = BooleanProperty(False)
 
     def build(self):
@@ -50,11 +64,11 @@ class FinCalcApp(MDApp):
         # --- PORTABLE MODE ---
         # Saves 'user_settings.json' right next to FinCalc.exe
         settings_file = os.path.join(app_state.base_dir, "user_settings.json")
-        self.store = JsonStore(settings_file)
+        self.store = SettingsStore(settings_file)
         
         # 1. Load All Settings
-        if self.store.exists("config"):
-            config = self.store.get("config")
+        if self.store.config:
+            config = self.store.config
             
             # Visuals
             self.theme_cls.theme_style = config.get("theme_style", "Light")
@@ -64,12 +78,32 @@ class FinCalcApp(MDApp):
             self.default_currency = config.get("default_currency", "USD")
             self.default_rf = config.get("default_rf", 4.2)
             self.last_ticker = config.get("last_ticker", "NVDA")
+            self.lot_method = config.get("lot_method", "FIFO")
+            self.money_mode = config.get("money_mode", "float")
+            self.chart_indicators = config.get("chart_indicators", ["sma", "bollinger"])
             self.debug_mode = config.get("debug_mode", False)
         
         return Builder.load_file(resource_path("interface.kv"))
 
+    def on_start(self):
+        # Warm the caches the screens read first while the user is still on the home screen
+        prefetch.start(lambda: {"ticker": self.last_ticker, "currency": self.default_currency})
+
+    def on_lot_method(self, instance, value):
+        app_state.lot_method = value
+
+    def on_money_mode(self, instance, value):
+        app_state.money_mode = value
+
+    def on_debug_mode(self, instance, value):
+        # Keep the non-UI modules (networking, instrumentation) in sync with the setting
+        app_state.debug_mode = value
+        instrumentation.set_enabled(value)
+        instrumentation.watch_frames(value)
+        profiler.set_enabled(value, os.path.join(app_state.base_dir, "profiles"))
+
     def save_setting(self, key, value):
-        """Universal Save Function"""
+        """Universal Save Function (memory now, disk after the debounce window)"""
         if hasattr(self, key):
             setattr(self, key, value)
             
@@ -78,13 +112,17 @@ class FinCalcApp(MDApp):
         elif key == "primary_palette":
             self.theme_cls.primary_palette = value
 
-        if self.store.exists("config"):
-            config = self.store.get("config")
-        else:
-            config = {}
-            
-        config[key] = value
-        self.store.put("config", **config)
+        self.store.set(key, value)
+
+    def on_pause(self):
+        # Mobile: the OS may kill a paused app, so write pending settings first
+        self.store.flush()
+        return True
+
+    def on_stop(self):
+        self.store.flush()
+        prefetch.stop()
+        compute.shutdown()
 
 if __name__ == "__main__":
     FinCalcApp().run()
\ No newline at end of file
@@ -0,0 +1,209 @@
+import logging
+import threading
+import time
+
+import pandas as pd
+import requests
+
+import instrumentation
+import networking
+from networking import SafeRequest
+
+# --- MARKET DATA ---
+# Screens and caches ask for data by capability; this layer picks the source.
+#   bars            OHLCV for a ticker set (one yf.download)
+#   history         one ticker's history (Ticker.history)
+#   info            slow-moving fundamentals (Ticker.info)
+#   fx              exchange rates from a base currency
+#   crypto_markets  market rows for the top coins, or for specific coin ids
+#   crypto_search   coin lookup by name or symbol
+# PROVIDERS is ordered cheapest first. A provider whose circuit breaker is open is
+# skipped, and one that fails or comes back empty hands over to the next.
+# bars requests with the same arguments that arrive within BATCH_WINDOW (watchlist,
+# portfolio and risk refreshing together) are merged into a single download.
+
+BATCH_WINDOW = 0.03  # Seconds the first bars request waits for others to join
+
+class Unavailable(requests.exceptions.ConnectionError):
+    """No provider could answer (all down, failing or empty)."""
+
+def _empty(result):
+    return result is None or len(result) == 0
+
+# --- PROVIDERS ---
+class Provider:
+    name = ""
+    host = None         # Circuit-breaker host (networking.breaker_for)
+    capabilities = ()
+
+    def is_down(self):
+        return self.host is not None and networking.is_down(self.host)
+
+class ErApiProvider(Provider):
+    """open.er-api.com: every rate for a base in one small request."""
+    name, host, capabilities = "er-api", "open.er-api.com", ("fx",)
+
+    def fx(self, base, targets=None):
+        resp = SafeRequest.get(f"https://open.er-api.com/v6/latest/{base}")
+        return resp["rates"] if resp and "rates" in resp else None
+
+class CoinGeckoProvider(Provider):
+    """CoinGecko: crypto markets and search, plus fiat rates derived from its BTC table."""
+    name, host, capabilities = "coingecko", "api.coingecko.com", ("crypto_markets", "crypto_search", "fx")
+    API = "https://api.coingecko.com/api/v3"
+
+    def crypto_markets(self, currency, ids=None, limit=10):
+        if ids: params = {"ids": ",".join(ids), "vs_currency": currency}
+        else: params = {"vs_currency": currency, "order": "market_cap_desc", "per_page": limit, "page": 1, "sparkline": "false"}
+        data = SafeRequest.get(f"{self.API}/coins/markets", params=params)
+        return data if isinstance(data, list) else None
+
+    def crypto_search(self, query):
+        data = SafeRequest.get(f"{self.API}/search", params={"query": query})
+        return data.get('coins') if isinstance(data, dict) else None
+
+    def fx(self, base, targets=None):
+        data = SafeRequest.get(f"{self.API}/exchange_rates")
+        table = (data or {}).get("rates", {})
+        fiat = {code.upper(): row["value"] for code, row in table.items() if row.get("type") == "fiat" and row.get("value")}
+        if base not in fiat: return None
+        return {code: value / fiat[base] for code, value in fiat.items()}
+
+class YahooProvider(Provider):
+    """Yahoo via yfinance: prices, history and fundamentals; FX only for named pairs (one download)."""
+    name, host, capabilities = "yahoo", networking.YAHOO, ("bars", "history", "info", "fx")
+
+    def bars(self, tickers, **kwargs):
+        return networking.yf_download(tickers, **kwargs)
+
+    def history(self, ticker, **kwargs):
+        return networking.yf_history(ticker, **kwargs)
+
+    def info(self, ticker):
+        return networking.yf_info(ticker)
+
+    def fx(self, base, targets=None):
+        if not targets: return None  # No "all rates" call; too slow to fetch every pair
+        pairs = {f"{base}{t}=X": t for t in targets}
+        data = networking.yf_download(sorted(pairs), period="5d", interval="1d", group_by='ticker', progress=False)
+        rates = {}
+        for pair, target in pairs.items():
+            if isinstance(data.columns, pd.MultiIndex):
+                if pair not in data.columns.get_level_values(0): continue
+                closes = data[pair]['Close'].dropna()
+            else:
+                closes = data['Close'].dropna() if 'Close' in data.columns else pd.Series(dtype=float)
+            if not closes.empty: rates[target] = float(closes.iloc[-1])
+        return rates
+
+PROVIDERS = [ErApiProvider(), CoinGeckoProvider(), YahooProvider()]
+
+def register(provider, first=False):
+    """Adds a provider to the chain (first = preferred over the built-in ones)."""
+    if first: PROVIDERS.insert(0, provider)
+    else: PROVIDERS.append(provider)
+
+def _first(capability, *args, **kwargs):
+    """Result of the first provider with a non-empty answer; raises if nobody answered at all."""
+    result, error = None, None
+    for provider in list(PROVIDERS):
+        if capability not in provider.capabilities: continue
+        if provider.is_down():
+            instrumentation.count("md.skip")
+            continue
+        try:
+            result = getattr(provider, capability)(*args, **kwargs)
+        except Exception as e:
+            error = e
+            logging.warning(f"{provider.name} {capability} failed: {e}")
+            continue
+        if not _empty(result): return result
+        instrumentation.count("md.fallback")
+    if result is None: raise error or Unavailable(f"No provider for {capability}")
+    return result  # Empty but valid (e.g. an unknown ticker)
+
+# --- BATCHING ---
+class _Batch:
+    __slots__ = ("tickers", "done", "data", "error")
+
+    def __init__(self):
+        self.tickers = set()
+        self.done = threading.Event()
+        self.data = None
+        self.error = None
+
+def _select(data, tickers, copy):
+    """The caller's columns of a merged bars frame, without rows where all of them are empty."""
+    if data is None or data.empty or not isinstance(data.columns, pd.MultiIndex):
+        return data.copy() if copy and data is not None else data
+    listed = set(data.columns.get_level_values(0))
+    return data[[t for t in dict.fromkeys(tickers) if t in listed]].dropna(how='all')
+
+class BarsBatcher:
+    def __init__(self, fetch, window=BATCH_WINDOW):
+        self.fetch = fetch
+        self.window = window
+        self.pending = {}  # Arguments -> batch still collecting tickers
+        self.lock = threading.Lock()
+
+    def get(self, tickers, **kwargs):
+        key = tuple(sorted(kwargs.items()))
+        with self.lock:
+            batch = self.pending.get(key)
+            leader = batch is None
+            if leader: batch = self.pending[key] = _Batch()
+            batch.tickers.update(tickers)
+
+        if leader:
+            time.sleep(self.window)
+            with self.lock:
+                del self.pending[key]
+            try:
+                batch.data = self.fetch(sorted(batch.tickers), **kwargs)
+            except Exception as e:
+                batch.error = e
+            finally:
+                batch.done.set()
+        else:
+            instrumentation.count("md.bars.batched")
+            batch.done.wait()
+
+        if batch.error is not None: raise batch.error
+        return _select(batch.data, tickers, copy=not leader)
+
+_bars = BarsBatcher(lambda tickers, **kwargs: _first("bars", tickers, **kwargs))
+
+# --- CAPABILITIES ---
+def bars(tickers, **kwargs):
+    """yf.download-shaped frame for tickers (merged with concurrent requests); raises if no source answers."""
+    return _bars.get(list(tickers), **kwargs)
+
+def history(ticker, **kwargs):
+    return _first("history", ticker, **kwargs)
+
+def info(ticker):
+    return _first("info", ticker)
+
+def fx_rates(base, targets=None):
+    """Rates from base, or None. Fallback sources may only cover targets."""
+    try:
+        return _first("fx", base, targets)
+    except Exception as e:
+        logging.error(f"FX Error: {e}")
+        return None
+
+def crypto_markets(currency, ids=None, limit=10):
+    """Market rows (CoinGecko shape) for the top coins or the given ids, or None."""
+    try:
+        return _first("crypto_markets", currency, ids, limit)
+    except Exception as e:
+        logging.error(f"Crypto Markets Error: {e}")
+        return None
+
+def crypto_search(query):
+    """Matching coins (id, name, symbol, ...), or None."""
+    try:
+        return _first("crypto_search", query)
+    except Exception as e:
+        logging.error(f"Crypto Search Error: {e}")
+        return None
@@ -2,21 +2,199 @@ import requests
 import logging
 import time
 import os
+import copy
+import threading
+from collections import deque
+from urllib.parse import urlsplit
 import app_state
+import instrumentation
+import transport
+
+# --- SINGLE-FLIGHT ---
+# Screens re-entering, currency switches and overlapping refreshes tend to ask for the
+# same thing from several threads at once. Identical calls that overlap share one
+# request: the first caller runs it, the others wait for its result (or exception).
+# Nothing is kept once it returns; caching stays with the callers.
+
+class _Call:
+    __slots__ = ("done", "result", "error", "waiters")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+class SingleFlight:
+    def __init__(self, name, copy=None):
+        self.name = name
+        self.copy = copy  # Gives every caller of a shared call its own result to mutate
+        self.calls = {}
+        self.lock = threading.Lock()
+
+    def do(self, key, func, *args, **kwargs):
+        with self.lock:
+            call = self.calls.get(key)
+            leader = call is None
+            if leader: call = self.calls[key] = _Call()
+            else: call.waiters += 1
+
+        if not leader:
+            instrumentation.count(f"{self.name}.shared")
+            call.done.wait()
+            if call.error is not None: raise call.error
+            return self._own(call.result)
+
+        try:
+            call.result = func(*args, **kwargs)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self.lock:
+                del self.calls[key]
+                shared = call.waiters > 0
+            call.done.set()
+        # Waiters copy from call.result, so the leader must not hand out the original
+        return self._own(call.result) if shared else call.result
+
+    def _own(self, result):
+        return self.copy(result) if self.copy and result is not None else result
+
+# --- CIRCUIT BREAKERS ---
+# One per provider host. The last WINDOW outcomes are kept; once MIN_CALLS are in and
+# FAILURE_RATE of them failed, the breaker opens and calls fail fast for COOLDOWN
+# seconds (callers fall back to their snapshots instead of sleeping through retries).
+# After that one probe goes through (half-open): success closes it, failure re-opens it.
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half-open"
+WINDOW = 20
+MIN_CALLS = 4
+FAILURE_RATE = 0.5
+COOLDOWN = 30
+YAHOO = "finance.yahoo.com"  # yfinance spreads calls over several hosts; one breaker covers them
+
+class CircuitOpen(requests.exceptions.ConnectionError):
+    """The provider's breaker is open; the call was not attempted."""
+
+class CircuitBreaker:
+    def __init__(self, host, window=WINDOW, min_calls=MIN_CALLS, failure_rate=FAILURE_RATE, cooldown=COOLDOWN, clock=time.monotonic):
+        self.host = host
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.cooldown = cooldown
+        self.clock = clock
+        self.results = deque(maxlen=window)  # True = success
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.probing = False
+        self.lock = threading.Lock()
+
+    def allow(self):
+        """Whether a call may go out now; every allowed call must be followed by record()."""
+        with self.lock:
+            if self.state == CLOSED: return True
+            if self.state == OPEN:
+                if self.clock() - self.opened_at < self.cooldown: return False
+                self.state, self.probing = HALF_OPEN, False
+            if self.probing: return False
+            self.probing = True
+            return True
+
+    def record(self, ok):
+        with self.lock:
+            if self.state == HALF_OPEN:
+                self.probing = False
+                if ok:
+                    self.state = CLOSED
+                    self.results.clear()
+                    logging.info(f"Provider {self.host} recovered")
+                else:
+                    self._open()
+                return
+            if self.state == OPEN: return  # Late result of a call let through before it opened
+            self.results.append(ok)
+            failures = self.results.count(False)
+            if len(self.results) >= self.min_calls and failures >= self.failure_rate * len(self.results):
+                self._open()
+
+    def _open(self):
+        self.state = OPEN
+        self.opened_at = self.clock()
+        instrumentation.count("net.breaker.open")
+        logging.warning(f"Provider {self.host} unavailable; failing fast for {self.cooldown}s")
+
+    def status(self):
+        with self.lock:
+            failures = self.results.count(False)
+            retry_in = max(0.0, self.cooldown - (self.clock() - self.opened_at)) if self.state == OPEN else 0.0
+            return {
+                "state": self.state,
+                "failure_rate": failures / len(self.results) if self.results else 0.0,
+                "calls": len(self.results),
+                "retry_in": retry_in,
+            }
+
+_breakers = {}
+_breakers_guard = threading.Lock()
+
+def breaker_for(host):
+    with _breakers_guard:
+        breaker = _breakers.get(host)
+        if breaker is None: breaker = _breakers[host] = CircuitBreaker(host)
+        return breaker
+
+def health():
+    """host -> breaker status for every provider contacted so far."""
+    with _breakers_guard:
+        breakers = sorted(_breakers.items())
+    return {host: breaker.status() for host, breaker in breakers}
+
+def is_down(host):
+    """True while host's breaker is open and cooling down, i.e. a call would fail fast."""
+    with _breakers_guard:
+        breaker = _breakers.get(host)
+    return breaker is not None and breaker.status()["retry_in"] > 0
+
+def _failed(status_code):
+    """Whether a response says the provider itself is in trouble (a 404 does not)."""
+    return status_code is None or status_code >= 500 or status_code == 429
+
+def _fast_fail(breaker):
+    instrumentation.count("net.fast_fail")
+    if app_state.debug_mode: logging.info(f"SKIP -> {breaker.host} (circuit {breaker.state})")
+
+_requests = SingleFlight("net.request", copy=copy.deepcopy)
+_images = SingleFlight("net.image")
+_yahoo = SingleFlight("net.yf", copy=lambda data: data.copy())
 
 class SafeRequest:
     @staticmethod
+    @instrumentation.timed("net.request")
     def get(url, params=None, timeout=10, retries=3):
         """
         Fetches data with exponential backoff retry logic.
+        Concurrent calls for the same URL and params share one request, and
+        while the host's circuit breaker is open it returns None without trying.
         """
+        return _requests.do(transport.fixture_key("http", url, params), SafeRequest._get, url, params, timeout, retries)
+
+    @staticmethod
+    def _get(url, params, timeout, retries):
+        breaker = breaker_for(urlsplit(url).hostname)
         for i in range(retries):
+            if not breaker.allow():
+                _fast_fail(breaker)
+                return None
             start_time = time.time()
+            wait = 2 ** i  # Exponential Backoff: Wait 1s, 2s, 4s...
+            response = None
             try:
                 if app_state.debug_mode:
                     logging.info(f"REQ (Try {i+1}/{retries}) -> {url} | Params: {params}")
 
-                response = requests.get(url, params=params, timeout=timeout)
+                response = transport.current().get(url, params=params, timeout=timeout)
+                breaker.record(not _failed(response.status_code))
                 response.raise_for_status()
                 
                 if app_state.debug_mode:
@@ -26,39 +204,95 @@ class SafeRequest:
                 return response.json()
 
             except requests.exceptions.Timeout:
+                instrumentation.count("net.error")
+                if response is None: breaker.record(False)
                 logging.warning(f"Timeout connecting to {url}. Retrying...")
             except requests.exceptions.RequestException as e:
+                instrumentation.count("net.error")
+                if response is None: breaker.record(False)
                 # 429 = Rate Limit. Wait longer.
                 if hasattr(e, 'response') and e.response is not None and e.response.status_code == 429:
                     logging.warning("Rate limit hit. Cooling down...")
-                    time.sleep(2 ** (i + 2)) # Extra wait for rate limits
+                    wait += 2 ** (i + 2) # Extra wait for rate limits
                 else:
                     logging.error(f"Network Error: {e}")
             except ValueError:
                 logging.error("Error decoding JSON response")
                 return None
             
-            # Exponential Backoff: Wait 1s, 2s, 4s...
             if i < retries - 1:
-                time.sleep(2 ** i)
+                if breaker.state != CLOSED: break  # Provider is down; don't hold the thread in retry sleeps
+                time.sleep(wait)
         
         return None
 
     @staticmethod
+    @instrumentation.timed("net.image")
     def download_image(url, filename):
+        # Two threads writing the same file would interleave chunks
+        return _images.do(filename, SafeRequest._download_image, url, filename)
+
+    @staticmethod
+    def _download_image(url, filename):
         if os.path.exists(filename):
+            instrumentation.count("cache.image.hit")
             if app_state.debug_mode: logging.info(f"CACHE HIT -> {filename}")
             return True
 
+        instrumentation.count("cache.image.miss")
+        breaker = breaker_for(urlsplit(url).hostname)
+        if not breaker.allow():
+            _fast_fail(breaker)
+            return False
+        response = None
         try:
             if app_state.debug_mode:
                 logging.info(f"IMG -> {url}")
-            response = requests.get(url, stream=True, timeout=5)
+            response = transport.current().get(url, stream=True, timeout=5)
+            breaker.record(not _failed(response.status_code))
             if response.status_code == 200:
                 with open(filename, 'wb') as f:
                     for chunk in response.iter_content(1024):
                         f.write(chunk)
                 return True
         except Exception as e:
+            if response is None: breaker.record(False)
             logging.error(f"Image Download Error: {e}")
-        return False
\ No newline at end of file
+        return False
+
+# --- YAHOO (yfinance through the transport) ---
+def _yahoo_key(kind, tickers, kwargs):
+    if isinstance(tickers, (list, tuple)): tickers = sorted(tickers)  # Same set, same batch
+    return transport.fixture_key(kind, tickers, kwargs)
+
+def _symbol_error(e):
+    """yfinance's own errors (no price data, missing timezone...) mean Yahoo answered; rate limits do not."""
+    return type(e).__module__.startswith("yfinance") and type(e).__name__ != "YFRateLimitError"
+
+def _guarded(func, *args, **kwargs):
+    """One yfinance call through the Yahoo breaker; raises CircuitOpen while it is open.
+
+    yf.download swallows network errors and returns an empty frame, so an empty result
+    counts as a failure too (an unknown ticker looks the same, hence the failure-rate window).
+    """
+    breaker = breaker_for(YAHOO)
+    if not breaker.allow():
+        _fast_fail(breaker)
+        raise CircuitOpen(f"{YAHOO} unavailable (retry in {breaker.status()['retry_in']:.0f}s)")
+    try:
+        result = func(*args, **kwargs)
+    except Exception as e:
+        breaker.record(_symbol_error(e))
+        raise
+    breaker.record(result is not None and len(result) > 0)
+    return result
+
+def yf_download(tickers, **kwargs):
+    """transport download(), shared with an identical call already in flight."""
+    return _yahoo.do(_yahoo_key("download", tickers, kwargs), _guarded, transport.current().download, tickers, **kwargs)
+
+def yf_history(ticker, **kwargs):
+    return _yahoo.do(_yahoo_key("history", ticker, kwargs), _guarded, transport.current().history, ticker, **kwargs)
+
+def yf_info(ticker):
+    return _yahoo.do(_yahoo_key("info", ticker, {}), _guarded, transport.current().info, ticker)
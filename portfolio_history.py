@@ -0,0 +1,74 @@
+import logging
+import os
+from datetime import date, timedelta
+
+import numpy as np
+
+import app_state
+import price_history
+from fincalc.equity import EquityCurve, first_changed_day, holdings_over_time, trade_fingerprints
+from fincalc.lots import parse_date
+
+# --- PORTFOLIO VALUE HISTORY ---
+# One snapshot per day in <base_dir>/portfolio_history.npz. Missing days are
+# backfilled from cached closes; today's row holds the live value until its close
+# arrives. Per-trade fingerprints find the earliest day an added, removed or edited
+# trade touches; only the rows from that day on are rebuilt.
+
+HISTORY_FILE = os.path.join(app_state.base_dir, "portfolio_history.npz")
+PERIODS = [(5, "5d"), (30, "1mo"), (90, "3mo"), (180, "6mo"), (365, "1y"), (730, "2y"), (1825, "5y"), (3650, "10y")]
+
+def period_for(start):
+    """Smallest yfinance period covering start..today."""
+    span = (date.today() - start).days + 5
+    for days, period in PERIODS:
+        if span <= days: return period
+    return "max"
+
+def net_invested(trades):
+    """Cash put in minus cash taken out (buy cost less sale proceeds)."""
+    total = 0.0
+    for t in trades:
+        kind = t.get('type', 'buy')
+        if kind == 'buy': total += float(t['shares']) * float(t.get('cost_basis', t.get('price', 0)))
+        elif kind == 'sell': total -= float(t['shares']) * float(t['price'])
+    return total
+
+def update_history(trades, live_value=None):
+    """Backfills missing days, records today's live value and returns the curve."""
+    curve = EquityCurve.load(HISTORY_FILE)
+    fingerprints = trade_fingerprints(trades)
+    changed = first_changed_day(curve.trades, fingerprints)
+    if changed is not None:
+        curve.truncate(changed)  # A trade after last_day truncates nothing: plain append
+        curve.trades = fingerprints
+
+    market = [t for t in trades if t.get('type', 'buy') in ('buy', 'sell')]
+    if not market: return curve
+
+    first = min(parse_date(t.get('date')) for t in market)
+    # The last recorded day is fetched again: if it was written from a live (intraday) value,
+    # its close replaces it once that day is over
+    start = first if curve.last_day is None else date.fromordinal(curve.last_day)
+    yesterday = date.today() - timedelta(days=1)
+
+    if start <= yesterday:
+        tickers = sorted({t['ticker'] for t in market})
+        closes = price_history.get_closes(tickers, period_for(start))
+        if not closes.empty:
+            closes = closes[closes.index.date >= first]
+            dates = list(closes.index.date)
+            held, invested = holdings_over_time(trades, dates, list(closes.columns))
+            values = (held * closes.to_numpy(float)).sum(axis=1)
+            new = np.array([d >= start and d <= yesterday for d in dates])
+            if new.any():
+                curve.merge([d.toordinal() for d in np.array(dates)[new]], values[new], invested[new])
+
+    if live_value is not None:
+        curve.merge([date.today().toordinal()], [live_value], [net_invested(market)])
+
+    try:
+        curve.save(HISTORY_FILE)
+    except OSError as e:
+        logging.error(f"History Save Error: {e}")
+    return curve
@@ -0,0 +1,128 @@
+import logging
+import threading
+import time
+
+import app_state
+import fundamentals
+import instrumentation
+import market_data
+import networking
+import portfolio_history
+import snapshots
+import stock_history
+import threading_utils
+import watchlist
+
+# --- BACKGROUND PREFETCH ---
+# Warms what each screen reads first, so the first visit renders from cache:
+#   stock       superset history and fundamentals for app.last_ticker
+#   quotes      quotes for held and watched tickers (portfolio + watchlist share them)
+#   equity      the portfolio value-history backfill (cached closes)
+#   crypto      the top-coins list in the default currency
+#   fx          the rate table for the converter's last base currency
+# One task at a time on one daemon thread. Before each task it waits until no run_bg
+# (foreground) work has run for IDLE_GRACE; tasks whose cache is still fresh or whose
+# provider's breaker is open are skipped, and tasks are spaced SPACING apart so a pass
+# stays well inside the free-tier rate limits.
+
+STARTUP_DELAY = 3     # Seconds after start before the first pass
+IDLE_GRACE = 1.0      # Foreground must have been quiet this long
+SPACING = 2.0         # Seconds between prefetch requests
+PASS_INTERVAL = 300   # Seconds between passes (stale entries only)
+STOCK_PERIOD = "1mo"  # The stock screen's default tab
+
+def _fx_base(currency):
+    if app_state.cache_store.exists("last_conversion"):
+        return app_state.cache_store.get("last_conversion").get('base', currency)
+    return currency
+
+def _warm_crypto(currency):
+    data = market_data.crypto_markets(currency, limit=10)
+    if data: snapshots.put("crypto", currency, data)
+
+def _warm_fx(base):
+    rates = market_data.fx_rates(base)
+    if rates: snapshots.put("fx", base, rates)
+
+def plan(context):
+    """[(name, provider host, fresh, run)] for one pass; context has "ticker" and "currency"."""
+    ticker, currency = context["ticker"], context["currency"]
+    crypto_currency, fx_base = currency.lower(), _fx_base(currency)
+    tickers = sorted({t['ticker'] for t in app_state.get_portfolio() if t.get('ticker')} | set(app_state.get_watchlist()))
+
+    _, fetched_at = stock_history.peek(ticker, STOCK_PERIOD)
+    _, info_at = fundamentals.cached(ticker)
+    now = time.time()
+    quotes_fresh = all(now - (watchlist.quote_age(t) or 0) < watchlist.QUOTE_TTL for t in tickers)
+    _, crypto_at = snapshots.get("crypto", crypto_currency)
+    _, fx_at = snapshots.get("fx", fx_base)
+    return [
+        ("stock", networking.YAHOO, stock_history.is_fresh(fetched_at), lambda: stock_history.get_history(ticker, STOCK_PERIOD)),
+        ("fundamentals", networking.YAHOO, snapshots.is_fresh("fundamentals", info_at), lambda: fundamentals.refresh(ticker)),
+        ("quotes", networking.YAHOO, quotes_fresh, lambda: watchlist.get_quotes(tickers)),
+        ("equity", networking.YAHOO, not tickers, lambda: portfolio_history.update_history(app_state.get_portfolio())),
+        ("crypto", "api.coingecko.com", snapshots.is_fresh("crypto", crypto_at), lambda: _warm_crypto(crypto_currency)),
+        ("fx", "open.er-api.com", snapshots.is_fresh("fx", fx_at), lambda: _warm_fx(fx_base)),
+    ]
+
+class Prefetcher:
+    def __init__(self, context, spacing=SPACING, idle_grace=IDLE_GRACE, interval=PASS_INTERVAL):
+        self.context = context  # Callable returning the current {"ticker", "currency"}
+        self.spacing = spacing
+        self.idle_grace = idle_grace
+        self.interval = interval
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def start(self, delay=STARTUP_DELAY):
+        if self.thread: return
+        self.thread = threading.Thread(target=self._loop, args=(delay,), daemon=True, name="prefetch")
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+
+    def _loop(self, delay):
+        if self.stopped.wait(delay): return
+        while True:
+            self.run_pass()
+            if self.stopped.wait(self.interval): return
+
+    def run_pass(self):
+        """Runs every stale task once; returns the names that ran."""
+        try:
+            tasks = plan(self.context())
+        except Exception as e:
+            logging.error(f"Prefetch Error: {e}")
+            return []
+        done = []
+        for name, host, fresh, run in tasks:
+            if fresh or networking.is_down(host):
+                instrumentation.count("prefetch.skip")
+                continue
+            if not self._wait_idle(): break
+            try:
+                with instrumentation.timer(f"prefetch.{name}"):
+                    run()
+                done.append(name)
+            except Exception as e:
+                logging.error(f"Prefetch {name} Error: {e}")
+            if self.stopped.wait(self.spacing): break
+        return done
+
+    def _wait_idle(self):
+        """Blocks until foreground work has been quiet for idle_grace; False if stopped meanwhile."""
+        while threading_utils.idle_for() < self.idle_grace:
+            if self.stopped.wait(0.25): return False
+        return True
+
+_prefetcher = None
+
+def start(context):
+    global _prefetcher
+    if _prefetcher is None:
+        _prefetcher = Prefetcher(context)
+        _prefetcher.start()
+
+def stop():
+    if _prefetcher is not None: _prefetcher.stop()
@@ -0,0 +1,74 @@
+import logging
+import time
+
+import pandas as pd
+
+import app_state
+import instrumentation
+import market_data
+from stock_history import DAILY_DAYS
+
+# --- SHARED CLOSE-PRICE HISTORY ---
+# Daily closes per ticker live in app_state.stock_cache as (fetched_at, series), so the
+# risk and simulation features reuse one download instead of each fetching their own.
+# Once an entry is older than CLOSE_TTL only the tail since its last close is fetched
+# (again one batch for every stale ticker) and the window is trimmed back to the period.
+
+CLOSE_TTL = 300  # Seconds before the tail is re-fetched
+
+def _key(ticker, period):
+    return f"close:{period}:{ticker}"
+
+def _extend(old, new, period):
+    """old with new appended (new wins on overlapping days), trimmed to the period window."""
+    if new is None or new.empty: return old
+    merged = pd.concat([old, new])
+    merged = merged[~merged.index.duplicated(keep='last')].sort_index()
+    days = DAILY_DAYS.get(period)
+    return merged[merged.index >= merged.index[-1] - pd.Timedelta(days=days)] if days else merged
+
+def _close_column(data, ticker, single):
+    if data is None or data.empty: return None
+    if isinstance(data.columns, pd.MultiIndex):
+        if ticker not in data.columns.get_level_values(0): return None
+        return data[ticker]['Close'].dropna()
+    return data['Close'].dropna() if single and 'Close' in data.columns else None
+
+def _download(tickers, **params):
+    try:
+        with instrumentation.timer("net.yf.download"):
+            return market_data.bars(tickers, interval="1d", group_by='ticker', progress=False, **params)
+    except Exception as e:
+        logging.error(f"History Fetch Error: {e}")
+        return None
+
+def get_closes(tickers, period="1y"):
+    """Date x ticker frame of daily closes; missing tickers are fetched in one batch, stale ones by their tail."""
+    frames, missing, stale = {}, [], []
+    now = time.time()
+    for ticker in tickers:
+        entry = app_state.stock_cache.get(_key(ticker, period))
+        if entry is None: missing.append(ticker)
+        else:
+            frames[ticker] = entry[1]
+            if now - entry[0] >= CLOSE_TTL: stale.append(ticker)
+
+    if missing:
+        data = _download(missing, period=period)
+        for ticker in missing:
+            series = _close_column(data, ticker, len(missing) == 1)
+            if series is not None and not series.empty:
+                app_state.stock_cache.set(_key(ticker, period), (now, series))
+                frames[ticker] = series
+
+    if stale:
+        # The last close may have been intraday, so the tail starts on its day
+        start = min(frames[t].index[-1] for t in stale).strftime("%Y-%m-%d")
+        data = _download(stale, start=start)
+        if data is not None:  # On failure the old series are kept and retried next call
+            for ticker in stale:
+                frames[ticker] = _extend(frames[ticker], _close_column(data, ticker, len(stale) == 1), period)
+                app_state.stock_cache.set(_key(ticker, period), (now, frames[ticker]))
+
+    if not frames: return pd.DataFrame()
+    return pd.DataFrame(frames).sort_index().ffill().dropna()
@@ -0,0 +1,159 @@
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+
+import instrumentation
+
+# --- SLOW-OPERATION SAMPLING PROFILER ---
+# While enabled, every instrumented operation is stack-sampled from a helper thread.
+# If it finishes under the threshold the samples are dropped; otherwise they are
+# written as a speedscope file (https://www.speedscope.app) under <base_dir>/profiles.
+
+THRESHOLD_MS = 500
+INTERVAL_MS = 5
+MAX_SAMPLES = 20000   # Per capture, caps memory for runaway operations
+MAX_DEPTH = 128
+MAX_FILES = 20
+MAX_BYTES = 20 * 1024 * 1024
+
+class _Capture:
+    __slots__ = ("name", "start", "depth", "samples")
+
+    def __init__(self, name):
+        self.name = name
+        self.start = time.perf_counter()
+        self.depth = 0
+        self.samples = []
+
+def _stack(frame):
+    """Root-first tuple of (function, file, first line) keys for one thread."""
+    stack = []
+    while frame is not None and len(stack) < MAX_DEPTH:
+        code = frame.f_code
+        stack.append((code.co_name, code.co_filename, code.co_firstlineno))
+        frame = frame.f_back
+    stack.reverse()
+    return tuple(stack)
+
+class SamplingProfiler:
+    def __init__(self, out_dir, threshold_ms=THRESHOLD_MS, interval_ms=INTERVAL_MS):
+        self.out_dir = out_dir
+        self.threshold_ms = threshold_ms
+        self.interval = interval_ms / 1000
+        self.active = {}  # thread id -> _Capture (outermost operation only)
+        self.running = False
+        self.wake = threading.Event()
+
+    def start(self):
+        if self.running: return
+        self.running = True
+        instrumentation.add_listener(self)
+        threading.Thread(target=self._sample_loop, daemon=True).start()
+
+    def stop(self):
+        self.running = False
+        instrumentation.remove_listener(self)
+        self.active.clear()
+        self.wake.set()
+
+    # --- instrumentation listener ---
+    def on_start(self, name):
+        tid = threading.get_ident()
+        cap = self.active.get(tid)
+        if cap:
+            cap.depth += 1
+            return
+        self.active[tid] = _Capture(name)
+        self.wake.set()
+
+    def on_stop(self, name, ms):
+        tid = threading.get_ident()
+        cap = self.active.get(tid)
+        if cap is None: return
+        if cap.depth:
+            cap.depth -= 1
+            return
+        del self.active[tid]
+        if ms >= self.threshold_ms and cap.samples:
+            threading.Thread(target=self._write, args=(cap, ms), daemon=True).start()
+
+    def _sample_loop(self):
+        me = threading.get_ident()
+        while self.running:
+            if not self.active:
+                self.wake.wait(1.0)
+                self.wake.clear()
+                continue
+            time.sleep(self.interval)
+            frames = sys._current_frames()
+            now = time.perf_counter()
+            for tid, cap in list(self.active.items()):
+                frame = frames.get(tid)
+                if tid != me and frame is not None and len(cap.samples) < MAX_SAMPLES:
+                    cap.samples.append((now, _stack(frame)))
+
+    # --- OUTPUT ---
+    def _write(self, cap, ms):
+        try:
+            os.makedirs(self.out_dir, exist_ok=True)
+            stamp = datetime.now().strftime('%Y%m%d_%H%M%S_%f')
+            path = os.path.join(self.out_dir, f"{cap.name}_{stamp}.speedscope.json")
+            with open(path, "w") as f:
+                json.dump(to_speedscope(cap, ms), f)
+            logging.info(f"PROFILE -> {path} ({ms:.0f}ms)")
+            prune(self.out_dir)
+        except Exception as e:
+            logging.error(f"Profile Write Error: {e}")
+
+def to_speedscope(cap, ms):
+    frame_index, frames = {}, []
+    samples, weights = [], []
+    prev = cap.start
+    for ts, stack in cap.samples:
+        ids = []
+        for key in stack:
+            idx = frame_index.get(key)
+            if idx is None:
+                idx = frame_index[key] = len(frames)
+                frames.append({"name": key[0], "file": key[1], "line": key[2]})
+            ids.append(idx)
+        samples.append(ids)
+        weights.append((ts - prev) * 1000)
+        prev = ts
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "name": f"{cap.name} ({ms:.0f}ms)",
+        "exporter": "fincalc-profiler",
+        "shared": {"frames": frames},
+        "profiles": [{
+            "type": "sampled", "name": cap.name, "unit": "milliseconds",
+            "startValue": 0, "endValue": sum(weights),
+            "samples": samples, "weights": weights,
+        }],
+    }
+
+def prune(out_dir, max_files=MAX_FILES, max_bytes=MAX_BYTES):
+    """Deletes the oldest traces until the directory is within both limits."""
+    files = [os.path.join(out_dir, f) for f in os.listdir(out_dir) if f.endswith(".speedscope.json")]
+    files.sort(key=os.path.getmtime)
+    total = sum(os.path.getsize(f) for f in files)
+    while files and (len(files) > max_files or total > max_bytes):
+        oldest = files.pop(0)
+        total -= os.path.getsize(oldest)
+        os.remove(oldest)
+
+# --- MODULE SINGLETON ---
+_profiler = None
+
+def set_enabled(value, out_dir):
+    global _profiler
+    if value and _profiler is None:
+        _profiler = SamplingProfiler(out_dir)
+        _profiler.start()
+    elif not value and _profiler is not None:
+        _profiler.stop()
+        _profiler = None
@@ -1,8 +1,10 @@
 import math
-import re
+import io
 import logging
-import ast
-import operator
+import os
+from datetime import datetime
+
+import numpy as np
 
 from kivymd.app import MDApp
 from kivymd.uix.screen import MDScreen
@@ -13,40 +15,33 @@ from kivymd.uix.boxlayout import MDBoxLayout
 from kivymd.uix.textfield import MDTextField
 from kivymd.toast import toast
 from kivy.uix.widget import Widget
+from kivy.core.image import Image as CoreImage
 from kivy.properties import ObjectProperty
 
+from fincalc import formulas, amortization, compute, money, sensitivity
+from fincalc.charts import render_sensitivity_chart
+from threading_utils import run_bg, ui
+from fincalc.expression import TooComplexError, parse as parse_expression, safe_eval_node
+import instrumentation
+
 # --- SAFE IMPORTS ---
 try:
     import app_state  # Required for history persistence
 except ImportError:
     app_state = None
 
-# --- LIMITS TO PREVENT HANGS ---
-MAX_POWER = 10000  # Prevents 9^9^9^9
-MAX_NODES = 500    # Prevents deeply nested equations
-MAX_RESULT = 1e100 # Prevents memory overflow
-
-# --- PHASE 3.3: Safe Math Operators (HARDENED) ---
-SAFE_OPERATORS = {
-    ast.Add: operator.add,
-    ast.Sub: operator.sub,
-    ast.Mult: operator.mul,
-    ast.Div: operator.truediv,
-    ast.Pow: operator.pow,
-    ast.USub: operator.neg,
-    ast.UAdd: operator.pos,
-}
-
-SAFE_FUNCTIONS = {
-    'sqrt': math.sqrt,
-    'log': math.log,
-    'ln': math.log,
-    'exp': math.exp,
-    'abs': abs,
-    'sin': math.sin,
-    'cos': math.cos,
-    'tan': math.tan,
-}
+AMORT_PAGE_SIZE = 120  # Schedule rows handed to the RecycleView per scroll page
+SENS_MAX_STEPS = 200   # Per axis; 200x200 still evaluates in a few ms
+HISTORY_RESULTS = 100  # Matches listed by the history search
+
+class AmortizationContent(MDBoxLayout):
+    pass
+
+class SensitivityContent(MDBoxLayout):
+    pass
+
+class HistoryContent(MDBoxLayout):
+    pass
 
 class CalculatorScreen(MDScreen):
     display_text = ObjectProperty(None)
@@ -69,59 +64,7 @@ class CalculatorScreen(MDScreen):
 
     def safe_eval_node(self, node, depth=0):
         """Recursive evaluator with safety guards and complexity limits."""
-        if depth > 100: 
-            raise ValueError("Expression too complex")
-        
-        # Numbers / Constants
-        if isinstance(node, (ast.Constant, ast.Num)):
-            val = node.value if isinstance(node, ast.Constant) else node.n
-            if isinstance(val, (int, float)): return val
-            raise ValueError("Unsupported constant type")
-            
-        # Binary Operations (1 + 1, 9 ^ 9)
-        elif isinstance(node, ast.BinOp):
-            op_type = type(node.op)
-            if op_type not in SAFE_OPERATORS:
-                raise ValueError("Unsupported operator")
-            
-            left = self.safe_eval_node(node.left, depth + 1)
-            right = self.safe_eval_node(node.right, depth + 1)
-            
-            # --- CRITICAL HANG PREVENTER: Power Guard ---
-            if op_type == ast.Pow:
-                if right > MAX_POWER or (abs(left) > 1 and right > 500):
-                    raise OverflowError("Power too large")
-            
-            result = SAFE_OPERATORS[op_type](left, right)
-            
-            # Prevent memory overflow from massive results
-            if isinstance(result, (int, float)) and abs(result) > MAX_RESULT:
-                raise OverflowError("Result too large")
-            return result
-
-        # Unary Operations (-5, +5)
-        elif isinstance(node, ast.UnaryOp):
-            op_type = type(node.op)
-            if op_type not in SAFE_OPERATORS:
-                raise ValueError("Unsupported unary operator")
-            return SAFE_OPERATORS[op_type](self.safe_eval_node(node.operand, depth + 1))
-
-        # Functions (sqrt, sin, etc)
-        elif isinstance(node, ast.Call):
-            if not isinstance(node.func, ast.Name): 
-                raise ValueError("Simple functions only")
-            
-            func_name = node.func.id
-            if func_name not in SAFE_FUNCTIONS: 
-                raise ValueError(f"Unknown function: {func_name}")
-            
-            if len(node.args) != 1: 
-                raise ValueError("One argument required")
-                
-            arg = self.safe_eval_node(node.args[0], depth + 1)
-            return SAFE_FUNCTIONS[func_name](arg)
-
-        raise ValueError("Unsafe syntax detected")
+        return safe_eval_node(node, depth)
 
     # --- UI & NAVIGATION ---
     def move_cursor(self, direction):
@@ -154,6 +97,30 @@ class CalculatorScreen(MDScreen):
         if self.history_index != -1:
             self.display_text.text = self.history_list[self.history_index]
 
+    def show_history_search(self):
+        if not app_state: return
+        content = HistoryContent()
+        self.hist_rv, self.hist_summary = content.ids.hist_rv, content.ids.hist_summary
+        content.ids.hist_query.bind(text=lambda field, text: self.search_history(text))
+        self.search_history("")
+        self.dialog = MDDialog(
+            title="History", type="custom", content_cls=content,
+            buttons=[MDFlatButton(text="CLOSE", on_release=lambda x: self.dialog.dismiss())]
+        )
+        self.dialog.open()
+
+    def search_history(self, query):
+        history = app_state.get_calc_history()
+        with instrumentation.timer("op.history_search"):
+            matches = history.search(query, HISTORY_RESULTS)
+        self.hist_summary.text = f"{len(matches)} of {len(history)} entries"
+        self.hist_rv.data = [{"text": e, "on_release": lambda e=e: self.use_history_entry(e)} for e in matches]
+
+    def use_history_entry(self, expression):
+        self.dialog.dismiss()
+        self.display_text.text = expression
+        self.history_index = -1
+
     def add_to_display(self, value):
         if self.display_text.text in ["Error", "Syntax Error", "Too Large", "Div by 0", "Overflow"]:
             self.display_text.text = ""
@@ -177,6 +144,7 @@ class CalculatorScreen(MDScreen):
         self.display_text.text = ""
         self.history_index = -1
 
+    @instrumentation.timed("op.calculate")
     def calculate_result(self, *args):
         raw = self.display_text.text.strip()
         if not raw or raw == "0": 
@@ -184,29 +152,8 @@ class CalculatorScreen(MDScreen):
             return
 
         try:
-            # --- 1. CLEANING & IMPLICIT MULTIPLICATION ---
-            # Handles (9)(9), 9π, 9√, 9(5)
-            clean = re.sub(r'(\d)([√π\(])', r'\1*\2', raw)
-            clean = re.sub(r'(\))(\d)', r'\1*\2', clean)
-            clean = re.sub(r'(\))(\()', r'\1*\2', clean)
-            
-            clean = clean.replace("×", "*").replace("÷", "/")
-            clean = clean.replace("^", "**")
-            clean = clean.replace("√", "sqrt(")
-            clean = clean.replace("π", str(math.pi))
-            clean = clean.replace("e", str(math.e))
-
-            # Auto-balance parentheses
-            open_c, close_c = clean.count("("), clean.count(")")
-            if open_c > close_c: clean += ")" * (open_c - close_c)
-
-            # --- 2. SECURITY & MAGNITUDE CHECK ---
-            tree = ast.parse(clean, mode='eval')
-            
-            # Check node complexity
-            if sum(1 for _ in ast.walk(tree)) > MAX_NODES:
-                self.display_text.text = "Too Complex"
-                return
+            # --- 1-2. CLEANING, IMPLICIT MULTIPLICATION & COMPLEXITY CHECK ---
+            tree = parse_expression(raw)
 
             # --- 3. EVALUATE ---
             
@@ -225,9 +172,10 @@ class CalculatorScreen(MDScreen):
                     self.display_text.text = f"{res:.10g}"
             
             if app_state:
+                # history_list is the live ring buffer, so there is nothing to read back
                 app_state.save_calc_history(raw)
-                self.history_list = app_state.get_calc_history()
 
+        except TooComplexError: self.display_text.text = "Too Complex"
         except OverflowError: self.display_text.text = "Overflow"
         except ZeroDivisionError: self.display_text.text = "Div by 0"
         except Exception as e:
@@ -240,7 +188,8 @@ class CalculatorScreen(MDScreen):
             ("Option Pricing", "bs"), ("Net Present Value", "npv"), 
             ("Compound Interest", "compound"), ("CAPM", "capm"), 
             ("Loan (PMT)", "pmt"), ("Growth (CAGR)", "cagr"), 
-            ("ROI", "roi"), ("Break-Even", "breakeven"), ("Quadratic", "quad")
+            ("ROI", "roi"), ("Break-Even", "breakeven"), ("Quadratic", "quad"),
+            ("Amortization", "amort"), ("Exotic Option (MC)", "mc")
         ]
         menu_items = [{"text": i[0], "viewclass": "OneLineListItem", "on_release": lambda x=i[1]: self.menu_callback(x)} for i in items]
         self.menu = MDDropdownMenu(caller=self.ids.function_btn, items=menu_items, width_mult=4)
@@ -253,7 +202,8 @@ class CalculatorScreen(MDScreen):
             "compound": self.show_compound_popup, "capm": self.show_capm_popup, 
             "pmt": self.show_pmt_popup, "cagr": self.show_cagr_popup, 
             "roi": self.show_roi_popup, "breakeven": self.show_breakeven_popup, 
-            "quad": self.show_quad_popup
+            "quad": self.show_quad_popup, "amort": self.show_amort_popup,
+            "mc": self.show_mc_popup
         }
         if t in menu_map: menu_map[t]()
 
@@ -288,30 +238,143 @@ class CalculatorScreen(MDScreen):
             else: f.error = False
         return valid
         
-    def create_popup(self, title, widgets, callback):
+    def create_popup(self, title, widgets, callback, sensitivity=None):
         content = MDBoxLayout(orientation="vertical", spacing="15dp", adaptive_height=True, padding=[0, "10dp", 0, 0])
         content.add_widget(Widget(size_hint_y=None, height="10dp"))
         for w in widgets: content.add_widget(w)
+        buttons = [MDFlatButton(text="CANCEL", on_release=lambda x: self.dialog.dismiss())]
+        # sensitivity: callable returning (formula name, [(label, field, param, scale), ...], result scale)
+        if sensitivity:
+            buttons.append(MDFlatButton(text="TABLE", on_release=lambda x: self.show_sensitivity_popup(title, *sensitivity())))
+        buttons.append(MDFlatButton(text="CALCULATE", on_release=callback))
+        self.dialog = MDDialog(title=title, type="custom", content_cls=content, buttons=buttons)
+        self.dialog.open()
+
+    def money_result(self, value):
+        """A dollar result as shown: rounded half-even to the cent in exact mode, unchanged otherwise."""
+        if app_state and app_state.money_mode == money.EXACT: return money.round_money(value)
+        return value
+
+    def years_scale(self, unit_btn):
+        return 1 / 12.0 if unit_btn.text == "Months" else 1.0
+
+    def months_scale(self, unit_btn):
+        return 12.0 if unit_btn.text == "Years" else 1.0
+
+    # --- SENSITIVITY TABLES (see fincalc/sensitivity.py) ---
+    def show_sensitivity_popup(self, title, formula, fields, result_scale=1.0):
+        self.dialog.dismiss()
+        self.sens_formula, self.sens_fields, self.sens_scale = formula, fields, result_scale
+        self.sens_x, self.sens_y = fields[0], None
+
+        def axis_row(label, hint):
+            layout = MDBoxLayout(orientation='horizontal', spacing="10dp", size_hint_y=None, height="65dp")
+            btn = MDRectangleFlatButton(text=label, size_hint_x=0.4, pos_hint={'center_y': 0.6})
+            lo, hi = self.create_textfield(f"{hint} From"), self.create_textfield(f"{hint} To")
+            for w in (btn, lo, hi): layout.add_widget(w)
+            return layout, btn, lo, hi
+
+        x_layout, self.sens_x_btn, self.sens_x_lo, self.sens_x_hi = axis_row(fields[0][0], "X")
+        y_layout, self.sens_y_btn, self.sens_y_lo, self.sens_y_hi = axis_row("None", "Y")
+        self.sens_steps = self.create_textfield(f"Steps per axis (max {SENS_MAX_STEPS})", "25")
+
+        def pick(axis, spec):
+            if axis == "x":
+                self.sens_x = spec; self.sens_x_btn.text = spec[0]
+            else:
+                self.sens_y = spec; self.sens_y_btn.text = spec[0] if spec else "None"
+            self.sens_menu.dismiss()
+
+        def open_menu(axis, caller):
+            items = [{"text": s[0], "on_release": lambda s=s: pick(axis, s)} for s in fields]
+            if axis == "y": items.insert(0, {"text": "None", "on_release": lambda: pick("y", None)})
+            self.sens_menu = MDDropdownMenu(caller=caller, items=items, width_mult=3)
+            self.sens_menu.open()
+
+        self.sens_x_btn.bind(on_release=lambda x: open_menu("x", self.sens_x_btn))
+        self.sens_y_btn.bind(on_release=lambda x: open_menu("y", self.sens_y_btn))
+
+        content = MDBoxLayout(orientation="vertical", spacing="15dp", adaptive_height=True, padding=[0, "10dp", 0, 0])
+        for w in (x_layout, y_layout, self.sens_steps): content.add_widget(w)
         self.dialog = MDDialog(
-            title=title, type="custom", content_cls=content, 
+            title=f"{title} Sensitivity", type="custom", content_cls=content,
             buttons=[
-                MDFlatButton(text="CANCEL", on_release=lambda x: self.dialog.dismiss()), 
-                MDFlatButton(text="CALCULATE", on_release=callback)
+                MDFlatButton(text="CANCEL", on_release=lambda x: self.dialog.dismiss()),
+                MDFlatButton(text="RUN", on_release=self.run_sensitivity)
             ]
         )
         self.dialog.open()
 
-    # --- MATH CORE ---
+    def run_sensitivity(self, inst):
+        x, y = self.sens_x, self.sens_y
+        if y is x: y = None
+        swept = [x] + ([y] if y else [])
+        required = [self.sens_x_lo, self.sens_x_hi, self.sens_steps] + ([self.sens_y_lo, self.sens_y_hi] if y else [])
+        # Inputs left fixed still come from the formula popup
+        required += [spec[1] for spec in self.sens_fields if spec not in swept]
+        if not self.validate_inputs(required): return
+        try:
+            steps = max(2, min(SENS_MAX_STEPS, int(float(self.sens_steps.text))))
+            base = {spec[2]: float(spec[1].text) * spec[3] for spec in self.sens_fields if spec not in swept}
+            xs = np.linspace(float(self.sens_x_lo.text), float(self.sens_x_hi.text), steps)
+            ys = np.linspace(float(self.sens_y_lo.text), float(self.sens_y_hi.text), steps) if y else None
+            with instrumentation.timer("op.sensitivity"):
+                values = sensitivity.grid(
+                    self.sens_formula, base, x[2], xs * x[3],
+                    y[2] if y else None, ys * y[3] if y else None
+                ) * self.sens_scale
+            # Axes stay in the units the user typed (%, years/months), not formula units
+            self.sens_result = (x[0], xs, y[0] if y else "", ys, values)
+            self.sens_rows = sensitivity.table_rows(xs, values, ys)
+            self.dialog.dismiss()
+            self.show_sensitivity_table()
+        except Exception as e:
+            logging.error(f"Sensitivity Error: {e}")
+            self.display_text.text = "Error"
+
+    def show_sensitivity_table(self):
+        x_label, xs, y_label, ys, values = self.sens_result
+        content = SensitivityContent()
+        finite = values[np.isfinite(values)]
+        content.ids.sens_summary.text = (
+            f"{values.size} cells | Min {finite.min():,.4g} | Max {finite.max():,.4g}" if finite.size else "No defined values"
+        )
+        content.ids.sens_header.text = f"{x_label[:14]:>14} {y_label[:14]:>14} {'Result':>14}"
+        self.sens_rv = content.ids.sens_rv
+        self.sens_rv.data = []
+        self.load_sensitivity_page()
+        self.sens_rv.bind(scroll_y=self.on_sensitivity_scroll)
+        self.dialog = MDDialog(
+            title="Sensitivity", type="custom", content_cls=content,
+            buttons=[MDFlatButton(text="CLOSE", on_release=lambda x: self.dialog.dismiss())]
+        )
+        self.dialog.open()
+
+        app = MDApp.get_running_app()
+        text_color = "white" if app.theme_cls.theme_style == "Dark" else "black"
+        image = content.ids.sens_image
+
+        def render():
+            png = render_sensitivity_chart(xs, values, x_label, ys, y_label, text_color)
+            if png: ui(setattr, image, "texture", CoreImage(io.BytesIO(png), ext="png").texture)
+        run_bg(render)
+
+    def load_sensitivity_page(self):
+        start = len(self.sens_rv.data)
+        self.sens_rv.data.extend({
+            "text": f"{x:>14,.4g} {'' if y is None else format(y, '>14,.4g'):>14} {v:>14,.4f}"
+        } for x, y, v in self.sens_rows[start:start + AMORT_PAGE_SIZE])
+
+    def on_sensitivity_scroll(self, rv, scroll_y):
+        if scroll_y <= 0.05 and len(rv.data) < len(self.sens_rows):
+            self.load_sensitivity_page()
+
+    # --- MATH CORE (see fincalc/formulas.py) ---
     def norm_cdf(self, x):
-        return (1.0 + math.erf(x / math.sqrt(2.0))) / 2.0
+        return formulas.norm_cdf(x)
 
     def calculate_black_scholes(self, S, K, T, r, sigma, opt_type):
-        if T <= 0 or sigma <= 0: return 0.0
-        d1 = (math.log(S / K) + (r + 0.5 * sigma ** 2) * T) / (sigma * math.sqrt(T))
-        d2 = d1 - sigma * math.sqrt(T)
-        if opt_type == "call":
-            return S * self.norm_cdf(d1) - K * math.exp(-r * T) * self.norm_cdf(d2)
-        return K * math.exp(-r * T) * self.norm_cdf(-d2) - S * self.norm_cdf(-d1)
+        return formulas.black_scholes(S, K, T, r, sigma, opt_type)
 
     def show_bs_popup(self):
         app = MDApp.get_running_app()
@@ -319,7 +382,10 @@ class CalculatorScreen(MDScreen):
         self.bs_v = self.create_textfield("Volatility % (e.g. 20)")
         self.bs_r = self.create_textfield("Risk-Free Rate %", str(app.default_rf))
         t_layout, self.bs_t, self.bs_unit = self.create_time_widget()
-        self.create_popup("Black-Scholes", [self.bs_S, self.bs_K, self.bs_v, self.bs_r, t_layout], self.run_bs_calc)
+        self.create_popup("Black-Scholes", [self.bs_S, self.bs_K, self.bs_v, self.bs_r, t_layout], self.run_bs_calc, lambda: ("bs_call", [
+            ("Stock Price", self.bs_S, "S", 1.0), ("Strike", self.bs_K, "K", 1.0), ("Vol %", self.bs_v, "sigma", 0.01),
+            ("Rate %", self.bs_r, "r", 0.01), ("Duration", self.bs_t, "T", self.years_scale(self.bs_unit))
+        ], 1.0))
     
     def run_bs_calc(self, inst):
         if not self.validate_inputs([self.bs_S, self.bs_K, self.bs_v, self.bs_r, self.bs_t]): return
@@ -332,44 +398,92 @@ class CalculatorScreen(MDScreen):
             self.dialog.dismiss()
         except: self.display_text.text = "Input Error"
 
+    def show_mc_popup(self):
+        app = MDApp.get_running_app()
+        self.mc_S, self.mc_K = self.create_textfield("Stock Price"), self.create_textfield("Strike Price")
+        self.mc_v = self.create_textfield("Volatility % (e.g. 20)")
+        self.mc_r = self.create_textfield("Risk-Free Rate %", str(app.default_rf))
+        t_layout, self.mc_t, self.mc_unit = self.create_time_widget()
+        self.mc_b = self.create_textfield("Up-and-Out Barrier (optional)")
+        self.create_popup("Asian / Barrier (Monte Carlo)", [self.mc_S, self.mc_K, self.mc_v, self.mc_r, t_layout, self.mc_b], self.run_mc_calc)
+
+    def run_mc_calc(self, inst):
+        if not self.validate_inputs([self.mc_S, self.mc_K, self.mc_v, self.mc_r, self.mc_t]): return
+        try:
+            S, K, v, r, t = float(self.mc_S.text), float(self.mc_K.text), float(self.mc_v.text)/100, float(self.mc_r.text)/100, float(self.mc_t.text)
+            if self.mc_unit.text == "Months": t /= 12.0
+            barrier = float(self.mc_b.text) if self.mc_b.text else None
+            self.display_text.text = "Simulating..."
+            self.dialog.dismiss()
+            run_bg(self.price_mc_options, S, K, t, r, v, barrier)
+        except: self.display_text.text = "Input Error"
+
+    def price_mc_options(self, S, K, T, r, sigma, barrier):
+        # Path chunks run on the shared process pool; progress is shown in the display
+        service = compute.get_service()
+        kinds = ["up_out_call"] if barrier else ["asian_call", "asian_put"]
+
+        def progress(i):
+            return lambda done, total: ui(setattr, self.display_text, "text",
+                                          f"Simulating... {(i + done / total) / len(kinds):.0%}")
+        try:
+            res = [service.price_option(S, K, T, r, sigma, kind, barrier=barrier, progress=progress(i))
+                   for i, kind in enumerate(kinds)]
+            if barrier:
+                text = f"UO Call:${res[0]['price']:.2f}"
+            else:
+                text = f"AC:${res[0]['price']:.2f} AP:${res[1]['price']:.2f}"
+        except Exception as e:
+            logging.error(f"MC Error: {e}")
+            text = "Error"
+        ui(setattr, self.display_text, "text", text)
+
     def show_compound_popup(self):
         self.cp_p, self.cp_r = self.create_textfield("Principal"), self.create_textfield("Annual Rate %")
         t_layout, self.cp_t, self.cp_u = self.create_time_widget()
-        self.create_popup("Compound Interest", [self.cp_p, self.cp_r, t_layout], self.run_cp_calc)
+        self.create_popup("Compound Interest", [self.cp_p, self.cp_r, t_layout], self.run_cp_calc, lambda: ("compound", [
+            ("Principal", self.cp_p, "principal", 1.0), ("Rate %", self.cp_r, "rate", 0.01),
+            ("Duration", self.cp_t, "years", self.years_scale(self.cp_u))
+        ], 1.0))
 
     def run_cp_calc(self, inst):
         if not self.validate_inputs([self.cp_p, self.cp_r, self.cp_t]): return
         try:
             p, r, t = float(self.cp_p.text), float(self.cp_r.text)/100, float(self.cp_t.text)
             if self.cp_u.text == "Months": t /= 12.0
-            res = p * (1 + r)**t
-            self.display_text.text = f"${res:,.2f}"
+            res = formulas.compound_interest(p, r, t)
+            self.display_text.text = money.fmt(self.money_result(res), symbol="$")
             self.dialog.dismiss()
         except: self.display_text.text = "Input Error"
 
     def show_capm_popup(self):
         app = MDApp.get_running_app()
-        self.c_rf, self.c_b, self.c_rm = self.create_textfield("Risk-Free %", str(app.default_rf)), self.create_textfield("Beta"), self.create_textfield("Market Return %")
-        self.create_popup("CAPM", [self.c_rf, self.c_b, self.c_rm], self.run_capm_calc)
+        beta = round(app_state.portfolio_beta, 2) if app_state and app_state.portfolio_beta is not None else ""
+        self.c_rf, self.c_b, self.c_rm = self.create_textfield("Risk-Free %", str(app.default_rf)), self.create_textfield("Beta", beta), self.create_textfield("Market Return %")
+        self.create_popup("CAPM", [self.c_rf, self.c_b, self.c_rm], self.run_capm_calc, lambda: ("capm", [
+            ("Risk-Free %", self.c_rf, "rf", 1.0), ("Beta", self.c_b, "beta", 1.0), ("Market %", self.c_rm, "market_return", 1.0)
+        ], 1.0))
 
     def run_capm_calc(self, inst):
         if not self.validate_inputs([self.c_rf, self.c_b, self.c_rm]): return
         try:
             rf, b, rm = float(self.c_rf.text), float(self.c_b.text), float(self.c_rm.text)
-            res = rf + b * (rm - rf)
+            res = formulas.capm(rf, b, rm)
             self.display_text.text = f"{res:.2f}%"
             self.dialog.dismiss()
         except: self.display_text.text = "Input Error"
 
     def show_breakeven_popup(self):
         self.be_f, self.be_p, self.be_v = self.create_textfield("Fixed Costs"), self.create_textfield("Price Per Unit"), self.create_textfield("Var Cost Per Unit")
-        self.create_popup("Break-Even", [self.be_f, self.be_p, self.be_v], self.run_be_calc)
+        self.create_popup("Break-Even", [self.be_f, self.be_p, self.be_v], self.run_be_calc, lambda: ("breakeven", [
+            ("Fixed Costs", self.be_f, "fixed_costs", 1.0), ("Price", self.be_p, "price", 1.0), ("Var Cost", self.be_v, "variable_cost", 1.0)
+        ], 1.0))
 
     def run_be_calc(self, inst):
         if not self.validate_inputs([self.be_f, self.be_p, self.be_v]): return
         try:
             f, p, v = float(self.be_f.text), float(self.be_p.text), float(self.be_v.text)
-            res = int(f / (p - v))
+            res = int(formulas.break_even(f, p, v))
             self.display_text.text = f"{res} Units"
             self.dialog.dismiss()
         except: self.display_text.text = "Input Error"
@@ -382,24 +496,24 @@ class CalculatorScreen(MDScreen):
         if not self.validate_inputs([self.qa, self.qb, self.qc]): return
         try:
             a, b, c = float(self.qa.text), float(self.qb.text), float(self.qc.text)
-            d = b**2 - 4*a*c
-            if d < 0: self.display_text.text = "Complex Sol"
-            else:
-                x1 = (-b + math.sqrt(d)) / (2*a)
-                x2 = (-b - math.sqrt(d)) / (2*a)
+            try:
+                x1, x2 = formulas.quadratic_roots(a, b, c)
                 self.display_text.text = f"{x1:.2f}, {x2:.2f}"
+            except ValueError: self.display_text.text = "Complex Sol"
             self.dialog.dismiss()
         except: self.display_text.text = "Error"
 
     def show_roi_popup(self):
         self.ri_c, self.ri_g = self.create_textfield("Cost"), self.create_textfield("Gain")
-        self.create_popup("ROI", [self.ri_c, self.ri_g], self.run_roi_calc)
+        self.create_popup("ROI", [self.ri_c, self.ri_g], self.run_roi_calc, lambda: ("roi", [
+            ("Cost", self.ri_c, "cost", 1.0), ("Gain", self.ri_g, "gain", 1.0)
+        ], 100.0))
 
     def run_roi_calc(self, inst):
         if not self.validate_inputs([self.ri_c, self.ri_g]): return
         try:
             c, g = float(self.ri_c.text), float(self.ri_g.text)
-            res = ((g - c) / c) * 100
+            res = formulas.roi(c, g) * 100
             self.display_text.text = f"{res:.2f}%"
             self.dialog.dismiss()
         except: self.display_text.text = "Error"
@@ -407,29 +521,103 @@ class CalculatorScreen(MDScreen):
     def show_pmt_popup(self):
         self.pm_l, self.pm_r = self.create_textfield("Loan Principal"), self.create_textfield("Annual Rate %")
         t_layout, self.pm_t, self.pm_u = self.create_time_widget()
-        self.create_popup("Loan PMT", [self.pm_l, self.pm_r, t_layout], self.run_pmt_calc)
+        self.create_popup("Loan PMT", [self.pm_l, self.pm_r, t_layout], self.run_pmt_calc, lambda: ("pmt", [
+            ("Principal", self.pm_l, "principal", 1.0), ("Rate %", self.pm_r, "annual_rate", 0.01),
+            ("Duration", self.pm_t, "months", self.months_scale(self.pm_u))
+        ], 1.0))
 
     def run_pmt_calc(self, inst):
         if not self.validate_inputs([self.pm_l, self.pm_r, self.pm_t]): return
         try:
-            p, r, t = float(self.pm_l.text), (float(self.pm_r.text)/100)/12, float(self.pm_t.text)
+            p, r, t = float(self.pm_l.text), float(self.pm_r.text)/100, float(self.pm_t.text)
             n = t * 12 if self.pm_u.text == "Years" else t
-            res = p * (r * (1 + r)**n) / ((1 + r)**n - 1) if r > 0 else p/n
-            self.display_text.text = f"${res:.2f}/mo"
+            res = formulas.loan_payment(p, r, n)
+            self.display_text.text = f"{money.fmt(self.money_result(res), symbol='$')}/mo"
+            self.dialog.dismiss()
+        except: self.display_text.text = "Error"
+
+    def show_amort_popup(self):
+        self.am_l, self.am_r = self.create_textfield("Loan Principal"), self.create_textfield("Annual Rate %")
+        t_layout, self.am_t, self.am_u = self.create_time_widget()
+        self.am_x = self.create_textfield("Extra Payment / mo (optional)")
+        self.am_reset_at = self.create_textfield("Rate Reset After N Months (optional)")
+        self.am_reset_r = self.create_textfield("Reset Rate % (optional)")
+        self.create_popup("Amortization", [self.am_l, self.am_r, t_layout, self.am_x, self.am_reset_at, self.am_reset_r], self.run_amort_calc)
+
+    def run_amort_calc(self, inst):
+        if not self.validate_inputs([self.am_l, self.am_r, self.am_t]): return
+        try:
+            p, r, t = float(self.am_l.text), float(self.am_r.text)/100, float(self.am_t.text)
+            n = int(t * 12 if self.am_u.text == "Years" else t)
+            extra = float(self.am_x.text or 0)
+            resets = None
+            if self.am_reset_at.text and self.am_reset_r.text:
+                resets = {int(float(self.am_reset_at.text)) + 1: float(self.am_reset_r.text)/100}
+            self.amort_sched = amortization.schedule(p, r, n, extra=extra, rate_resets=resets)
+            info = amortization.summary(self.amort_sched)
+            self.display_text.text = f"${info['payment']:.2f}/mo"
             self.dialog.dismiss()
+            self.show_amort_schedule(info)
         except: self.display_text.text = "Error"
 
+    def show_amort_schedule(self, info):
+        content = AmortizationContent()
+        content.ids.amort_summary.text = (
+            f"{info['periods']} payments | Interest ${info['total_interest']:,.2f} | Total ${info['total_paid']:,.2f}"
+        )
+        self.amort_rv = content.ids.amort_rv
+        self.amort_rv.data = []
+        self.load_amort_page()
+        self.amort_rv.bind(scroll_y=self.on_amort_scroll)
+        self.dialog = MDDialog(
+            title="Amortization Schedule", type="custom", content_cls=content,
+            buttons=[
+                MDFlatButton(text="EXPORT CSV", on_release=lambda x: self.export_amort_csv()),
+                MDFlatButton(text="CLOSE", on_release=lambda x: self.dialog.dismiss())
+            ]
+        )
+        self.dialog.open()
+
+    def load_amort_page(self):
+        start = len(self.amort_rv.data)
+        rows = amortization.page(self.amort_sched, start, AMORT_PAGE_SIZE)
+        self.amort_rv.data.extend({
+            "text": f"{r['period']:>4} {r['payment']:>10,.2f} {r['principal']:>10,.2f} {r['interest']:>9,.2f} {r['balance']:>12,.2f}"
+        } for r in rows)
+
+    def on_amort_scroll(self, rv, scroll_y):
+        # Near the bottom: pull in the next page (RecycleView only builds visible rows)
+        if scroll_y <= 0.05 and len(rv.data) < len(self.amort_sched["period"]):
+            self.load_amort_page()
+
+    def export_amort_csv(self):
+        sched = self.amort_sched
+        filename = f"amortization_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+
+        def write():
+            try:
+                with open(os.path.join(app_state.base_dir, filename), "w", newline="") as f:
+                    amortization.write_csv(sched, f)
+                ui(toast, f"Exported to {filename}")
+            except Exception as e:
+                logging.error(f"Export Error: {e}")
+                ui(toast, "Export Failed")
+        run_bg(write)
+
     def show_cagr_popup(self):
         self.cg_s, self.cg_e = self.create_textfield("Initial Value"), self.create_textfield("Final Value")
         t_layout, self.cg_t, self.cg_u = self.create_time_widget()
-        self.create_popup("CAGR", [self.cg_s, self.cg_e, t_layout], self.run_cagr_calc)
+        self.create_popup("CAGR", [self.cg_s, self.cg_e, t_layout], self.run_cagr_calc, lambda: ("cagr", [
+            ("Initial", self.cg_s, "start_value", 1.0), ("Final", self.cg_e, "end_value", 1.0),
+            ("Duration", self.cg_t, "years", self.years_scale(self.cg_u))
+        ], 100.0))
 
     def run_cagr_calc(self, inst):
         if not self.validate_inputs([self.cg_s, self.cg_e, self.cg_t]): return
         try:
             s, e, t = float(self.cg_s.text), float(self.cg_e.text), float(self.cg_t.text)
             if self.cg_u.text == "Months": t /= 12.0
-            res = ((e/s)**(1/t) - 1) * 100
+            res = formulas.cagr(s, e, t) * 100
             self.display_text.text = f"{res:.2f}%"
             self.dialog.dismiss()
         except: self.display_text.text = "Error"
@@ -437,14 +625,17 @@ class CalculatorScreen(MDScreen):
     def show_npv_popup(self):
         self.nv_f, self.nv_r = self.create_textfield("Future Cash Flow"), self.create_textfield("Discount Rate %")
         t_layout, self.nv_t, self.nv_u = self.create_time_widget()
-        self.create_popup("NPV (Present Value)", [self.nv_f, self.nv_r, t_layout], self.run_npv_calc)
+        self.create_popup("NPV (Present Value)", [self.nv_f, self.nv_r, t_layout], self.run_npv_calc, lambda: ("npv", [
+            ("Cash Flow", self.nv_f, "future_value", 1.0), ("Rate %", self.nv_r, "rate", 0.01),
+            ("Duration", self.nv_t, "years", self.years_scale(self.nv_u))
+        ], 1.0))
 
     def run_npv_calc(self, inst):
         if not self.validate_inputs([self.nv_f, self.nv_r, self.nv_t]): return
         try:
             f, r, t = float(self.nv_f.text), float(self.nv_r.text)/100, float(self.nv_t.text)
             if self.nv_u.text == "Months": t /= 12.0
-            res = f / (1 + r)**t
+            res = formulas.present_value(f, r, t)
             self.display_text.text = f"${res:,.2f}"
             self.dialog.dismiss()
         except: self.display_text.text = "Error"
\ No newline at end of file
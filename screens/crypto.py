@@ -9,30 +9,40 @@ from kivy.properties import StringProperty, BooleanProperty
 
 from ui.widgets import CryptoListItem
 from networking import SafeRequest
+import market_data
 from currency import get_currency_symbol, CurrencySearchHelper, COINGECKO_CURRENCIES, ICON_SUPPORTED_CURRENCIES
 from threading_utils import run_bg, ui
+import instrumentation
 import app_state
+import snapshots
 
 class CryptoScreen(MDScreen):
     current_currency = StringProperty("usd")
     is_loading = BooleanProperty(False)
+    snapshot_time = None  # saved_at of the list on screen (None for search results)
 
     def on_enter(self):
         app = MDApp.get_running_app()
         if self.current_currency.upper() != app.default_currency: 
             self.set_currency(app.default_currency)
         
-        # Load Cache
-        if not self.ids.crypto_list.children and app_state.cache_store.exists("last_crypto_list"):
-            try:
-                entry = app_state.cache_store.get("last_crypto_list")
-                if 'data' in entry:
-                    self.update_list(entry['data'])
-            except Exception as e:
-                logging.error(f"Crypto Cache Error: {e}")
-            
+        # Last known good list first, then refresh in the background once it goes stale
+        if not self.ids.crypto_list.children: self.show_snapshot()
+        elif self.snapshot_time: self.update_status(f"Updated {snapshots.describe_age(self.snapshot_time)}")
+        stale = self.snapshot_time and not snapshots.is_fresh("crypto", self.snapshot_time)
+        if not self.ids.crypto_list.children or stale:
             self.load_market_data()
 
+    def show_snapshot(self):
+        data, saved_at = snapshots.get("crypto", self.current_currency)
+        self.snapshot_time = saved_at
+        if data:
+            self.update_list(data)
+            self.update_status(f"Updated {snapshots.describe_age(saved_at)}")
+
+    def update_status(self, text):
+        self.ids.status_label.text = text
+
     def show_currency_selector(self): 
         CurrencySearchHelper(self.set_currency, specific_list=COINGECKO_CURRENCIES).open_selector()
     
@@ -43,6 +53,7 @@ class CryptoScreen(MDScreen):
         else:
             self.ids.currency_btn.icon = "currency-sign"
         self.ids.crypto_list.clear_widgets()
+        self.show_snapshot()
         self.load_market_data()
 
     def load_market_data(self):
@@ -51,11 +62,10 @@ class CryptoScreen(MDScreen):
         self.ids.loading_spinner.active = True
         run_bg(self.fetch_top_10)
 
+    @instrumentation.timed("op.crypto_fetch")
     def fetch_top_10(self):
         try:
-            url = "https://api.coingecko.com/api/v3/coins/markets"
-            params = {"vs_currency": self.current_currency, "order": "market_cap_desc", "per_page": 10, "page": 1, "sparkline": "false"}
-            data = SafeRequest.get(url, params=params)
+            data = market_data.crypto_markets(self.current_currency, limit=10)
             
             if isinstance(data, list):
                 # Phase 3.5: Download images for cache
@@ -71,14 +81,16 @@ class CryptoScreen(MDScreen):
                         # Update data to point to local path for offline use
                         coin['local_image'] = local_path
 
-                app_state.cache_store.put("last_crypto_list", data=data)
+                self.snapshot_time = snapshots.put("crypto", self.current_currency, data)
                 ui(self.update_list, data)
+                ui(self.update_status, "Live")
             else: 
                 ui(self.show_error, "Rate Limit or Network Error")
         except Exception as e: 
             logging.error(f"Crypto Fetch Error: {e}")
             ui(self.show_error, "Unknown Error")
 
+    @instrumentation.timed("ui.crypto")
     def update_list(self, data):
         self.ids.loading_spinner.active = False
         self.ids.crypto_list.clear_widgets()
@@ -131,18 +143,19 @@ class CryptoScreen(MDScreen):
         self.is_loading = True
         self.ids.loading_spinner.active = True
         self.ids.crypto_list.clear_widgets()
+        self.snapshot_time = None
+        self.update_status("")
         run_bg(self.perform_search, query)
 
     def perform_search(self, query):
         try:
-            search_data = SafeRequest.get("https://api.coingecko.com/api/v3/search", params={"query": query})
-            if not search_data or not search_data.get('coins'): 
+            coins = market_data.crypto_search(query)
+            if not coins: 
                 ui(self.show_error, "No results found")
                 return 
             
-            top_matches = search_data['coins'][:5]
-            ids = ",".join([c['id'] for c in top_matches])
-            price_data = SafeRequest.get("https://api.coingecko.com/api/v3/coins/markets", params={"ids": ids, "vs_currency": self.current_currency})
+            top_matches = coins[:5]
+            price_data = market_data.crypto_markets(self.current_currency, ids=[c['id'] for c in top_matches])
             
             if not price_data: 
                 ui(self.show_error, "Price fetch failed")
@@ -159,4 +172,5 @@ class CryptoScreen(MDScreen):
             self.ids.crypto_list.clear_widgets()
             self.ids.crypto_list.add_widget(TwoLineAvatarIconListItem(text="Error", secondary_text=msg))
         else:
-            logging.warning(f"Background update failed: {msg}")
\ No newline at end of file
+            logging.warning(f"Background update failed: {msg}")
+            if self.snapshot_time: self.update_status(f"Offline - updated {snapshots.describe_age(self.snapshot_time)}")
\ No newline at end of file
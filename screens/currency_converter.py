@@ -4,9 +4,12 @@ from kivy.properties import BooleanProperty
 from kivymd.toast import toast
 
 from currency import get_currency_symbol, CurrencySearchHelper
-from networking import SafeRequest
+import market_data
 from threading_utils import run_bg, ui
 import app_state
+import instrumentation
+import snapshots
+from fincalc import money
 
 class CurrencyScreen(MDScreen):
     is_loading = BooleanProperty(False)
@@ -17,6 +20,11 @@ class CurrencyScreen(MDScreen):
             self.ids.btn_from.text = last.get('base', 'USD')
             self.ids.btn_to.text = last.get('target', 'EUR')
 
+        # Warm the rates for the last base currency so the next conversion is instant
+        _, saved_at = snapshots.get("fx", self.ids.btn_from.text)
+        if not snapshots.is_fresh("fx", saved_at):
+            run_bg(self.fetch_rates, self.ids.btn_from.text)
+
     def open_selector_from(self): 
         CurrencySearchHelper(lambda c: self.set_btn_text(self.ids.btn_from, c)).open_selector()
 
@@ -32,8 +40,13 @@ class CurrencyScreen(MDScreen):
         
         # --- FIX: VALIDATION CRASH ---
         try:
-            amount = float(amount_text)
-        except ValueError:
+            if app_state.money_mode == money.EXACT:
+                # Typed text straight to the base currency's minor units; no float in between
+                base_code = self.ids.btn_from.text
+                amount = money.from_minor(money.parse(amount_text, base_code), base_code)
+            else:
+                amount = float(amount_text)
+        except (ValueError, ArithmeticError):  # decimal.InvalidOperation is an ArithmeticError
             self.ids.amount_field.error = True
             toast("Invalid Amount")
             return
@@ -44,26 +57,63 @@ class CurrencyScreen(MDScreen):
         app_state.cache_store.put("last_conversion", base=base, target=target)
         
         if base == target: 
-            self.ids.result_label.text = f"{get_currency_symbol(target)}{amount:,.2f}"
+            self.ids.result_label.text = self.format_amount(amount, 1.0, target)
             return
             
+        rates, saved_at = snapshots.get("fx", base)
+        if rates and target in rates:
+            # Answer from the last good rates; only go to the network once they are stale
+            self.show_conversion(amount, base, target, rates[target], f"updated {snapshots.describe_age(saved_at)}")
+            if snapshots.is_fresh("fx", saved_at): return
+        else:
+            self.ids.result_label.text = "Converting..."
+            self.ids.rate_label.text = ""
+            
         self.is_loading = True
-        self.ids.result_label.text = "Converting..."
-        self.ids.rate_label.text = ""
-        run_bg(self.fetch_conversion, amount, base, target)
+        run_bg(self.fetch_conversion, amount, base, target, saved_at)
 
-    def fetch_conversion(self, amount, base, target):
-        resp = SafeRequest.get(f"https://open.er-api.com/v6/latest/{base}")
-        if resp and "rates" in resp:
-            rate = resp["rates"].get(target)
+    def fetch_rates(self, base, target=None):
+        """Latest rates for base (stored as a snapshot), or None when offline."""
+        rates = market_data.fx_rates(base, [target] if target else None)
+        if not rates: return None
+        if target and set(rates) <= {target}:
+            # Fallback source that only priced target: merge it in, but keep the table's
+            # old timestamp so the other (old) rates still count as stale
+            cached, cached_at = snapshots.get("fx", base)
+            if cached:
+                rates = {**cached, **rates}
+                snapshots.put("fx", base, rates, saved_at=cached_at)
+                return rates
+        snapshots.put("fx", base, rates)
+        return rates
+
+    @instrumentation.timed("op.fx_fetch")
+    def fetch_conversion(self, amount, base, target, saved_at=None):
+        rates = self.fetch_rates(base, target)
+        if rates is not None:
+            rate = rates.get(target)
             if rate: 
-                val = amount * rate
-                rate_text = f"1 {base} = {rate:.4f} {target}"
-                ui(self.update_ui, f"{get_currency_symbol(target)}{val:,.2f}", rate_text)
+                ui(self.show_conversion, amount, base, target, rate)
             else:
                 ui(self.update_ui, "Error", "Rate not found")
         else:
-            ui(self.update_ui, "Error", "Network Error")
+            # Keep the snapshot result on screen, flagged as offline (if it has this target)
+            cached, _ = snapshots.get("fx", base)
+            rate = (cached or {}).get(target) if saved_at else None
+            if rate:
+                ui(self.show_conversion, amount, base, target, rate, f"offline - {snapshots.describe_age(saved_at)}")
+            else:
+                ui(self.update_ui, "Error", "Network Error")
+
+    def show_conversion(self, amount, base, target, rate, note=""):
+        rate_text = f"1 {base} = {rate:.4f} {target}" + (f" ({note})" if note else "")
+        self.update_ui(self.format_amount(amount, rate, target), rate_text)
+
+    def format_amount(self, amount, rate, target):
+        if app_state.money_mode == money.EXACT:
+            # Decimal product rounded to the target's minor unit (0 places for JPY, 3 for KWD)
+            return money.fmt(money.convert(amount, rate, target), target, get_currency_symbol(target))
+        return f"{get_currency_symbol(target)}{amount * rate:,.2f}"
 
     def update_ui(self, result, rate):
         self.is_loading = False
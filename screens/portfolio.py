@@ -2,12 +2,8 @@ import logging
 import uuid
 import os
 import io
-import yfinance as yf
 import pandas as pd
 from kivymd.toast import toast
-import matplotlib
-matplotlib.use('Agg') 
-import matplotlib.pyplot as plt
 
 from datetime import datetime
 from kivymd.app import MDApp
@@ -21,10 +17,22 @@ from kivymd.uix.list import TwoLineAvatarIconListItem, IconLeftWidget, IconRight
 from kivy.core.image import Image as CoreImage
 
 from threading_utils import run_bg, ui
+import instrumentation
+from fincalc.charts import render_pie_chart, render_equity_chart
+from fincalc.portfolio import summarize_holdings
+from fincalc import compute, money, montecarlo
+from fincalc.risk import RiskModel
+import price_history
+import portfolio_history
 import app_state
+import market_data
+import watchlist
+
+BENCHMARK = "SPY"
 
 class PortfolioScreen(MDScreen):
     dialog = None
+    risk_model = None
     
     # Input Fields
     ticker_field = None
@@ -37,6 +45,7 @@ class PortfolioScreen(MDScreen):
         self.ids.balance_label.text = "Loading..."
         self.ids.gain_label.text = ""
         self.ids.chart_image.opacity = 0
+        self.ids.equity_image.opacity = 0
         run_bg(self.refresh_portfolio_data)
 
     # --- CSV EXPORT (NEW) ---
@@ -81,69 +90,36 @@ class PortfolioScreen(MDScreen):
             self.time_field.text = str(time)
 
     # --- DATA REFRESH LOGIC ---
+    @instrumentation.timed("op.portfolio_refresh")
     def refresh_portfolio_data(self):
-        holdings = app_state.get_portfolio()
-        if not holdings:
+        if not app_state.get_portfolio():
             ui(self.update_ui_empty)
             return
 
         try:
-            unique_tickers = list(set([t['ticker'] for t in holdings]))
+            lot_summary = app_state.get_lot_summary()
+            holdings = lot_summary['lots']
+            unique_tickers = list(holdings.tickers)
             current_prices = {}
             
             if unique_tickers:
-                data = yf.download(unique_tickers, period="1d", group_by='ticker', progress=False)
-                
-                for ticker in unique_tickers:
-                    try:
-                        if data.empty: price = 0.0
-                        elif isinstance(data.columns, pd.MultiIndex) and ticker in data.columns:
-                            price = data[ticker]['Close'].iloc[-1].item()
-                        elif 'Close' in data.columns:
-                            price = data['Close'].iloc[-1].item()
-                        else: price = 0.0
-                        current_prices[ticker] = price
-                    except:
-                        current_prices[ticker] = 0.0
-
-            total_value = 0.0
-            total_cost = 0.0
-            allocation_data = {} 
-            enriched_holdings = []
-
-            for trade in holdings:
-                t_ticker = trade['ticker']
-                t_shares = float(trade['shares'])
-                t_cost_basis = float(trade['cost_basis'])
-                
-                live_price = current_prices.get(t_ticker, t_cost_basis)
-                current_market_value = live_price * t_shares
-                original_cost = t_cost_basis * t_shares
-                
-                total_value += current_market_value
-                total_cost += original_cost
-                
-                if t_ticker in allocation_data:
-                    allocation_data[t_ticker] += current_market_value
-                else:
-                    allocation_data[t_ticker] = current_market_value
-
-                enriched_holdings.append({
-                    "data": trade,
-                    "current_price": live_price,
-                    "market_value": current_market_value,
-                    "gain_val": current_market_value - original_cost,
-                    "gain_pct": ((current_market_value - original_cost)/original_cost)*100 if original_cost else 0
-                })
-
-            chart_bytes = self.generate_pie_chart(allocation_data)
+                # Shared with the watchlist (and warmed by prefetch.py); only stale tickers are downloaded
+                quotes = watchlist.get_quotes(unique_tickers)
+                current_prices = {t: q['price'] for t, q in quotes.items()}
+
+            summary = summarize_holdings(holdings, current_prices, exact=app_state.money_mode == money.EXACT)
+            chart_bytes = self.generate_pie_chart(summary['allocation'])
+            equity_bytes = self.generate_equity_chart(float(summary['total_value']))
 
             ui_data = {
-                "holdings": enriched_holdings,
-                "total_value": total_value,
-                "total_gain": total_value - total_cost,
-                "total_gain_pct": ((total_value - total_cost) / total_cost * 100) if total_cost > 0 else 0,
-                "chart_bytes": chart_bytes
+                "holdings": summary['holdings'],
+                "total_value": summary['total_value'],
+                "total_gain": summary['total_gain'],
+                "total_gain_pct": summary['total_gain_pct'],
+                "realized": lot_summary['realized'] + lot_summary['dividends'],
+                "sales": lot_summary['sales'],
+                "chart_bytes": chart_bytes,
+                "equity_bytes": equity_bytes
             }
             ui(self.update_ui_full, ui_data)
 
@@ -151,45 +127,23 @@ class PortfolioScreen(MDScreen):
             logging.error(f"Portfolio Calc Error: {e}")
             ui(self.show_error, "Failed to fetch prices")
 
-    def generate_pie_chart(self, allocation_data):
-        fig = None
+    @instrumentation.timed("chart.equity")
+    def generate_equity_chart(self, live_value):
         try:
-            labels = [l for l,s in allocation_data.items() if s > 0]
-            sizes = [s for s in allocation_data.values() if s > 0]
-            if not sizes: return None
-            
-            app = MDApp.get_running_app()
-            is_dark = app.theme_cls.theme_style == "Dark"
-            text_color = "white" if is_dark else "black"
-
-            plt.close('all')
-            fig = plt.figure(figsize=(6, 6), dpi=100, facecolor='none')
-            colors = ['#00897B', '#4DB6AC', '#80CBC4', '#B2DFDB', '#00695C']
-            
-            patches, texts, autotexts = plt.pie(
-                sizes, labels=labels, autopct='%1.1f%%', 
-                startangle=90, colors=colors[:len(labels)]
-            )
-            
-            for t in texts:
-                t.set_color(text_color)
-                t.set_fontsize(10)
-            
-            for t in autotexts:
-                t.set_color('white')
-                t.set_fontsize(9)
-                t.set_weight('bold')
-
-            plt.tight_layout()
-            buf = io.BytesIO()
-            plt.savefig(buf, format='png', transparent=True)
-            buf.seek(0)
-            return buf.getvalue()
-
+            curve = portfolio_history.update_history(app_state.get_portfolio(), live_value)
         except Exception as e:
+            logging.error(f"Portfolio History Error: {e}")
             return None
-        finally:
-            if fig: plt.close(fig)
+        dates = [datetime.fromordinal(int(d)) for d in curve.days]
+        app = MDApp.get_running_app()
+        is_dark = app.theme_cls.theme_style == "Dark"
+        return render_equity_chart(dates, curve.values, curve.invested, "white" if is_dark else "black")
+
+    @instrumentation.timed("chart.pie")
+    def generate_pie_chart(self, allocation_data):
+        app = MDApp.get_running_app()
+        is_dark = app.theme_cls.theme_style == "Dark"
+        return render_pie_chart(allocation_data, "white" if is_dark else "black")
 
     def update_ui_empty(self):
         self.ids.balance_label.text = "$0.00"
@@ -197,6 +151,7 @@ class PortfolioScreen(MDScreen):
         self.ids.chart_image.opacity = 0
         self.ids.portfolio_list.clear_widgets()
 
+    @instrumentation.timed("ui.portfolio")
     def update_ui_full(self, data):
         val = data['total_value']
         gain = data['total_gain']
@@ -205,41 +160,173 @@ class PortfolioScreen(MDScreen):
         self.ids.balance_label.text = f"${val:,.2f}"
         symbol = "+" if gain >= 0 else ""
         self.ids.gain_label.text = f"{symbol}${gain:,.2f} ({symbol}{pct:.2f}%)"
+        if data.get('realized'):
+            self.ids.gain_label.text += f" | Realized ${data['realized']:,.2f}"
         self.ids.gain_label.text_color = "#00C853" if gain >= 0 else "#D50000"
 
         self.ids.portfolio_list.clear_widgets()
         for item in data['holdings']:
             trade = item['data']
             li = TwoLineAvatarIconListItem(
-                text=f"{trade['ticker']} ({trade['shares']} sh) @ ${trade['cost_basis']:.2f}",
+                text=f"{trade.ticker} ({trade.shares:g} sh) @ ${trade.price:.2f}",
                 secondary_text=f"Current: ${item['market_value']:,.2f} | {symbol}${item['gain_val']:,.2f} ({symbol}{item['gain_pct']:.1f}%)",
                 on_release=lambda x, i=item: self.show_trade_details(i)
             )
             li.add_widget(IconLeftWidget(icon="chart-pie"))
-            li.add_widget(IconRightWidget(icon="trash-can", on_release=lambda x, tid=trade['id']: self.delete_trade(tid)))
+            li.add_widget(IconRightWidget(icon="trash-can", on_release=lambda x, tid=trade.id: self.delete_trade(tid)))
+            self.ids.portfolio_list.add_widget(li)
+
+        # Recorded sells (newest first), so a mistaken one can be deleted even after its lot is closed
+        for sale in reversed(data.get('sales', [])):
+            sign = "+" if sale['gain'] >= 0 else ""
+            li = TwoLineAvatarIconListItem(
+                text=f"Sold {sale['ticker']} ({sale['shares']:g} sh) @ ${sale['proceeds'] / sale['shares']:.2f}",
+                secondary_text=f"{sale['date']} | Realized {sign}${sale['gain']:,.2f}"
+            )
+            li.add_widget(IconLeftWidget(icon="cash-minus"))
+            li.add_widget(IconRightWidget(icon="trash-can", on_release=lambda x, tid=sale['id']: self.delete_trade(tid)))
             self.ids.portfolio_list.add_widget(li)
 
         if data['chart_bytes']:
             self.ids.chart_image.texture = CoreImage(io.BytesIO(data['chart_bytes']), ext="png").texture
             self.ids.chart_image.opacity = 1
 
+        if data.get('equity_bytes'):
+            self.ids.equity_image.texture = CoreImage(io.BytesIO(data['equity_bytes']), ext="png").texture
+            self.ids.equity_image.opacity = 1
+
+    # --- RISK ANALYTICS & MONTE CARLO ---
+    def show_risk_simulation(self):
+        if not app_state.get_portfolio():
+            toast("Portfolio is empty")
+            return
+        toast("Analyzing risk...")
+        run_bg(self.run_risk_simulation, MDApp.get_running_app().default_rf)
+
+    @instrumentation.timed("op.portfolio_risk")
+    def run_risk_simulation(self, rf):
+        try:
+            positions = app_state.get_lot_summary()['positions']
+            shares = {t: p['shares'] for t, p in positions.items() if p['shares'] > 0}
+            if not shares:
+                ui(toast, "No open positions")
+                return
+
+            closes = price_history.get_closes(list(shares) + [BENCHMARK])
+            tickers = [t for t in shares if t in closes.columns]
+            if closes.empty or len(closes) < 30 or not tickers or BENCHMARK not in closes.columns:
+                ui(toast, "Not enough price history")
+                return
+
+            # Reuse the running moments; price_history refreshes the tail, so only new rows are folded in.
+            # The last row may still be an intraday price that the next refresh replaces, so it waits.
+            model = self.risk_model
+            if model is None or model.tickers != tickers:
+                model = self.risk_model = RiskModel(tickers, BENCHMARK)
+            model.update(closes.iloc[:-1])
+
+            last = closes[tickers].values[-1]
+            qty = [shares[t] for t in tickers]
+            metrics = model.metrics({t: p * q for t, p, q in zip(tickers, last, qty)}, rf)
+            app_state.portfolio_beta = metrics['portfolio']['beta']
+
+            mu, cov = montecarlo.estimate_params(closes[tickers].values)
+            service = compute.get_service()
+            var = {
+                days: service.portfolio_var(last, qty, mu, cov, horizon_days=days)
+                for days in (1, 10)
+            }
+            skipped = [t for t in shares if t not in tickers]
+            ui(self.show_risk_dialog, metrics, var, skipped)
+        except Exception as e:
+            logging.error(f"Risk Analysis Error: {e}")
+            ui(toast, "Risk analysis failed")
+
+    def show_risk_dialog(self, metrics, var, skipped):
+        port, one, ten = metrics['portfolio'], var[1], var[10]
+        details = [
+            f"Return (ann.): {port['return']*100:.2f}%", f"Volatility (ann.): {port['volatility']*100:.2f}%",
+            f"Beta vs {BENCHMARK}: {port['beta']:.2f}", f"Sharpe: {port['sharpe']:.2f}",
+            f"1-Day VaR / CVaR (95%): ${one['var']:,.0f} / ${one['cvar']:,.0f}",
+            f"10-Day VaR / CVaR (95%): ${ten['var']:,.0f} / ${ten['cvar']:,.0f}",
+            "-------------------",
+        ]
+        for t, a in metrics['assets'].items():
+            details.append(f"{t}: vol {a['volatility']*100:.1f}% | beta {a['beta']:.2f} | max DD {a['max_drawdown']*100:.1f}%")
+        details.append(f"{metrics['days']} days of history, {one['paths']:,} paths")
+        if skipped: details.append(f"No history: {', '.join(skipped)}")
+        content = MDBoxLayout(orientation="vertical", spacing="10dp", adaptive_height=True)
+        for line in details: content.add_widget(OneLineListItem(text=line, divider=None))
+        self.dialog = MDDialog(title="Portfolio Risk", type="custom", content_cls=content, buttons=[MDFlatButton(text="CLOSE", on_release=lambda x: self.dialog.dismiss())])
+        self.dialog.open()
+
     def delete_trade(self, trade_id):
-        app_state.remove_trade(trade_id)
+        if not app_state.remove_trade(trade_id):
+            toast("Sales are matched to this lot; delete those sales first")
+            return
         run_bg(self.refresh_portfolio_data)
 
     def show_trade_details(self, item):
         trade = item['data']
         details = [
-            f"Ticker: {trade['ticker']}", f"Shares: {trade['shares']}",
-            f"Purchase Date: {trade['date']}", f"Time: {trade.get('time','')}",
-            f"Cost Basis: ${trade['cost_basis']:,.2f}", "-------------------",
+            f"Ticker: {trade.ticker}", f"Shares: {trade.shares:g}",
+            f"Purchase Date: {trade.date.isoformat()}", f"Time: {trade.time}",
+            f"Cost Basis: ${trade.price:,.2f}", "-------------------",
             f"Current Value: ${item['market_value']:,.2f}", f"Gain/Loss: ${item['gain_val']:,.2f}"
         ]
         content = MDBoxLayout(orientation="vertical", spacing="10dp", adaptive_height=True)
         for line in details: content.add_widget(OneLineListItem(text=line, divider=None))
-        self.dialog = MDDialog(title="Trade Details", type="custom", content_cls=content, buttons=[MDFlatButton(text="CLOSE", on_release=lambda x: self.dialog.dismiss())])
+        self.dialog = MDDialog(title="Trade Details", type="custom", content_cls=content, buttons=[
+            MDFlatButton(text="SELL", on_release=lambda x: self.show_sell_dialog(item)),
+            MDFlatButton(text="CLOSE", on_release=lambda x: self.dialog.dismiss())
+        ])
+        self.dialog.open()
+
+    # --- SELLS (matched against lots by the ledger) ---
+    def show_sell_dialog(self, item):
+        self.dialog.dismiss()
+        trade = item['data']
+        self.sell_item = item
+        self.sell_shares_field = MDTextField(hint_text=f"Shares (lot has {trade.shares:g})", input_filter="float", mode="rectangle", text=f"{trade.shares:g}")
+        self.sell_price_field = MDTextField(hint_text="Sale Price", input_filter="float", mode="rectangle", text=f"{item['current_price']:.2f}")
+
+        content = MDBoxLayout(orientation="vertical", spacing="12dp", adaptive_height=True)
+        content.add_widget(self.sell_shares_field)
+        content.add_widget(self.sell_price_field)
+        method = app_state.lot_method
+        self.dialog = MDDialog(title=f"Sell {trade.ticker} ({method})", type="custom", content_cls=content, buttons=[
+            MDFlatButton(text="CANCEL", on_release=lambda x: self.dialog.dismiss()),
+            MDRaisedButton(text="SELL", on_release=self.process_sell)
+        ])
         self.dialog.open()
 
+    def process_sell(self, *args):
+        trade = self.sell_item['data']
+        try:
+            shares, price = float(self.sell_shares_field.text), float(self.sell_price_field.text)
+        except ValueError:
+            toast("Invalid number format")
+            return
+        position = app_state.get_lot_summary()['positions'].get(trade.ticker, {})
+        if shares <= 0 or shares > position.get('shares', 0) + 1e-9:
+            self.sell_shares_field.error = True
+            toast("Not enough shares")
+            return
+
+        app_state.add_trade({
+            "id": str(uuid.uuid4()),
+            "type": "sell",
+            "ticker": trade.ticker,
+            "shares": shares,
+            "price": price,
+            "date": datetime.now().strftime("%Y-%m-%d"),
+            "time": datetime.now().strftime("%H:%M:%S"),
+            "lot_ids": [trade.id]  # Only consulted in SPECIFIC mode
+        })
+        self.dialog.dismiss()
+        toast(f"Sold {shares:g} {trade.ticker} @ ${price:.2f}")
+        run_bg(self.refresh_portfolio_data)
+
     def show_add_dialog(self):
         self.ticker_field = MDTextField(hint_text="Ticker", mode="rectangle")
         self.shares_field = MDTextField(hint_text="Shares", input_filter="float", mode="rectangle")
@@ -283,8 +370,7 @@ class PortfolioScreen(MDScreen):
 
     def fetch_historical_price(self, ticker, date_obj, time_text, shares):
         try:
-            stock = yf.Ticker(ticker)
-            check_data = stock.history(period="5d")
+            check_data = market_data.history(ticker, period="5d")
             
             if check_data.empty:
                 ui(toast, f"Error: Stock '{ticker}' not found.")
@@ -292,7 +378,7 @@ class PortfolioScreen(MDScreen):
 
             if date_obj:
                 target_date = date_obj.strftime("%Y-%m-%d")
-                hist = stock.history(start=target_date, period="5d")
+                hist = market_data.history(ticker, start=target_date, period="5d")
                 price = float(hist.iloc[0]['Open']) if not hist.empty else float(check_data.iloc[-1]['Close'])
             else:
                 price = float(check_data.iloc[-1]['Close'])
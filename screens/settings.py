@@ -6,9 +6,21 @@ from kivymd.uix.button import MDFlatButton
 from kivymd.uix.textfield import MDTextField
 from kivymd.uix.boxlayout import MDBoxLayout
 from kivymd.toast import toast
+from kivy.clock import Clock
+from datetime import datetime
+import os
+
+import app_state
+import instrumentation
+import networking
+from fincalc import money
+import profiler
+
+MONEY_MODES = {money.FLOAT: "Floating point", money.EXACT: "Exact (fixed-point cents)"}
 
 class SettingsScreen(MDScreen):
     dialog = None
+    perf_event = None
 
     def on_enter(self):
         app = MDApp.get_running_app()
@@ -16,12 +28,87 @@ class SettingsScreen(MDScreen):
             self.ids.rf_label.secondary_text = f"{app.default_rf}%"
         if 'curr_label' in self.ids:
             self.ids.curr_label.secondary_text = app.default_currency
+        if 'lot_label' in self.ids:
+            self.ids.lot_label.secondary_text = app.lot_method
+        if 'money_label' in self.ids:
+            self.ids.money_label.secondary_text = MONEY_MODES[app.money_mode]
         
         if 'debug_label' in self.ids:
             is_debug = getattr(app, 'debug_mode', False)
             self.ids.debug_label.secondary_text = "Enabled" if is_debug else "Disabled"
             self.ids.debug_icon.icon = "bug" if is_debug else "bug-outline"
 
+        self.tick()
+        if not self.perf_event:
+            self.perf_event = Clock.schedule_interval(self.tick, 1)
+
+    def on_leave(self):
+        if self.perf_event:
+            self.perf_event.cancel()
+            self.perf_event = None
+
+    def tick(self, *args):
+        self.refresh_provider_health()
+        self.refresh_perf_overlay()
+
+    # --- DATA PROVIDERS ---
+    def describe_provider(self, host, status):
+        if status['state'] == networking.OPEN: return f"{host}: down, retry in {status['retry_in']:.0f}s"
+        if status['state'] == networking.HALF_OPEN: return f"{host}: recovering"
+        return f"{host}: OK ({status['failure_rate']:.0%} failed of last {status['calls']})"
+
+    def refresh_provider_health(self):
+        if 'provider_label' not in self.ids: return
+        health = networking.health()
+        trouble = [self.describe_provider(h, s) for h, s in health.items() if s['state'] != networking.CLOSED]
+        if trouble: text = "; ".join(trouble)
+        else: text = "All providers OK" if health else "No requests yet"
+        self.ids.provider_label.secondary_text = text
+        self.ids.provider_icon.icon = "cloud-alert" if trouble else "cloud-check-outline"
+
+    def show_provider_health(self):
+        health = networking.health()
+        lines = [self.describe_provider(h, s) for h, s in health.items()]
+        self.dialog = MDDialog(
+            title="Data Providers",
+            text="\n".join(lines) if lines else "No requests yet",
+            buttons=[MDFlatButton(text="CLOSE", on_release=lambda x: self.dialog.dismiss())]
+        )
+        self.dialog.open()
+
+    # --- PERFORMANCE OVERLAY ---
+    def refresh_perf_overlay(self, *args):
+        app = MDApp.get_running_app()
+        if not getattr(app, 'debug_mode', False) or 'perf_label' not in self.ids: return
+
+        snap = instrumentation.snapshot()
+        lines = []
+        for name, t in sorted(snap['timers'].items()):
+            if name == "ui.frame": continue
+            lines.append(f"{name:<16}{t['p50_ms']:>8.1f}{t['p95_ms']:>9.1f} ms  n={t['count']}")
+
+        frame = snap['timers'].get("ui.frame")
+        if frame:
+            stalls = snap['counters'].get("ui.frame_stall", 0)
+            lines.append(f"{'frame':<16}{frame['p50_ms']:>8.1f}{frame['p95_ms']:>9.1f} ms  stalls={stalls}")
+
+        hits, misses = snap['counters'].get("cache.image.hit", 0), snap['counters'].get("cache.image.miss", 0)
+        if hits or misses:
+            lines.append(f"image cache     {hits} hit / {misses} miss")
+        fast_fails = snap['counters'].get("net.fast_fail", 0)
+        if fast_fails:
+            lines.append(f"fast fails      {fast_fails} (circuit open)")
+
+        self.ids.perf_label.text = "\n".join(lines) if lines else "No samples yet"
+
+    def export_perf_stats(self):
+        filename = f"perf_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        try:
+            instrumentation.export_json(os.path.join(app_state.base_dir, filename))
+            toast(f"Exported to {filename}")
+        except OSError:
+            toast("Export Failed")
+
     def toggle_dark_mode(self):
         app = MDApp.get_running_app()
         new_style = "Dark" if app.theme_cls.theme_style == "Light" else "Light"
@@ -97,6 +184,30 @@ class SettingsScreen(MDScreen):
             self.ids.curr_label.secondary_text = currency
         if self.dialog: self.dialog.dismiss()
 
+    def change_lot_method(self):
+        methods = [("FIFO", "First in, first out"), ("LIFO", "Last in, first out"), ("AVERAGE", "Average cost"), ("SPECIFIC", "Specific lot (the one you tap)")]
+        items = [OneLineAvatarIconListItem(text=f"{m} - {desc}", on_release=lambda x, m=m: self.set_lot_method(m)) for m, desc in methods]
+
+        self.dialog = MDDialog(
+            title="Tax-Lot Method", type="simple", items=items,
+            buttons=[MDFlatButton(text="CANCEL", on_release=lambda x: self.dialog.dismiss())]
+        )
+        self.dialog.open()
+
+    def set_lot_method(self, method):
+        app = MDApp.get_running_app()
+        app.save_setting("lot_method", method)
+        if 'lot_label' in self.ids:
+            self.ids.lot_label.secondary_text = method
+        if self.dialog: self.dialog.dismiss()
+
+    def toggle_money_mode(self):
+        app = MDApp.get_running_app()
+        mode = money.FLOAT if app.money_mode == money.EXACT else money.EXACT
+        app.save_setting("money_mode", mode)
+        if 'money_label' in self.ids:
+            self.ids.money_label.secondary_text = MONEY_MODES[mode]
+
     def toggle_debug(self):
         app = MDApp.get_running_app()
         current = getattr(app, 'debug_mode', False)
@@ -105,4 +216,8 @@ class SettingsScreen(MDScreen):
         
         if 'debug_label' in self.ids:
             self.ids.debug_label.secondary_text = "Enabled" if app.debug_mode else "Disabled"
-            self.ids.debug_icon.icon = "bug" if app.debug_mode else "bug-outline"
\ No newline at end of file
+            self.ids.debug_icon.icon = "bug" if app.debug_mode else "bug-outline"
+
+        # on_debug_mode (main.py) arms the slow-operation profiler alongside instrumentation
+        if app.debug_mode:
+            toast(f"Profiling ops over {profiler.THRESHOLD_MS}ms to profiles/")
\ No newline at end of file
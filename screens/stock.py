@@ -1,19 +1,36 @@
 import logging
 import io
 import re  # <--- NEW: Regex support
-import yfinance as yf
-import matplotlib
-matplotlib.use('Agg') 
-import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
+import pandas as pd
 
 from kivymd.app import MDApp
 from kivymd.uix.screen import MDScreen
+from kivymd.uix.menu import MDDropdownMenu
 from kivy.core.image import Image as CoreImage
 from kivymd.toast import toast
 from threading_utils import run_bg, ui
+import instrumentation
+from fincalc.charts import render_price_chart
+from fincalc.quotes import session_stats
+from fincalc.indicators import PRICE_OVERLAYS, PANELS
+import fundamentals
+import snapshots
+import stock_history
+
+def _pack_history(hist):
+    """Close series as plain lists for the snapshot store."""
+    tz = hist.index.tz
+    return {"t": ((hist.index - pd.Timestamp(0, tz=tz)) // pd.Timedelta(seconds=1)).tolist(), "c": hist['Close'].tolist(), "tz": str(tz) if tz else None}
+
+def _unpack_history(packed):
+    index = pd.to_datetime(packed["t"], unit="s", utc=True)
+    index = index.tz_convert(packed["tz"]) if packed["tz"] else index.tz_localize(None)
+    return pd.DataFrame({"Close": packed["c"]}, index=index)
 
 class StockScreen(MDScreen):
+    period = "1mo"   # Selected period tab
+    request = None   # (ticker, period) on screen; late results for older requests are dropped
+
     def on_enter(self):
         app = MDApp.get_running_app()
         if 'ticker_field' in self.ids:
@@ -36,110 +53,145 @@ class StockScreen(MDScreen):
             app = MDApp.get_running_app()
             app.save_setting("last_ticker", raw_ticker)
 
-        if 'price_label' in self.ids: self.ids.price_label.text = "Loading..."
-        if 'chart_image' in self.ids: self.ids.chart_image.opacity = 0
+        if self.request is None or self.request[0] != raw_ticker:
+            if 'price_label' in self.ids: self.ids.price_label.text = "Loading..."
+            if 'chart_image' in self.ids: self.ids.chart_image.opacity = 0
         
-        run_bg(self.fetch_stock_data, raw_ticker, "1mo")
+        self.request = (raw_ticker, self.period)
+        run_bg(self.fetch_stock_data, raw_ticker, self.period)
 
+    def set_period(self, period):
+        self.period = period
+        self.search_stock(save=False)
+
+    @instrumentation.timed("op.stock_fetch")
     def fetch_stock_data(self, ticker, period="1mo"):
-        data = None
+        request = (ticker, period)
+        key = f"{ticker}:{period}"
+        self.load_fundamentals(ticker)  # Cached fields now; a stale entry refreshes in parallel with the history
+
+        # Switching tabs on a ticker we already hold is a slice of the in-memory superset
+        view, fetched_at = stock_history.peek(ticker, period)
+        cached, saved_at = None, None
+        shown = view is not None and not view.empty
+        if shown:
+            ui(self.present, request, self.build_view(view, session_stats(view), period, indicators=self.chart_indicators(ticker, period, view)))
+            if stock_history.is_fresh(fetched_at): return
+        else:
+            cached, saved_at = snapshots.get("stock", key)
+            if cached:
+                # Last known good first, so the screen is never blank while the network is slow
+                status = f"Updated {snapshots.describe_age(saved_at)}"
+                ui(self.present, request, self.build_view(_unpack_history(cached['hist']), cached['details'], period, status))
+                if snapshots.is_fresh("stock", saved_at): return
+
         try:
-            stock = yf.Ticker(ticker)
-            
-            interval = "2m" if period == "1d" else "1d"
-            if period == "1wk": interval = "1h"
-            
-            hist = stock.history(period=period, interval=interval)
-            info = stock.info
+            # First view downloads the superset once; after that only the tail is fetched
+            hist = stock_history.get_history(ticker, period)
             
-            if hist.empty:
-                ui(self.update_label, "No Data")
+            if hist is None or hist.empty:
+                if not cached and not shown: ui(self.present_label, request, "No Data")
                 return
 
-            current_price = hist['Close'].iloc[-1]
-            start_price = hist['Close'].iloc[0]
-            
-            change = current_price - start_price
-            pct_change = (change / start_price) * 100 if start_price != 0 else 0
-            
-            color = "#00C853" if change >= 0 else "#D50000"
-            change_str = f"{change:+.2f} ({pct_change:+.2f}%)"
-
-            chart_buf = self.generate_chart(hist, change >= 0, period)
-            
-            data = {
-                'price': f"${current_price:,.2f}",
-                'change': change_str,
-                'color': color,
-                'chart': chart_buf,
-                'details': {
-                    'open': info.get('open', 0),
-                    'high': info.get('dayHigh', 0),
-                    'low': info.get('dayLow', 0),
-                    'mkt_cap': info.get('marketCap', 0),
-                    'pe': info.get('trailingPE', 0),
-                    'vol': info.get('volume', 0)
-                }
-            }
-            ui(self.display_data, data)
+            # Open/high/low/volume come from the history we already have; stock.info is only
+            # needed for the slow-moving fundamentals, which fill in separately
+            details = session_stats(hist)
+            snapshots.put("stock", key, {"hist": _pack_history(hist), "details": details})
+            ui(self.present, request, self.build_view(hist, details, period, indicators=self.chart_indicators(ticker, period, hist)))
             
         except Exception as e:
             logging.error(f"Stock Error: {e}")
-            ui(self.update_label, "Fetch Failed")
-
-    def generate_chart(self, hist, is_green, period):
-        fig = None
-        try:
-            app = MDApp.get_running_app()
-            is_dark = app.theme_cls.theme_style == "Dark"
-            text_color = "white" if is_dark else "black"
-            
-            plt.close('all')
-            fig, ax = plt.subplots(figsize=(5, 3.5), facecolor='none') 
-            color = '#00C853' if is_green else '#D50000'
-            
-            ax.plot(hist.index, hist['Close'], color=color, linewidth=2)
-            ax.fill_between(hist.index, hist['Close'], hist['Close'].min(), color=color, alpha=0.1)
-            
-            ax.grid(True, linestyle='--', alpha=0.3, color=text_color)
-            ax.spines['top'].set_visible(False)
-            ax.spines['right'].set_visible(False)
-            ax.spines['bottom'].set_color(text_color)
-            ax.spines['left'].set_color(text_color)
-            ax.tick_params(axis='x', colors=text_color)
-            ax.tick_params(axis='y', colors=text_color)
-            
-            if period == "1d":
-                ax.xaxis.set_major_formatter(mdates.DateFormatter('%H:%M'))
-            elif period in ["1mo", "3mo"]:
-                ax.xaxis.set_major_formatter(mdates.DateFormatter('%b %d'))
+            # Whatever is already on screen stays; only the status says it could not be refreshed
+            if shown:
+                ui(self.present_status, request, f"Offline - updated {snapshots.describe_age(fetched_at)}")
+            elif cached:
+                ui(self.present_status, request, f"Offline - updated {snapshots.describe_age(saved_at)}")
             else:
-                ax.xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m'))
-                
-            plt.xticks(rotation=45, fontsize=8)
-            plt.yticks(fontsize=8)
-            plt.tight_layout()
-            
-            buf = io.BytesIO()
-            plt.savefig(buf, format='png', transparent=True)
-            buf.seek(0)
-            return buf
-        except Exception:
-            return None
-        finally:
-            if fig:
-                plt.close(fig)
+                ui(self.present_label, request, "Fetch Failed")
+
+    def load_fundamentals(self, ticker):
+        data, saved_at = fundamentals.cached(ticker)
+        ui(self.present_fundamentals, ticker, data or {})
+        if not snapshots.is_fresh("fundamentals", saved_at):
+            run_bg(self.refresh_fundamentals, ticker)
+
+    def refresh_fundamentals(self, ticker):
+        data = fundamentals.refresh(ticker)
+        if data is not None: ui(self.present_fundamentals, ticker, data)
+
+    def chart_indicators(self, ticker, period, hist):
+        if not MDApp.get_running_app().chart_indicators: return None
+        with instrumentation.timer("chart.indicators"):
+            return stock_history.indicators(ticker, period, hist)
+
+    def show_indicator_menu(self, caller):
+        app = MDApp.get_running_app()
+        items = [{
+            "text": f"{'[x]' if name in app.chart_indicators else '[  ]'} {name.upper()}",
+            "on_release": lambda n=name: self.toggle_indicator(n)
+        } for name in PRICE_OVERLAYS + PANELS]
+        self.indicator_menu = MDDropdownMenu(caller=caller, items=items, width_mult=3)
+        self.indicator_menu.open()
+
+    def toggle_indicator(self, name):
+        self.indicator_menu.dismiss()
+        app = MDApp.get_running_app()
+        selected = [n for n in app.chart_indicators if n != name]
+        if name not in app.chart_indicators: selected.append(name)
+        app.save_setting("chart_indicators", selected)
+        self.search_stock(save=False)  # Redraw; the history and indicator state are already in memory
+
+    def build_view(self, hist, details, period, status="Current Price", indicators=None):
+        current_price = hist['Close'].iloc[-1]
+        start_price = hist['Close'].iloc[0]
+        
+        change = current_price - start_price
+        pct_change = (change / start_price) * 100 if start_price != 0 else 0
+        
+        return {
+            'price': f"${current_price:,.2f}",
+            'change': f"{change:+.2f} ({pct_change:+.2f}%)",
+            'color': "#00C853" if change >= 0 else "#D50000",
+            'chart': self.generate_chart(hist, change >= 0, period, indicators),
+            'details': details,
+            'status': status
+        }
+
+    @instrumentation.timed("chart.price")
+    def generate_chart(self, hist, is_green, period, indicators=None):
+        app = MDApp.get_running_app()
+        is_dark = app.theme_cls.theme_style == "Dark"
+        return render_price_chart(hist, is_green, period, "white" if is_dark else "black", indicators, app.chart_indicators)
 
     def update_label(self, text):
         if 'price_label' in self.ids:
             self.ids.price_label.text = text
             self.ids.price_label.theme_text_color = "Primary"
+        self.update_status("Current Price")
+
+    def present(self, request, data):
+        if request == self.request: self.display_data(data)
+
+    def present_label(self, request, text):
+        if request == self.request: self.update_label(text)
 
+    def present_status(self, request, text):
+        if request == self.request: self.update_status(text)
+
+    def present_fundamentals(self, ticker, data):
+        # Fundamentals don't depend on the period, so only the ticker has to match
+        if self.request and self.request[0] == ticker: self.display_fundamentals(data)
+
+    def update_status(self, text):
+        if 'price_status' in self.ids: self.ids.price_status.text = text
+
+    @instrumentation.timed("ui.stock")
     def display_data(self, data):
         if 'price_label' in self.ids:
             self.ids.price_label.text = f"{data['price']}\n{data['change']}"
             self.ids.price_label.theme_text_color = "Custom"
             self.ids.price_label.text_color = data['color']
+        self.update_status(data['status'])
         
         if 'chart_image' in self.ids and data['chart']:
             im_data = io.BytesIO(data['chart'].getvalue())
@@ -147,13 +199,21 @@ class StockScreen(MDScreen):
             self.ids.chart_image.opacity = 1
             
         det = data.get('details', {})
-        if 'lbl_open' in self.ids: self.ids.lbl_open.text = f"Open: ${det['open']:,.2f}"
-        if 'lbl_high' in self.ids: self.ids.lbl_high.text = f"High: ${det['high']:,.2f}"
-        if 'lbl_low' in self.ids: self.ids.lbl_low.text = f"Low: ${det['low']:,.2f}"
+        if 'lbl_open' in self.ids: self.ids.lbl_open.text = f"Open: ${det.get('open') or 0:,.2f}"
+        if 'lbl_high' in self.ids: self.ids.lbl_high.text = f"High: ${det.get('high') or 0:,.2f}"
+        if 'lbl_low' in self.ids: self.ids.lbl_low.text = f"Low: ${det.get('low') or 0:,.2f}"
+
+    def display_fundamentals(self, data):
         if 'lbl_cap' in self.ids:
-            cap = det['mkt_cap']
-            if cap is None: cap = 0
-            if cap > 1e12: cap_str = f"{cap/1e12:.2f}T"
+            cap = data.get('mkt_cap')
+            if not cap: cap_str = "-"
+            elif cap > 1e12: cap_str = f"{cap/1e12:.2f}T"
             elif cap > 1e9: cap_str = f"{cap/1e9:.2f}B"
             else: cap_str = f"{cap/1e6:.2f}M"
-            self.ids.lbl_cap.text = f"Mkt Cap: {cap_str}"
\ No newline at end of file
+            self.ids.lbl_cap.text = f"Mkt Cap: {cap_str}"
+        if 'lbl_pe' in self.ids:
+            pe = data.get('pe')
+            self.ids.lbl_pe.text = f"P/E Ratio: {pe:.2f}" if pe else "P/E Ratio: -"
+        if 'lbl_div' in self.ids:
+            div = data.get('div_yield')
+            self.ids.lbl_div.text = f"Div Yield: {div * 100:.2f}%" if div else "Div Yield: -"
\ No newline at end of file
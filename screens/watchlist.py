@@ -0,0 +1,110 @@
+import logging
+import re
+
+from kivymd.app import MDApp
+from kivymd.uix.screen import MDScreen
+from kivymd.toast import toast
+from kivy.clock import Clock
+from kivy.properties import BooleanProperty
+
+from ui.widgets import WatchlistRow  # Registers the RecycleView viewclass used in interface.kv
+from threading_utils import run_bg, ui
+import instrumentation
+import snapshots
+import watchlist
+import app_state
+
+REFRESH_SEC = watchlist.QUOTE_TTL  # Scheduled refresh; each cycle is at most one batched download
+GREEN, RED = [0, 0.78, 0.33, 1], [0.84, 0, 0, 1]
+
+class WatchlistScreen(MDScreen):
+    is_loading = BooleanProperty(False)
+    refresh_event = None
+    refresh_pending = False  # A refresh asked for while a fetch was running (e.g. a ticker added)
+
+    def on_enter(self):
+        self.tickers = app_state.get_watchlist()
+        if not self.ids.watch_rv.data:
+            # Last saved quotes first; the download only replaces what is stale
+            watchlist.load_snapshot()
+            self.update_rows(watchlist.cached_quotes(self.tickers))
+        self.refresh()
+        self.refresh_event = Clock.schedule_interval(lambda dt: self.refresh(), REFRESH_SEC)
+
+    def on_leave(self):
+        if self.refresh_event:
+            self.refresh_event.cancel()
+            self.refresh_event = None
+
+    def add_ticker(self):
+        raw = self.ids.watch_field.text.strip().upper()
+        if not re.match(r'^[A-Z0-9\-\.]{1,10}$', raw):
+            toast("Invalid Format: Use letters/numbers only")
+            return
+        self.ids.watch_field.text = ""
+        if raw in self.tickers: return
+        self.tickers.append(raw)
+        app_state.save_watchlist(self.tickers)
+        self.refresh()
+
+    def remove_ticker(self, ticker):
+        if ticker not in self.tickers: return
+        self.tickers.remove(ticker)
+        watchlist.forget(ticker)
+        app_state.save_watchlist(self.tickers)
+        self.ids.watch_rv.data = [row for row in self.ids.watch_rv.data if row['ticker'] != ticker]
+
+    def open_ticker(self, ticker):
+        app = MDApp.get_running_app()
+        app.save_setting("last_ticker", ticker)
+        app.root.ids.screen_manager.current = "stock_screen"
+
+    def refresh(self):
+        if not self.tickers:
+            self.update_rows({})
+            return
+        if self.is_loading:
+            self.refresh_pending = True
+            return
+        self.is_loading = True
+        run_bg(self.fetch_quotes, list(self.tickers))
+
+    @instrumentation.timed("op.watchlist_fetch")
+    def fetch_quotes(self, tickers):
+        try:
+            quotes = watchlist.get_quotes(tickers)
+        except Exception as e:
+            logging.error(f"Watchlist Error: {e}")
+            quotes = {}
+        ui(self.update_rows, quotes)
+
+    @instrumentation.timed("ui.watchlist")
+    def update_rows(self, quotes):
+        self.is_loading = False
+        # A ticker removed while the fetch ran is neither listed nor aged
+        quotes = {t: q for t, q in quotes.items() if t in self.tickers}
+        oldest = min((age for age in map(watchlist.quote_age, quotes) if age is not None), default=None)
+        rows = []
+        for ticker in self.tickers:
+            q = quotes.get(ticker)
+            if q is None:
+                rows.append({"ticker": ticker, "price_text": "--", "change_text": "", "change_color": GREEN, "spark": [], "owner": self})
+                continue
+            color = GREEN if q['change'] >= 0 else RED
+            rows.append({
+                "ticker": ticker,
+                "price_text": f"${q['price']:,.2f}",
+                "change_text": f"{q['change']:+.2f} ({q['pct']:+.2f}%)",
+                "change_color": color,
+                "spark": q['spark'],
+                "owner": self
+            })
+        # RecycleView only builds widgets for the rows on screen
+        self.ids.watch_rv.data = rows
+        if not self.tickers: self.ids.watch_status.text = "Add a ticker to start watching"
+        elif oldest: self.ids.watch_status.text = f"{len(quotes)}/{len(self.tickers)} quotes - oldest {snapshots.describe_age(oldest)}"
+        else: self.ids.watch_status.text = "No quotes yet"
+
+        if self.refresh_pending:
+            self.refresh_pending = False
+            self.refresh()  # Only the tickers still stale (the newly added ones) are downloaded
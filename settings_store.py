@@ -0,0 +1,81 @@
+import json
+import logging
+import os
+import threading
+import time
+
+import instrumentation
+
+# --- SETTINGS STORE ---
+# Config lives in memory; changes are coalesced and written once per debounce window
+# on a timer thread (temp file + os.replace), so saving a setting never blocks the UI.
+# The file keeps the JsonStore layout ({"config": {...}}) used by earlier versions.
+
+DEBOUNCE_SEC = 1.0
+
+class SettingsStore:
+    def __init__(self, path, delay=DEBOUNCE_SEC):
+        self.path = path
+        self.delay = delay
+        self.config = self._read()
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()  # Serializes flushes from the timer and flush()
+        self._timer = None
+        self._changed_at = 0.0
+        self._version = 0  # Bumped on every change; a flush only writes newer versions
+        self._saved = 0
+
+    def _read(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return dict(json.load(f).get("config", {}))
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError, AttributeError) as e:
+            logging.error(f"Settings Read Error: {e}")
+            return {}
+
+    def get(self, key, default=None):
+        with self._lock:
+            return self.config.get(key, default)
+
+    def set(self, key, value):
+        """Updates memory now; the disk write happens once changes stop for `delay` seconds."""
+        with self._lock:
+            if key in self.config and self.config[key] == value: return
+            self.config[key] = value
+            self._version += 1
+            self._changed_at = time.monotonic()
+            if self._timer is None: self._schedule(self.delay)
+
+    def _schedule(self, delay):
+        self._timer = threading.Timer(delay, self._on_timer)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _on_timer(self):
+        # One timer per burst: if changes kept coming, wait out the rest of the window
+        with self._lock:
+            remaining = self._changed_at + self.delay - time.monotonic()
+            if remaining > 0:
+                self._schedule(remaining)
+                return
+        self.flush()
+
+    @instrumentation.timed("store.settings")
+    def flush(self):
+        """Writes pending changes, if any. Safe to call from any thread (e.g. on app stop)."""
+        with self._write_lock:
+            with self._lock:
+                if self._timer: self._timer.cancel()
+                self._timer = None
+                if self._version == self._saved: return
+                version, payload = self._version, json.dumps({"config": self.config})
+            tmp = self.path + ".tmp"
+            try:
+                with open(tmp, "w", encoding="utf-8") as f:
+                    f.write(payload)
+                os.replace(tmp, self.path)  # Never leaves a half-written settings file
+                self._saved = version
+            except OSError as e:
+                logging.error(f"Settings Write Error: {e}")
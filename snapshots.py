@@ -0,0 +1,75 @@
+import gzip
+import json
+import logging
+import os
+import re
+import threading
+import time
+
+import app_state
+import instrumentation
+
+# --- LAST-KNOWN-GOOD SNAPSHOTS ---
+# Every successful stock / FX / crypto fetch is kept as one small gzipped JSON file
+# under <base_dir>/snapshots, plus an in-memory copy. Screens render the snapshot
+# straight away, refresh in the background, and fall back to it when offline.
+
+SNAPSHOT_DIR = os.path.join(app_state.base_dir, "snapshots")
+MAX_AGE = {"stock": 60, "crypto": 60, "fx": 3600, "fundamentals": 86400}  # Seconds before a background refresh is due
+
+_memory = {}
+_lock = threading.Lock()
+
+def _path(kind, key):
+    safe = re.sub(r'[^A-Za-z0-9_.-]', '_', str(key))
+    return os.path.join(SNAPSHOT_DIR, f"{kind}_{safe}.json.gz")
+
+@instrumentation.timed("store.snapshot")
+def put(kind, key, data, saved_at=None):
+    """Stores data as the latest good payload for (kind, key) and returns its timestamp. Call from a worker thread.
+
+    saved_at keeps an older timestamp, for payloads that were only partly refreshed.
+    """
+    record = {"saved_at": time.time() if saved_at is None else saved_at, "data": data}
+    with _lock:
+        _memory[(kind, key)] = record
+    try:
+        os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+        path = _path(kind, key)
+        tmp = path + ".tmp"
+        with gzip.open(tmp, "wt", encoding="utf-8") as f:
+            json.dump(record, f, separators=(",", ":"))
+        os.replace(tmp, path)  # Readers never see a half-written snapshot
+    except (OSError, TypeError, ValueError) as e:
+        logging.error(f"Snapshot Write Error: {e}")
+    return record["saved_at"]
+
+def get(kind, key):
+    """(data, saved_at) of the last good payload, or (None, None)."""
+    with _lock:
+        record = _memory.get((kind, key))
+    if record is None:
+        try:
+            with gzip.open(_path(kind, key), "rt", encoding="utf-8") as f:
+                record = json.load(f)
+        except FileNotFoundError:
+            instrumentation.count("cache.snapshot.miss")
+            return None, None
+        except (OSError, ValueError) as e:
+            logging.error(f"Snapshot Read Error: {e}")
+            return None, None
+        with _lock:
+            _memory.setdefault((kind, key), record)
+    instrumentation.count("cache.snapshot.hit")
+    return record["data"], record["saved_at"]
+
+def is_fresh(kind, saved_at):
+    return saved_at is not None and time.time() - saved_at < MAX_AGE.get(kind, 60)
+
+def describe_age(saved_at):
+    """'just now', '12 min ago', '3 h ago', '2 d ago'."""
+    secs = max(0, time.time() - saved_at)
+    if secs < 60: return "just now"
+    if secs < 3600: return f"{int(secs // 60)} min ago"
+    if secs < 86400: return f"{int(secs // 3600)} h ago"
+    return f"{int(secs // 86400)} d ago"
@@ -0,0 +1,110 @@
+import logging
+import threading
+import time
+
+import pandas as pd
+
+import app_state
+import instrumentation
+import market_data
+from fincalc.indicators import IndicatorEngine
+
+# --- SUPERSET PRICE HISTORY ---
+# Per ticker the stock screen keeps two frames in app_state.stock_cache: the full daily
+# history and a few days of intraday bars. Every period tab is a slice of one of them;
+# after the first download only the tail since the last bar is fetched.
+
+TAIL_TTL = 60                 # Seconds before the tail is re-fetched
+INTRADAY = {"period": "5d", "interval": "2m"}
+INTRADAY_KEEP = pd.Timedelta(days=8)
+INTRADAY_PERIODS = {"1d", "1wk"}
+DAILY_DAYS = {"1mo": 31, "3mo": 92, "6mo": 183, "1y": 366, "2y": 731, "5y": 1827, "10y": 3653}
+
+_locks = {}
+_locks_guard = threading.Lock()
+
+def _lock_for(key):
+    with _locks_guard:
+        return _locks.setdefault(key, threading.Lock())
+
+def _kind(period):
+    return "intraday" if period in INTRADAY_PERIODS else "daily"
+
+def _merge(old, new):
+    if old is None or old.empty: return new
+    if new is None or new.empty: return old
+    merged = pd.concat([old, new])
+    return merged[~merged.index.duplicated(keep='last')].sort_index()
+
+def _superset(ticker, kind):
+    key = f"{kind}:{ticker}"
+    with _lock_for(key):  # One download per ticker/kind at a time; waiters reuse its result
+        entry = app_state.stock_cache.get(key)
+        now = time.time()
+        if entry is not None and now - entry[0] < TAIL_TTL: return entry[1]
+
+        if entry is None or entry[1].empty:
+            params = {"period": "max", "interval": "1d"} if kind == "daily" else dict(INTRADAY)
+        else:
+            # The last bar may have been partial, so the tail starts on its day
+            params = {"start": entry[1].index[-1].strftime("%Y-%m-%d"), "interval": "1d" if kind == "daily" else INTRADAY["interval"]}
+        try:
+            with instrumentation.timer("net.yf.history"):
+                new = market_data.history(ticker, **params)
+        except Exception as e:
+            if entry is None: raise
+            logging.error(f"History Tail Error: {e}")
+            return entry[1]
+
+        frame = _merge(entry[1] if entry is not None else None, new)
+        if kind == "intraday" and not frame.empty:
+            frame = frame[frame.index >= frame.index[-1] - INTRADAY_KEEP]
+        app_state.stock_cache.set(key, (now, frame))
+        return frame
+
+def _slice(frame, period):
+    if frame is None or frame.empty: return frame
+    last = frame.index[-1]
+    if period == "1d": return frame[frame.index.normalize() == last.normalize()]
+    if period == "1wk": return frame[frame.index >= last - pd.Timedelta(days=7)]
+    if period == "ytd": return frame[frame.index.year == last.year]
+    days = DAILY_DAYS.get(period)
+    return frame[frame.index >= last - pd.Timedelta(days=days)] if days else frame
+
+def peek(ticker, period):
+    """(slice, fetched_at) from memory without touching the network, or (None, None)."""
+    entry = app_state.stock_cache.get(f"{_kind(period)}:{ticker}")
+    if entry is None: return None, None
+    return _slice(entry[1], period), entry[0]
+
+def is_fresh(fetched_at):
+    return fetched_at is not None and time.time() - fetched_at < TAIL_TTL
+
+def get_history(ticker, period):
+    """History for one period tab, sliced from the cached superset (refreshing its tail if stale)."""
+    return _slice(_superset(ticker, _kind(period)), period)
+
+def indicators(ticker, period, view):
+    """Indicator arrays aligned with view (a slice from get_history/peek), or None.
+
+    Engines run over the whole superset, so a 1mo view still gets a warmed-up EMA 50;
+    each call only feeds the bars added since the previous one.
+    """
+    kind = _kind(period)
+    entry = app_state.stock_cache.get(f"{kind}:{ticker}")
+    if entry is None or view is None or view.empty: return None
+    frame = entry[1]
+    index = frame.index
+    bars = (index.asi8, frame['High'].to_numpy(float), frame['Low'].to_numpy(float),
+            frame['Close'].to_numpy(float), frame['Volume'].to_numpy(float),
+            index.normalize().asi8 if kind == "intraday" else None)  # VWAP restarts each session
+
+    key = f"ind:{kind}:{ticker}"
+    with _lock_for(key):
+        engine = app_state.stock_cache.get(key)
+        if engine is None or not engine.sync(*bars):
+            engine = IndicatorEngine().load(*bars)
+            app_state.stock_cache.set(key, engine)
+        # The view is a suffix of the superset; bail out if they drifted apart meanwhile
+        if engine.times.view()[-1] != view.index.asi8[-1]: return None
+        return engine.tail(len(view))
@@ -0,0 +1,124 @@
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# --- LOCAL MARKET-DATA STUB SERVER ---
+# Serves fixtures recorded with FINCALC_TRANSPORT=record:<dir> at /fixtures/<key>, for
+# the app (FINCALC_TRANSPORT=stub:<url>), benchmarks and load tests. Latency and
+# errors are injected from a seeded RNG, so a run with the same settings sees the
+# same sequence of delays and failures.
+
+class StubServer:
+    def __init__(self, fixture_dir, host="127.0.0.1", port=0, latency=0.0, jitter=0.0,
+                 error_rate=0.0, error_status=503, seed=0):
+        self.fixture_dir = fixture_dir
+        self.latency, self.jitter = latency, jitter
+        self.error_rate, self.error_status = error_rate, error_status
+        self.stats = {"served": 0, "errors": 0, "missing": 0}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._cache = {}  # key -> fixture bytes; fixtures are read from disk once
+        self.httpd = ThreadingHTTPServer((host, port), self._handler())
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.handle(self)
+
+            def log_message(self, *args):
+                pass  # Load tests would drown in access logs
+
+        return Handler
+
+    def _draw(self):
+        with self._lock:
+            delay = self.latency + (self._rng.uniform(-self.jitter, self.jitter) if self.jitter else 0.0)
+            fail = self.error_rate > 0 and self._rng.random() < self.error_rate
+        return max(delay, 0.0), fail
+
+    def _fixture(self, key):
+        body = self._cache.get(key)
+        if body is None:
+            try:
+                with open(os.path.join(self.fixture_dir, key + ".json"), "rb") as f:
+                    body = self._cache[key] = f.read()
+            except OSError:
+                return None
+        return body
+
+    def handle(self, request):
+        delay, fail = self._draw()
+        if delay: time.sleep(delay)
+        match = re.fullmatch(r"/fixtures/([A-Za-z0-9_.-]+)", request.path)
+        body = self._fixture(match.group(1)) if match else None
+        with self._lock:
+            if fail: self.stats["errors"] += 1
+            elif body is None: self.stats["missing"] += 1
+            else: self.stats["served"] += 1
+        if fail:
+            status, body = self.error_status, json.dumps({"error": "injected"}).encode()
+        elif body is None:
+            status, body = 404, json.dumps({"error": "no fixture"}).encode()
+        else:
+            status = 200
+        request.send_response(status)
+        request.send_header("Content-Type", "application/json")
+        request.send_header("Content-Length", str(len(body)))
+        request.end_headers()
+        request.wfile.write(body)
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve recorded FinCalc fixtures over HTTP.")
+    parser.add_argument("fixture_dir")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="+/- seconds of uniform jitter")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests that fail")
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    server = StubServer(args.fixture_dir, args.host, args.port, args.latency, args.jitter,
+                        args.error_rate, args.error_status, args.seed)
+    print(f"Serving {args.fixture_dir} on {server.url} (FINCALC_TRANSPORT=stub:{server.url})")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,9 +1,32 @@
 import threading
+import time
 from kivy.clock import Clock
 
+# Foreground work in flight; prefetch.py only runs while this has been zero for a moment
+_active = 0
+_last_done = 0.0
+_active_lock = threading.Lock()
+
 def run_bg(target, *args, **kwargs):
     """Runs a function in a background thread."""
-    threading.Thread(target=target, args=args, kwargs=kwargs, daemon=True).start()
+    global _active
+    with _active_lock:
+        _active += 1
+    threading.Thread(target=_tracked, args=(target, args, kwargs), daemon=True).start()
+
+def _tracked(target, args, kwargs):
+    global _active, _last_done
+    try:
+        target(*args, **kwargs)
+    finally:
+        with _active_lock:
+            _active -= 1
+            _last_done = time.monotonic()
+
+def idle_for():
+    """Seconds since the last run_bg task finished; 0 while any is still running."""
+    with _active_lock:
+        return 0.0 if _active else time.monotonic() - _last_done
 
 def ui(callback, *args, **kwargs):
     """Schedules a function to run on the main UI thread."""
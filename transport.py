@@ -0,0 +1,224 @@
+import base64
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+
+import numpy as np
+import pandas as pd
+import requests
+
+# --- TRANSPORT ---
+# Every network call in the app goes through current(): JSON/HTTP requests
+# (CoinGecko, er-api, coin icons) and the yfinance calls (download, history, info).
+#   live                  real network (default)
+#   record:<dir>          real network, every response also saved as a fixture in <dir>
+#   replay:<dir>          fixtures only, straight from disk; a missing one is a connection error
+#   stub:<url>            fixtures served by a local stub server (stub_server.py), which
+#                         can add latency and inject errors
+# Pick one with FINCALC_TRANSPORT=<spec> or configure(<spec>).
+
+ENV_VAR = "FINCALC_TRANSPORT"
+
+class FixtureMissing(requests.exceptions.ConnectionError):
+    """No recorded response for this request (replay behaves like being offline)."""
+
+# --- FIXTURE FORMAT ---
+def fixture_key(kind, target, params=None):
+    """Stable file stem for one request: kind, a readable slug and a hash of the full request."""
+    if isinstance(target, (list, tuple)): target = " ".join(target)
+    request = json.dumps([kind, str(target), sorted((params or {}).items())], default=str)
+    slug = re.sub(r'[^A-Za-z0-9]+', '_', str(target).split("?")[0].split("//")[-1])[-40:].strip("_")
+    return f"{kind}-{slug}-{hashlib.sha1(request.encode()).hexdigest()[:12]}"
+
+def pack_frame(df):
+    """DataFrame (DatetimeIndex, flat or MultiIndex columns) -> JSON-safe dict."""
+    index = df.index
+    tz = str(index.tz) if getattr(index, "tz", None) is not None else None
+    return {
+        "index": ((index - pd.Timestamp(0, tz=tz)) // pd.Timedelta(microseconds=1)).tolist() if len(index) else [],
+        "tz": tz,
+        "index_name": index.name,
+        "columns": [list(c) if isinstance(c, tuple) else c for c in df.columns],
+        "dtypes": [str(t) for t in df.dtypes],
+        "data": [[None if v != v else v for v in row] for row in df.to_numpy(object).tolist()],
+    }
+
+def unpack_frame(packed):
+    index = pd.to_datetime(packed["index"], unit="us", utc=True)
+    index = index.tz_convert(packed["tz"]) if packed["tz"] else index.tz_localize(None)
+    index.name = packed.get("index_name")  # "Date"/"Datetime" from yfinance; absent in older recordings
+    columns = packed["columns"]
+    if columns and isinstance(columns[0], list): columns = pd.MultiIndex.from_tuples([tuple(c) for c in columns])
+    dtypes = packed["dtypes"]
+    if all(t.startswith(("float", "int")) for t in dtypes):
+        # Price frames: one float block (None -> nan), then back to int where a column had no gaps
+        values = np.array(packed["data"], dtype=np.float64).reshape(len(index), len(columns))
+        gaps = np.isnan(values).any(axis=0)
+        return pd.DataFrame({
+            i: values[:, i].astype(t) if t.startswith("int") and not gaps[i] else values[:, i]
+            for i, t in enumerate(dtypes)
+        }, index=index).set_axis(columns, axis=1)
+    df = pd.DataFrame(packed["data"], index=index, columns=columns, dtype=object)
+    for col, dtype in zip(df.columns, dtypes):
+        df[col] = df[col].astype(np.float64 if dtype.startswith("int") and df[col].isna().any() else dtype)
+    return df
+
+def response_from(record):
+    """A requests.Response rebuilt from a recorded {"status", "json"|"body_b64"} entry."""
+    response = requests.models.Response()
+    response.status_code = record["status"]
+    response.url = record.get("url", "")
+    response._content_consumed = True  # iter_content() then yields from the body
+    if "json" in record:
+        response._content = json.dumps(record["json"]).encode()
+        response.headers["Content-Type"] = "application/json"
+    else:
+        response._content = base64.b64decode(record.get("body_b64", ""))
+    return response
+
+def _record_response(response):
+    record = {"status": response.status_code, "url": getattr(response, "url", "")}
+    try:
+        record["json"] = response.json()
+    except ValueError:
+        record["body_b64"] = base64.b64encode(b"".join(response.iter_content(8192))).decode()
+    return record
+
+# --- TRANSPORTS ---
+def _yfinance():
+    import yfinance as yf
+    # Let history()/info() raise network errors instead of logging them and returning an
+    # empty frame, so the Yahoo circuit breaker (networking.py) can see outages
+    config = getattr(yf, "config", None)
+    if config is not None: config.debug.hide_exceptions = False
+    return yf
+
+class LiveTransport:
+    name = "live"
+
+    def get(self, url, params=None, timeout=10, stream=False):
+        return requests.get(url, params=params, timeout=timeout, stream=stream)
+
+    def download(self, tickers, **kwargs):
+        return _yfinance().download(tickers, **kwargs)
+
+    def history(self, ticker, **kwargs):
+        return _yfinance().Ticker(ticker).history(**kwargs)
+
+    def info(self, ticker):
+        return _yfinance().Ticker(ticker).info
+
+class RecordingTransport:
+    """Passes calls to inner and saves each successful response as <dir>/<fixture_key>.json."""
+    name = "record"
+
+    def __init__(self, fixture_dir, inner=None):
+        self.fixture_dir = fixture_dir
+        self.inner = inner or LiveTransport()
+        os.makedirs(fixture_dir, exist_ok=True)
+
+    def _save(self, key, record):
+        path = os.path.join(self.fixture_dir, key + ".json")
+        tmp = path + ".tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(record, f)
+            os.replace(tmp, path)
+        except (OSError, TypeError, ValueError) as e:
+            logging.error(f"Fixture Write Error: {e}")
+
+    def get(self, url, params=None, timeout=10, stream=False):
+        response = self.inner.get(url, params=params, timeout=timeout)  # Buffered so it can be saved
+        if response.status_code < 400: self._save(fixture_key("http", url, params), _record_response(response))
+        return response
+
+    def download(self, tickers, **kwargs):
+        frame = self.inner.download(tickers, **kwargs)
+        self._save(fixture_key("download", tickers, kwargs), {"frame": pack_frame(frame)})
+        return frame
+
+    def history(self, ticker, **kwargs):
+        frame = self.inner.history(ticker, **kwargs)
+        self._save(fixture_key("history", ticker, kwargs), {"frame": pack_frame(frame)})
+        return frame
+
+    def info(self, ticker):
+        info = self.inner.info(ticker)
+        self._save(fixture_key("info", ticker), {"info": info})
+        return info
+
+class ReplayTransport:
+    """Serves recorded fixtures; fetch(key) is the only thing subclasses change."""
+    name = "replay"
+
+    def __init__(self, fixture_dir):
+        self.fixture_dir = fixture_dir
+
+    def fetch(self, key):
+        try:
+            with open(os.path.join(self.fixture_dir, key + ".json"), encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            raise FixtureMissing(f"No fixture {key}") from None
+
+    def get(self, url, params=None, timeout=10, stream=False):
+        return response_from(self.fetch(fixture_key("http", url, params)))
+
+    def download(self, tickers, **kwargs):
+        return unpack_frame(self.fetch(fixture_key("download", tickers, kwargs))["frame"])
+
+    def history(self, ticker, **kwargs):
+        return unpack_frame(self.fetch(fixture_key("history", ticker, kwargs))["frame"])
+
+    def info(self, ticker):
+        return self.fetch(fixture_key("info", ticker))["info"]
+
+class StubTransport(ReplayTransport):
+    """Fetches fixtures over HTTP from stub_server.py (real sockets, injected latency/errors)."""
+    name = "stub"
+
+    def __init__(self, base_url, timeout=10):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    def fetch(self, key):
+        response = self.session.get(f"{self.base_url}/fixtures/{key}", timeout=self.timeout)
+        if response.status_code == 404: raise FixtureMissing(f"No fixture {key}")
+        response.raise_for_status()
+        return response.json()
+
+    def get(self, url, params=None, timeout=10, stream=False):
+        # The stub's own errors (429/503) surface like the real API's would
+        response = self.session.get(f"{self.base_url}/fixtures/{fixture_key('http', url, params)}", timeout=timeout)
+        if response.status_code == 404: raise FixtureMissing(f"No fixture for {url}")
+        if response.status_code >= 400: return response
+        return response_from(response.json())
+
+def from_spec(spec):
+    kind, _, arg = (spec or "live").partition(":")
+    if kind == "live": return LiveTransport()
+    if kind == "record": return RecordingTransport(arg or "fixtures")
+    if kind == "replay": return ReplayTransport(arg or "fixtures")
+    if kind == "stub": return StubTransport(arg or "http://127.0.0.1:8765")
+    raise ValueError(f"Unknown transport: {spec}")
+
+_current = None
+_lock = threading.Lock()
+
+def current():
+    global _current
+    with _lock:
+        if _current is None: _current = from_spec(os.environ.get(ENV_VAR))
+        return _current
+
+def configure(spec_or_transport):
+    """Switches every network path to another transport; returns the previous one."""
+    global _current
+    with _lock:
+        previous = _current
+        _current = from_spec(spec_or_transport) if isinstance(spec_or_transport, (str, type(None))) else spec_or_transport
+        return previous
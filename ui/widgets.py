@@ -1,5 +1,11 @@
 from kivymd.uix.list import TwoLineAvatarIconListItem, IconLeftWidget
+from kivymd.uix.boxlayout import MDBoxLayout
 from kivy.uix.image import AsyncImage
+from kivy.uix.widget import Widget
+from kivy.uix.behaviors import ButtonBehavior
+from kivy.uix.recycleview.views import RecycleDataViewBehavior
+from kivy.graphics import Color, Line
+from kivy.properties import ListProperty, StringProperty, ColorProperty, ObjectProperty
 
 class CryptoListItem(TwoLineAvatarIconListItem):
     def __init__(self, **kwargs):
@@ -10,4 +16,34 @@ class CryptoListItem(TwoLineAvatarIconListItem):
             img = AsyncImage(source=self.image_source, size_hint=(None, None), size=("40dp", "40dp"))
             container = IconLeftWidget()
             container.add_widget(img)
-            self.add_widget(container)
\ No newline at end of file
+            self.add_widget(container)
+
+class Sparkline(Widget):
+    """Polyline of 0..1 values drawn straight onto the canvas (no matplotlib per row)."""
+    values = ListProperty()
+    color = ColorProperty([0, 0.78, 0.33, 1])
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.bind(pos=self.redraw, size=self.redraw, values=self.redraw, color=self.redraw)
+
+    def redraw(self, *args):
+        self.canvas.clear()
+        n = len(self.values)
+        if n < 2: return
+        step = self.width / (n - 1)
+        points = []
+        for i, v in enumerate(self.values):
+            points += [self.x + i * step, self.y + v * self.height]
+        with self.canvas:
+            Color(*self.color)
+            Line(points=points, width=1.1)
+
+class WatchlistRow(RecycleDataViewBehavior, ButtonBehavior, MDBoxLayout):
+    """RecycleView row: ticker/price, sparkline, daily change. Layout lives in interface.kv."""
+    ticker = StringProperty()
+    price_text = StringProperty()
+    change_text = StringProperty()
+    change_color = ColorProperty([0, 0.78, 0.33, 1])
+    spark = ListProperty()
+    owner = ObjectProperty(None, allownone=True)  # WatchlistScreen handling taps / removal
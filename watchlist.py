@@ -0,0 +1,69 @@
+import logging
+import threading
+import time
+
+import instrumentation
+import snapshots
+import market_data
+from fincalc.quotes import build_quotes, close_matrix
+
+# --- WATCHLIST QUOTES ---
+# Quotes are cached per ticker with a TTL; a refresh downloads only the stale tickers,
+# all in one yf.download call, so a refresh cycle costs one request however long the list is.
+
+QUOTE_TTL = 60         # Seconds a quote is served from memory
+SPARK_PERIOD = "1mo"   # Daily closes behind each sparkline
+
+_quotes = {}  # ticker -> (fetched_at, quote)
+_forgotten = {}  # ticker -> when forget() dropped it; a download started earlier must not re-add it
+_lock = threading.Lock()
+
+def load_snapshot():
+    """Seeds the cache from the last saved quotes so the list renders before the first download."""
+    data, saved_at = snapshots.get("watchlist", "quotes")
+    if data:
+        with _lock:
+            for ticker, quote in data.items():
+                _quotes.setdefault(ticker, (saved_at, quote))
+    return saved_at
+
+def get_quotes(tickers, max_age=QUOTE_TTL):
+    """ticker -> quote for every ticker that has one; stale tickers are fetched in one batch."""
+    now = time.time()
+    with _lock:
+        stale = [t for t in tickers if t not in _quotes or now - _quotes[t][0] >= max_age]
+    instrumentation.count("cache.quote.hit", len(tickers) - len(stale))
+
+    if stale:
+        instrumentation.count("cache.quote.miss", len(stale))
+        try:
+            with instrumentation.timer("net.yf.download"):
+                data = market_data.bars(stale, period=SPARK_PERIOD, interval="1d", group_by='ticker', progress=False)
+        except Exception as e:
+            logging.error(f"Watchlist Fetch Error: {e}")
+            data = None
+        fresh = build_quotes(close_matrix(data, stale))
+        if fresh:
+            with _lock:
+                for ticker, quote in fresh.items():
+                    if _forgotten.get(ticker, 0) < now: _quotes[ticker] = (now, quote)
+                saved = {t: q for t, (_, q) in _quotes.items()}
+            snapshots.put("watchlist", "quotes", saved)
+        return {**cached_quotes(tickers), **fresh}  # The caller still gets what it asked for
+
+    return cached_quotes(tickers)
+
+def cached_quotes(tickers):
+    """Whatever is in memory for tickers, however old; never touches the network."""
+    with _lock:
+        return {t: _quotes[t][1] for t in tickers if t in _quotes}
+
+def quote_age(ticker):
+    with _lock:
+        entry = _quotes.get(ticker)
+    return entry[0] if entry else None
+
+def forget(ticker):
+    with _lock:
+        _quotes.pop(ticker, None)
+        _forgotten[ticker] = time.time()